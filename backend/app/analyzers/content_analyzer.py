@@ -2,112 +2,96 @@
 Content Analyzer - Check content structure for AI extractability
 """
 import re
-from typing import Dict, List, Any
-from bs4 import BeautifulSoup
+from app.analyzers.document import ParsedDocument
+from app.results import CategoryResult
+from app.scoring import score_category
 
+# Markers of FAQ/Q&A sections, matched anywhere in the raw HTML
+FAQ_PATTERN = re.compile("|".join(re.escape(indicator) for indicator in [
+    "faq", "frequently asked", "questions",
+    '<div class="faq', '<section class="faq',
+    "accordion", "qa-section"
+]), re.IGNORECASE)
 
-def analyze_content(html: str) -> Dict[str, Any]:
+
+def analyze_content(doc: ParsedDocument) -> CategoryResult:
     """Analyze HTML content structure for AI readability"""
     issues = []
     recommendations = []
     
-    soup = BeautifulSoup(html, "html.parser")
-    
-    # Remove script and style elements
-    for script in soup(["script", "style"]):
-        script.decompose()
-    
     # Check for H1
-    h1_tags = soup.find_all("h1")
+    h1_tags = [h for h in doc.headings if h[0] == 1]
     has_h1 = len(h1_tags) >= 1
     
     if not has_h1:
-        issues.append("No H1 heading found")
-        recommendations.append("Add a clear H1 heading that describes the page content")
+        issues.append("content.h1_missing")
+        recommendations.append("content.add_h1")
     elif len(h1_tags) > 1:
-        issues.append(f"Multiple H1 tags found ({len(h1_tags)}) - should have only one")
-        recommendations.append("Use only one H1 per page for clarity")
+        issues.append(("content.h1_multiple", len(h1_tags)))
+        recommendations.append("content.single_h1")
     else:
-        issues.append("✓ Single H1 heading present")
+        issues.append("content.h1_ok")
     
     # Analyze heading structure
-    headings = []
-    for i in range(1, 7):
-        for h in soup.find_all(f"h{i}"):
-            text = h.get_text(strip=True)[:100]
-            headings.append({"level": i, "text": text})
+    headings = [{"level": level, "text": text} for level, text in doc.headings]
     
     if len(headings) < 3:
-        issues.append("Limited heading structure")
-        recommendations.append("Use more headings (H2, H3) to organize content hierarchically")
+        issues.append("content.few_headings")
+        recommendations.append("content.add_headings")
     else:
-        issues.append(f"✓ Good heading structure ({len(headings)} headings)")
+        issues.append(("content.headings_ok", len(headings)))
     
     # Check for FAQ sections
-    text_lower = html.lower()
-    has_faq = any(indicator in text_lower for indicator in [
-        "faq", "frequently asked", "questions", 
-        '<div class="faq', '<section class="faq',
-        "accordion", "qa-section"
-    ])
+    has_faq = FAQ_PATTERN.search(doc.html) is not None
     
     if has_faq:
-        issues.append("✓ FAQ/Q&A section detected")
+        issues.append("content.faq_found")
     else:
-        recommendations.append("Consider adding an FAQ section - very valuable for AI answers")
+        recommendations.append("content.add_faq")
     
     # Check for answer-first content (first paragraph should be substantial)
-    paragraphs = soup.find_all("p")
     first_substantial_p = None
-    for p in paragraphs[:5]:
-        text = p.get_text(strip=True)
+    for text in doc.paragraphs[:5]:
         if len(text) > 50:
             first_substantial_p = text
             break
     
     has_answer_first = first_substantial_p and len(first_substantial_p) > 100
     if has_answer_first:
-        issues.append("✓ Answer-first content pattern detected")
+        issues.append("content.answer_first")
     else:
-        recommendations.append("Start with a clear, direct answer in the first paragraph")
+        recommendations.append("content.add_answer_first")
     
     # Word count
-    text = soup.get_text(separator=" ", strip=True)
-    word_count = len(text.split())
+    word_count = doc.word_count
     
     if word_count < 300:
-        issues.append(f"Low word count ({word_count} words)")
-        recommendations.append("Add more comprehensive content (aim for 500+ words)")
+        issues.append(("content.words_low", word_count))
+        recommendations.append("content.add_words")
     elif word_count < 500:
-        issues.append(f"Moderate word count ({word_count} words)")
+        issues.append(("content.words_moderate", word_count))
     else:
-        issues.append(f"✓ Good content depth ({word_count} words)")
+        issues.append(("content.words_ok", word_count))
     
-    # Calculate score
-    score = 40  # Base score
-    
-    if has_h1 and len(h1_tags) == 1:
-        score += 15
-    if len(headings) >= 3:
-        score += 15
-    if has_faq:
-        score += 20
-    if has_answer_first:
-        score += 10
-    if word_count >= 500:
-        score += 15
-    elif word_count >= 300:
-        score += 5
-    
-    score = min(100, max(0, score))
-    
-    return {
-        "has_h1": has_h1,
+    # Scored by the shared rule table (app/scoring.py)
+    features = {
+        "h1_count": len(h1_tags),
         "heading_count": len(headings),
         "has_faq_section": has_faq,
-        "has_answer_first": has_answer_first,
+        "has_answer_first": bool(has_answer_first),
         "word_count": word_count,
-        "score": score,
-        "issues": issues,
-        "recommendations": recommendations
     }
+    
+    return CategoryResult(
+        score_category("content", features),
+        features,
+        issues,
+        recommendations,
+        {
+            "has_h1": has_h1,
+            "heading_count": len(headings),
+            "has_faq_section": has_faq,
+            "has_answer_first": has_answer_first,
+            "word_count": word_count,
+        },
+    )
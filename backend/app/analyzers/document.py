@@ -0,0 +1,199 @@
+"""
+Parsed Document - Single-pass HTML extraction shared by all page analyzers
+"""
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from app import config
+
+# Elements that never have children (not pushed onto the open-element stack)
+VOID_ELEMENTS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen",
+    "link", "menuitem", "meta", "param", "source", "track", "wbr",
+    "basefont", "bgsound", "command", "frame", "image", "isindex",
+    "nextid", "spacer",
+])
+
+# Text inside these elements is not visible page text
+HIDDEN_TEXT_ELEMENTS = frozenset(["script", "style", "template", "rt", "rp"])
+
+HEADING_LEVELS = {f"h{i}": i for i in range(1, 7)}
+
+JSON_LD_TYPE = "application/ld+json"
+
+
+class ParsedDocument:
+    """Everything the page analyzers need, extracted in one pass over the HTML"""
+
+    def __init__(self, html: str):
+        self.html = html
+        self.title: Optional[str] = None
+        self.headings: List[Tuple[int, str]] = []
+        self.paragraphs: List[str] = []
+        self.meta: List[Dict[str, str]] = []
+        self.links: List[Dict[str, str]] = []
+        self.anchors: List[str] = []
+        self.base_href: Optional[str] = None
+        self.json_ld: List[str] = []
+        self.text_chunks: List[str] = []
+        self.element_count = 0
+
+    @property
+    def visible_text(self) -> str:
+        """Visible text joined with single spaces"""
+        return " ".join(self.text_chunks)
+
+    @property
+    def text_length(self) -> int:
+        """Length of visible text with whitespace around each text node stripped"""
+        return sum(len(chunk) for chunk in self.text_chunks)
+
+    @property
+    def word_count(self) -> int:
+        return sum(len(chunk.split()) for chunk in self.text_chunks)
+
+    def find_meta(self, attr: str, value: str) -> Optional[Dict[str, str]]:
+        """First <meta> tag whose attribute equals value"""
+        for tag in self.meta:
+            if tag.get(attr) == value:
+                return tag
+        return None
+
+    def find_link(self, rel: str) -> Optional[Dict[str, str]]:
+        """First <link> tag whose rel list contains rel"""
+        for tag in self.links:
+            if rel in tag.get("rel", "").split():
+                return tag
+        return None
+
+
+class DocumentParser(HTMLParser):
+    """Streaming parser that fills a ParsedDocument; feed() may be called per chunk"""
+
+    def __init__(self, html: str = ""):
+        super().__init__(convert_charrefs=True)
+        self.document = ParsedDocument(html)
+        self._stack: List[str] = []
+        self._collectors: List[Tuple[str, List[str], int, int]] = []
+        self._hidden_depth = 0
+        self._pending: List[str] = []
+        self._json_ld: Optional[List[str]] = None
+
+    # -- text handling -------------------------------------------------
+
+    def _flush_text(self) -> None:
+        if not self._pending:
+            return
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if not text:
+            return
+        self.document.text_chunks.append(text)
+        for _, parts, _, _ in self._collectors:
+            parts.append(text)
+
+    def handle_data(self, data: str) -> None:
+        if self._json_ld is not None:
+            self._json_ld.append(data)
+            return
+        if self._hidden_depth:
+            return
+        self._pending.append(data)
+
+    def unknown_decl(self, data: str) -> None:
+        self._flush_text()
+        if data.upper().startswith("CDATA[") and not self._hidden_depth:
+            self._pending.append(data[len("CDATA["):])
+            self._flush_text()
+
+    def handle_comment(self, data: str) -> None:
+        self._flush_text()
+
+    def handle_decl(self, decl: str) -> None:
+        self._flush_text()
+
+    def handle_pi(self, data: str) -> None:
+        self._flush_text()
+
+    # -- element handling ----------------------------------------------
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._flush_text()
+        self.document.element_count += 1
+        attr_map = {name: value or "" for name, value in attrs}
+
+        if tag == "meta":
+            self.document.meta.append(attr_map)
+        elif tag == "link":
+            self.document.links.append(attr_map)
+        elif tag == "a" and "href" in attr_map:
+            if "nofollow" not in attr_map.get("rel", "").lower().split():
+                self.document.anchors.append(attr_map["href"])
+        elif tag == "base" and "href" in attr_map and self.document.base_href is None:
+            self.document.base_href = attr_map["href"]
+
+        if tag in VOID_ELEMENTS:
+            return
+
+        self._stack.append(tag)
+        depth = len(self._stack)
+
+        if tag == "p":
+            self._collectors.append((tag, [], depth, len(self.document.paragraphs)))
+            self.document.paragraphs.append("")
+        elif tag in HEADING_LEVELS:
+            self._collectors.append((tag, [], depth, len(self.document.headings)))
+            self.document.headings.append((HEADING_LEVELS[tag], ""))
+        elif tag == "title" and self.document.title is None:
+            self._collectors.append((tag, [], depth, 0))
+            self.document.title = ""
+
+        if tag in HIDDEN_TEXT_ELEMENTS:
+            self._hidden_depth += 1
+            if tag == "script" and attr_map.get("type", "").strip().lower() == JSON_LD_TYPE:
+                self._json_ld = []
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        self._flush_text()
+        if tag not in self._stack:
+            return
+        while self._stack:
+            closed = self._stack.pop()
+            self._close_element(closed, len(self._stack) + 1)
+            if closed == tag:
+                break
+
+    def _close_element(self, tag: str, depth: int) -> None:
+        if tag in HIDDEN_TEXT_ELEMENTS:
+            self._hidden_depth -= 1
+            if tag == "script" and self._json_ld is not None:
+                self.document.json_ld.append("".join(self._json_ld))
+                self._json_ld = None
+
+        if self._collectors and self._collectors[-1][2] == depth:
+            name, parts, _, index = self._collectors.pop()
+            text = "".join(parts)
+            if name == "title":
+                self.document.title = text
+            elif name == "p":
+                self.document.paragraphs[index] = text
+            else:
+                self.document.headings[index] = (HEADING_LEVELS[name], text[:100])
+
+    def close(self) -> ParsedDocument:
+        super().close()
+        self._flush_text()
+        while self._stack:
+            closed = self._stack.pop()
+            self._close_element(closed, len(self._stack) + 1)
+        return self.document
+
+
+def parse_document(html: str, backend: Optional[str] = None) -> ParsedDocument:
+    """Parse HTML once into a ParsedDocument with the given (or configured) backend"""
+    from app.analyzers.parser_backends import get_parser
+    return get_parser(backend or config.HTML_PARSER)(html)
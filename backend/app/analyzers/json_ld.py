@@ -0,0 +1,202 @@
+"""
+JSON-LD Scanner - Pull the entities the schema analyzer scores out of JSON-LD blocks
+"""
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, Dict, Iterator, List
+
+# Property values the schema checks look at; everything else is stepped over unread
+CHECKED_PROPERTIES = frozenset(["headline", "author", "name", "mainEntity"])
+
+STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+STRUCTURE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]', re.DOTALL)
+SCALAR = re.compile(r'[^\s,\]}]+')
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_decoder = json.JSONDecoder()
+
+
+def iter_entities(value: Any, allow_graph: bool = True) -> Iterator[Dict[str, Any]]:
+    """Entities of a decoded block: top-level objects, with @graph members in place of a bare wrapper"""
+    for item in value if isinstance(value, list) else [value]:
+        if not isinstance(item, dict):
+            continue
+        graph = item.get("@graph") if allow_graph else None
+        if isinstance(graph, list):
+            if "@type" in item:
+                yield item
+            yield from iter_entities(graph, allow_graph=False)
+        else:
+            yield item
+
+
+class ShallowScanner:
+    """
+    Single forward pass over a JSON-LD block that yields the same entities as
+    iter_entities(json.loads(text)), but shallow: keys keep their order and only
+    @type is decoded. The checked properties become stand-ins with the same
+    truthiness (and list-ness for mainEntity), and every other value is None.
+
+    Nested values are skipped by bracket matching over a C regex instead of
+    being decoded, so memory stays flat on multi-megabyte catalogs. The price is
+    lazy validation: syntax errors inside skipped values go unnoticed.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def entities(self) -> List[Dict[str, Any]]:
+        found: List[Dict[str, Any]] = []
+        if self._peek() == "[":
+            self.pos += 1
+            if self._peek() == "]":
+                self.pos += 1
+            else:
+                while True:
+                    if self._peek() == "{":
+                        found.extend(self._object(allow_graph=True))
+                    else:
+                        self._skip()
+                    if not self._comma_or(close="]"):
+                        break
+        elif self._peek() == "{":
+            found.extend(self._object(allow_graph=True))
+        else:
+            self._skip()
+        self._whitespace()
+        if self.pos != len(self.text):
+            raise ValueError(f"Extra data at {self.pos}")
+        return found
+
+    def _whitespace(self) -> None:
+        self.pos = WHITESPACE.match(self.text, self.pos).end()
+
+    def _peek(self) -> str:
+        self._whitespace()
+        if self.pos >= len(self.text):
+            raise ValueError("Unexpected end of JSON-LD block")
+        return self.text[self.pos]
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Expected {char!r} at {self.pos}")
+        self.pos += 1
+
+    def _comma_or(self, close: str) -> bool:
+        """Consume "," (True, more follows) or the closing bracket (False)"""
+        char = self._peek()
+        self.pos += 1
+        if char == ",":
+            return True
+        if char == close:
+            return False
+        raise ValueError(f"Expected ',' or {close!r} at {self.pos - 1}")
+
+    def _object(self, allow_graph: bool) -> List[Dict[str, Any]]:
+        shallow: Dict[str, Any] = {}
+        graph: List[Dict[str, Any]] = []
+        has_graph = False
+        self._expect("{")
+        if self._peek() == "}":
+            self.pos += 1
+            return [shallow]
+
+        while True:
+            if self._peek() != '"':
+                raise ValueError(f"Expected property name at {self.pos}")
+            key, self.pos = scanstring(self.text, self.pos + 1)
+            self._expect(":")
+            if key == "@type":
+                self._whitespace()
+                shallow[key], self.pos = _decoder.raw_decode(self.text, self.pos)
+            elif key == "@graph" and allow_graph:
+                # Like a dict, a repeated key keeps only its last value
+                graph = []
+                has_graph = self._peek() == "["
+                if has_graph:
+                    graph = self._graph()
+                else:
+                    self._skip()
+                shallow[key] = None
+            elif key in CHECKED_PROPERTIES:
+                is_list = self._peek() == "["
+                truthy = self._truthy()
+                shallow[key] = ([None] if truthy else []) if key == "mainEntity" and is_list else truthy
+            else:
+                self._skip()
+                shallow[key] = None
+            if not self._comma_or(close="}"):
+                break
+
+        if not has_graph:
+            return [shallow]
+        return ([shallow] if "@type" in shallow else []) + graph
+
+    def _graph(self) -> List[Dict[str, Any]]:
+        members: List[Dict[str, Any]] = []
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return members
+        while True:
+            if self._peek() == "{":
+                members.extend(self._object(allow_graph=False))
+            else:
+                self._skip()
+            if not self._comma_or(close="]"):
+                return members
+
+    def _truthy(self) -> bool:
+        """Truthiness of the value at pos (as Python would see it decoded), consuming it"""
+        char = self._peek()
+        start = self.pos
+        if char in "[{":
+            self.pos += 1
+            empty = self._peek() in "]}"
+            self.pos = start
+            self._skip()
+            return not empty
+        if char == '"':
+            self._skip()
+            return self.pos - start > 2
+        self._skip()
+        token = self.text[start:self.pos]
+        if token in ("true", "false", "null"):
+            return token == "true"
+        return float(token) != 0
+
+    def _skip(self) -> None:
+        """Step over one value without decoding it"""
+        char = self._peek()
+        if char == '"':
+            match = STRING.match(self.text, self.pos)
+            if match is None:
+                raise ValueError(f"Unterminated string at {self.pos}")
+            self.pos = match.end()
+        elif char in "[{":
+            depth = 0
+            for match in STRUCTURE.finditer(self.text, self.pos):
+                token = match.group()
+                if token in ("[", "{"):
+                    depth += 1
+                elif token in ("]", "}"):
+                    depth -= 1
+                    if depth == 0:
+                        self.pos = match.end()
+                        return
+            raise ValueError("Unbalanced brackets in JSON-LD block")
+        else:
+            match = SCALAR.match(self.text, self.pos)
+            token = match.group() if match else ""
+            if token not in ("true", "false", "null"):
+                float(token)  # ValueError for anything that is not a JSON scalar
+            self.pos = match.end()
+
+
+def scan_block(text: str, stream_threshold: int) -> List[Dict[str, Any]]:
+    """Entities of one block; big blocks are scanned shallowly instead of decoded (ValueError if malformed)"""
+    if len(text) > stream_threshold:
+        return ShallowScanner(text.strip()).entities()
+    return list(iter_entities(json.loads(text)))
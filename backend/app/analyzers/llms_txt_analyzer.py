@@ -2,83 +2,99 @@
 llms.txt Analyzer - Check for the emerging LLM instruction file
 """
 import httpx
-from typing import Dict, Any
+from typing import Optional
+from app.cache import side_file_cache
+from app.http_client import get_client
+from app.results import CategoryResult
+from app.scoring import score_category
 
 
-async def analyze_llms_txt(base_url: str) -> Dict[str, Any]:
-    """Analyze llms.txt file presence and content"""
+def analyze_llms_response(response: httpx.Response) -> CategoryResult:
+    """Score a fetched llms.txt response"""
     issues = []
     recommendations = []
     
+    if response.status_code == 404:
+        features = {"found": False}
+        return CategoryResult(
+            score_category("llms_txt", features),
+            features,
+            ["llms.missing"],
+            ["llms.add", "llms.standard", "llms.include"],
+            {"found": False},
+        )
+    
+    if response.status_code == 200:
+        content = response.text
+        
+        # Basic analysis of llms.txt content
+        issues.append("llms.found")
+        
+        # Check content quality
+        if len(content) < 50:
+            issues.append("llms.minimal")
+            recommendations.append("llms.expand")
+        elif len(content) > 200:
+            issues.append("llms.substantial")
+        
+        # Check for key sections (heuristic)
+        content_lower = content.lower()
+        has_description = any(kw in content_lower for kw in ["purpose", "about", "description"])
+        if has_description:
+            issues.append("llms.has_description")
+        
+        has_attribution = any(kw in content_lower for kw in ["contact", "author", "source"])
+        if has_attribution:
+            issues.append("llms.has_attribution")
+        
+        # Scored by the shared rule table (app/scoring.py)
+        features = {
+            "found": True,
+            "content_length": len(content),
+            "has_description": has_description,
+            "has_attribution": has_attribution,
+        }
+        
+        return CategoryResult(
+            score_category("llms_txt", features),
+            features,
+            issues,
+            recommendations,
+            {"found": True},
+            preview=content[:1000],
+        )
+    
+    # Other status codes
+    features = {"found": False}
+    return CategoryResult(
+        score_category("llms_txt", features),
+        features,
+        [("llms.status", response.status_code)],
+        ["llms.make_accessible"],
+        {"found": False},
+    )
+
+
+def llms_fetch_failed(error: Exception) -> CategoryResult:
+    """Result for an llms.txt that could not be fetched"""
+    features = {"found": False, "fetch_error": True}
+    return CategoryResult(
+        score_category("llms_txt", features),
+        features,
+        [("llms.fetch_failed", str(error))],
+        ["llms.consider"],
+        {"found": False},
+    )
+
+
+async def analyze_llms_txt(base_url: str, client: Optional[httpx.AsyncClient] = None) -> CategoryResult:
+    """Analyze llms.txt file presence and content"""
     try:
         llms_url = f"{base_url.rstrip('/')}/llms.txt"
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(llms_url)
-            
-            if response.status_code == 404:
-                return {
-                    "found": False,
-                    "content": None,
-                    "score": 40,
-                    "issues": ["No llms.txt file found"],
-                    "recommendations": [
-                        "Consider adding an llms.txt file to guide AI assistants",
-                        "llms.txt is an emerging standard for AI crawler instructions",
-                        "Include: site purpose, key content areas, preferred citation format"
-                    ]
-                }
-            
-            if response.status_code == 200:
-                content = response.text
-                
-                # Basic analysis of llms.txt content
-                score = 80
-                issues.append("✓ llms.txt file found!")
-                
-                # Check content quality
-                if len(content) < 50:
-                    score -= 20
-                    issues.append("llms.txt content is minimal")
-                    recommendations.append("Expand llms.txt with more details about your site")
-                elif len(content) > 200:
-                    score += 10
-                    issues.append("✓ llms.txt has substantial content")
-                
-                # Check for key sections (heuristic)
-                content_lower = content.lower()
-                if any(kw in content_lower for kw in ["purpose", "about", "description"]):
-                    score += 5
-                    issues.append("✓ Includes site description")
-                
-                if any(kw in content_lower for kw in ["contact", "author", "source"]):
-                    score += 5
-                    issues.append("✓ Includes attribution info")
-                
-                score = min(100, max(0, score))
-                
-                return {
-                    "found": True,
-                    "content": content[:1000],
-                    "score": score,
-                    "issues": issues,
-                    "recommendations": recommendations
-                }
-            
-            # Other status codes
-            return {
-                "found": False,
-                "content": None,
-                "score": 40,
-                "issues": [f"llms.txt returned status {response.status_code}"],
-                "recommendations": ["Ensure llms.txt is publicly accessible"]
-            }
-            
+        client = client or get_client()
+        # Network failures are cached for SIDE_FILE_CACHE_ERROR_TTL like error statuses
+        return await side_file_cache.fetch(llms_url, analyze_llms_response, client, on_error=llms_fetch_failed)
+        
     except Exception as e:
-        return {
-            "found": False,
-            "content": None,
-            "score": 40,
-            "issues": [f"Could not check llms.txt: {str(e)}"],
-            "recommendations": ["Consider adding an llms.txt file"]
-        }
+        return llms_fetch_failed(e)
@@ -0,0 +1,186 @@
+"""
+Parser Backends - Interchangeable HTML front ends that all produce a ParsedDocument
+
+    stream      html.parser events, no tree (default, stdlib only)
+    soup        BeautifulSoup tree; the reference the others must match
+    lxml        libxml2 tokenizer driving the stream handlers (needs lxml)
+    selectolax  Lexbor C tree (needs selectolax)
+
+Third-party parsers are imported the first time their backend parses a page,
+so only the configured backend's package is ever loaded.
+"""
+import importlib.util
+from typing import Callable, Dict, List, Optional, Tuple
+from app.analyzers.document import (
+    DocumentParser, ParsedDocument, HEADING_LEVELS, HIDDEN_TEXT_ELEMENTS, JSON_LD_TYPE,
+)
+
+
+def parse_stream(html: str) -> ParsedDocument:
+    """Event-driven single pass; never builds a tree"""
+    parser = DocumentParser(html)
+    parser.feed(html)
+    return parser.close()
+
+
+def parse_soup(html: str) -> ParsedDocument:
+    """Tree-based reference implementation (the original analyzers' BeautifulSoup path)"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    doc = ParsedDocument(html)
+
+    def attrs_of(tag) -> Dict[str, str]:
+        return {k: " ".join(v) if isinstance(v, list) else v for k, v in tag.attrs.items()}
+
+    title = soup.find("title")
+    doc.title = title.get_text(strip=True) if title is not None else None
+    doc.headings = [
+        (HEADING_LEVELS[h.name], h.get_text(strip=True)[:100])
+        for h in soup.find_all(list(HEADING_LEVELS))
+    ]
+    doc.paragraphs = [p.get_text(strip=True) for p in soup.find_all("p")]
+    doc.meta = [attrs_of(tag) for tag in soup.find_all("meta")]
+    doc.links = [attrs_of(tag) for tag in soup.find_all("link")]
+    doc.anchors = [
+        a["href"]
+        for a in soup.find_all("a", href=True)
+        if "nofollow" not in [rel.lower() for rel in a.get_attribute_list("rel") if rel]
+    ]
+    base = soup.find("base", href=True)
+    doc.base_href = base["href"] if base is not None else None
+    doc.json_ld = [
+        script.string or ""
+        for script in soup.find_all("script")
+        if (script.get("type") or "").strip().lower() == JSON_LD_TYPE
+    ]
+    doc.text_chunks = list(soup.stripped_strings)
+    doc.element_count = len(soup.find_all(True))
+    return doc
+
+
+class LxmlTarget:
+    """lxml parser target that forwards libxml2's events to the stream handlers"""
+
+    def __init__(self, html: str):
+        self.handler = DocumentParser(html)
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        self.handler.handle_starttag(tag.lower(), list(attrib.items()))
+
+    def end(self, tag: str) -> None:
+        self.handler.handle_endtag(tag.lower())
+
+    def data(self, data: str) -> None:
+        self.handler.handle_data(data)
+
+    def comment(self, text: str) -> None:
+        self.handler.handle_comment(text)
+
+    def pi(self, target: str, data: Optional[str] = None) -> None:
+        self.handler.handle_pi(data or "")
+
+    def close(self) -> ParsedDocument:
+        return self.handler.close()
+
+
+def parse_lxml(html: str) -> ParsedDocument:
+    """libxml2 tokenizer (C) feeding the same handlers as the stream backend"""
+    from lxml import etree
+
+    parser = etree.HTMLParser(target=LxmlTarget(html), recover=True)
+    parser.feed(html)
+    return parser.close()
+
+
+def parse_selectolax(html: str) -> ParsedDocument:
+    """Selectolax C tree, walked once for text after pulling out tags by selector"""
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    doc = ParsedDocument(html)
+
+    def attrs_of(node) -> Dict[str, str]:
+        return {k: v or "" for k, v in node.attributes.items()}
+
+    def text_of(node) -> str:
+        return "".join(
+            part.text(deep=False, strip=True)
+            for part in node.traverse(include_text=True)
+            if part.tag == "-text" and not _hidden(part)
+        )
+
+    title = tree.css_first("title")
+    doc.title = text_of(title) if title is not None else None
+    doc.headings = [(HEADING_LEVELS[h.tag], text_of(h)[:100]) for h in tree.css(", ".join(HEADING_LEVELS))]
+    doc.paragraphs = [text_of(p) for p in tree.css("p")]
+    doc.meta = [attrs_of(tag) for tag in tree.css("meta")]
+    doc.links = [attrs_of(tag) for tag in tree.css("link")]
+    doc.anchors = [
+        a.attributes["href"] or ""
+        for a in tree.css("a[href]")
+        if "nofollow" not in (a.attributes.get("rel") or "").lower().split()
+    ]
+    base = tree.css_first("base[href]")
+    doc.base_href = (base.attributes["href"] or "") if base is not None else None
+    doc.json_ld = [
+        script.text(deep=True, strip=False)
+        for script in tree.css("script")
+        if (script.attributes.get("type") or "").strip().lower() == JSON_LD_TYPE
+    ]
+
+    chunks: List[str] = []
+    count = 0
+    root = tree.root
+    if root is not None:
+        for node in root.traverse(include_text=True):
+            if node.tag == "-text":
+                text = node.text(deep=False, strip=True)
+                if text and not _hidden(node):
+                    chunks.append(text)
+            elif not node.tag.startswith(("_", "-", "!")):
+                count += 1
+    doc.text_chunks = chunks
+    doc.element_count = count
+    return doc
+
+
+def _hidden(node) -> bool:
+    """True if a text node sits inside script/style/template/rt/rp"""
+    parent = node.parent
+    while parent is not None:
+        if parent.tag in HIDDEN_TEXT_ELEMENTS:
+            return True
+        parent = parent.parent
+    return False
+
+
+# name -> (parse function, module it needs; None for the standard library)
+PARSER_BACKENDS: Dict[str, Tuple[Callable[[str], ParsedDocument], Optional[str]]] = {
+    "stream": (parse_stream, None),
+    "soup": (parse_soup, "bs4"),
+    "lxml": (parse_lxml, "lxml.etree"),
+    "selectolax": (parse_selectolax, "selectolax.lexbor"),
+}
+
+
+def is_installed(module: Optional[str]) -> bool:
+    """Whether a backend's module can be imported, checked without importing it"""
+    try:
+        return module is None or importlib.util.find_spec(module) is not None
+    except ImportError:
+        return False
+
+
+def available_backends() -> List[str]:
+    return [name for name, (_, module) in PARSER_BACKENDS.items() if is_installed(module)]
+
+
+def get_parser(name: str) -> Callable[[str], ParsedDocument]:
+    """Parse function for a backend name, failing loudly if it is unknown or not installed"""
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"HTML_PARSER must be one of {', '.join(PARSER_BACKENDS)}, got {name!r}")
+    parse, module = PARSER_BACKENDS[name]
+    if not is_installed(module):
+        raise ValueError(f"HTML_PARSER={name!r} needs the {name} package, which is not installed")
+    return parse
@@ -2,7 +2,11 @@
 Robots.txt Analyzer - Check AI bot access
 """
 import httpx
-from typing import Dict, List, Any
+from typing import Dict, List, Optional, Tuple
+from app.cache import side_file_cache
+from app.http_client import get_client
+from app.results import CategoryResult
+from app.scoring import score_category
 
 # AI bots and their user agent strings
 AI_BOTS = [
@@ -16,126 +20,301 @@ AI_BOTS = [
     {"name": "Bytespider", "user_agent": "Bytespider", "owner": "ByteDance"},
 ]
 
+# ai_bots of a result without rules (shared between results, like every cached result)
+ALL_ALLOWED = [{"name": b["name"], "owner": b["owner"], "allowed": True} for b in AI_BOTS]
+
+
+class PathNode:
+    """Trie node over rule-path characters; "*" edges loop on any character"""
+    __slots__ = ("children", "star", "loops", "prefix_rule", "exact_rule")
+
+    def __init__(self, loops: bool = False):
+        self.children: Dict[str, "PathNode"] = {}
+        self.loops = loops
+        self.star: Optional["PathNode"] = None
+        self.prefix_rule: Optional[Tuple[int, bool]] = None
+        self.exact_rule: Optional[Tuple[int, bool]] = None
+
+
+class PathMatcher:
+    """Allow/Disallow rules of one group, compiled into a trie for longest-match lookup"""
+
+    def __init__(self):
+        self.root = PathNode()
+        self.rule_count = 0
+        self.crawl_delay: Optional[float] = None
+
+    def add(self, pattern: str, allow: bool) -> None:
+        """Add a rule; the longest pattern wins and Allow wins ties (RFC 9309)"""
+        if not pattern.startswith(("/", "*")):
+            pattern = "/" + pattern
+        rule = (len(pattern), allow)
+        anchored = pattern.endswith("$")
+        if anchored:
+            pattern = pattern[:-1]
+        elif pattern.endswith("*"):
+            # A trailing wildcard adds nothing to a prefix match
+            pattern = pattern.rstrip("*")
+
+        node = self.root
+        for char in pattern:
+            if char == "*":
+                if node.star is None:
+                    node.star = PathNode(loops=True)
+                node = node.star
+            else:
+                node = node.children.setdefault(char, PathNode())
+
+        slot = "exact_rule" if anchored else "prefix_rule"
+        current = getattr(node, slot)
+        if current is None or rule > current:
+            setattr(node, slot, rule)
+        self.rule_count += 1
+
+    def _expand(self, nodes: List[PathNode]) -> List[PathNode]:
+        """Add the nodes reachable through "*" edges without consuming input"""
+        expanded = []
+        seen = set()
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            expanded.append(node)
+            if node.star is not None:
+                stack.append(node.star)
+        return expanded
+
+    def match(self, path: str) -> Optional[Tuple[int, bool]]:
+        """Best (length, allow) rule matching path, or None if no rule matches"""
+        best = None
+        active = self._expand([self.root])
+        for char in path:
+            following = []
+            for node in active:
+                if node.prefix_rule is not None and (best is None or node.prefix_rule > best):
+                    best = node.prefix_rule
+                child = node.children.get(char)
+                if child is not None:
+                    following.append(child)
+                if node.loops:
+                    following.append(node)
+            if not following:
+                return best
+            active = self._expand(following)
+        for node in active:
+            for rule in (node.prefix_rule, node.exact_rule):
+                if rule is not None and (best is None or rule > best):
+                    best = rule
+        return best
+
+    def is_allowed(self, path: str) -> bool:
+        best = self.match(path)
+        return best is None or best[1]
+
+
+class RobotsRules:
+    """Compiled robots.txt: one PathMatcher per user-agent token"""
+
+    def __init__(self):
+        self.groups: Dict[str, PathMatcher] = {}
+        self.sitemaps: List[str] = []
+
+    def group_for(self, user_agent: str) -> Optional[PathMatcher]:
+        """The group for a crawler, falling back to the "*" group"""
+        group = self.groups.get(user_agent.lower())
+        if group is None:
+            group = self.groups.get("*")
+        return group
+
+    def is_allowed(self, user_agent: str, path: str = "/") -> bool:
+        group = self.group_for(user_agent)
+        return group is None or group.is_allowed(path)
+
+    def crawl_delay(self, user_agent: str) -> Optional[float]:
+        group = self.group_for(user_agent)
+        return group.crawl_delay if group is not None else None
+
+
+def parse_robots_txt(content: str) -> RobotsRules:
+    """Parse robots.txt content into compiled rules by user-agent"""
+    rules = RobotsRules()
+    current: List[PathMatcher] = []
+    in_agent_lines = False
+
+    for line in content.splitlines():
+        line = line.split("#", 1)[0]
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        key = key.strip().lower()
+        value = value.strip()
+
+        if key == "user-agent":
+            # Consecutive User-agent lines share one group
+            if not in_agent_lines:
+                current = []
+                in_agent_lines = True
+            agent = value.lower()
+            if agent:
+                current.append(rules.groups.setdefault(agent, PathMatcher()))
+            continue
+
+        if key == "sitemap":
+            if value:
+                rules.sitemaps.append(value)
+            continue
+
+        in_agent_lines = False
+        if not current:
+            # Rules before any User-agent line apply to all crawlers
+            current = [rules.groups.setdefault("*", PathMatcher())]
+
+        if key in ("allow", "disallow"):
+            if not value:
+                continue  # An empty Disallow allows everything
+            for group in current:
+                group.add(value, allow=(key == "allow"))
+        elif key == "crawl-delay":
+            try:
+                delay = float(value)
+            except ValueError:
+                continue
+            for group in current:
+                group.crawl_delay = delay
 
-def parse_robots_txt(content: str) -> Dict[str, set]:
-    """Parse robots.txt content into rules by user-agent"""
-    rules = {}
-    current_agent = "*"
-    
-    for line in content.split("\n"):
-        line = line.strip().lower()
-        
-        if line.startswith("user-agent:"):
-            current_agent = line.replace("user-agent:", "").strip()
-            if current_agent not in rules:
-                rules[current_agent] = set()
-                
-        elif line.startswith("disallow:"):
-            path = line.replace("disallow:", "").strip()
-            if path in ["/", "/*"]:
-                rules.setdefault(current_agent, set()).add("disallow-all")
-            elif path:
-                rules.setdefault(current_agent, set()).add(f"disallow:{path}")
-                
-        elif line.startswith("allow:"):
-            path = line.replace("allow:", "").strip()
-            if path in ["/", "/*"]:
-                rules.setdefault(current_agent, set()).add("allow-all")
-    
     return rules
 
 
-def is_bot_allowed(rules: Dict[str, set], user_agent: str) -> bool:
-    """Check if a specific bot is allowed based on rules"""
-    lower_agent = user_agent.lower()
+def is_bot_allowed(rules: RobotsRules, user_agent: str, path: str = "/") -> bool:
+    """Check if a specific bot may fetch path (the site root by default)"""
+    return rules.is_allowed(user_agent, path)
+
+
+def analyze_robots_response(response: httpx.Response, rules: Optional[RobotsRules] = None) -> CategoryResult:
+    """Score a fetched robots.txt response (rules: its body already parsed)"""
+    issues = []
+    recommendations = []
+    
+    if response.status_code == 404:
+        features = {"found": False}
+        return CategoryResult(
+            score_category("robots", features),
+            features,
+            ["robots.missing"],
+            ["robots.create", "robots.add_ai_rules"],
+            {"found": False, "ai_bots": ALL_ALLOWED},
+        )
+    
+    content = response.text
+    if rules is None:
+        rules = parse_robots_txt(content)
+    
+    # Check each AI bot
+    ai_bots = []
+    for bot in AI_BOTS:
+        allowed = is_bot_allowed(rules, bot["user_agent"])
+        ai_bots.append({
+            "name": bot["name"],
+            "owner": bot["owner"],
+            "allowed": allowed
+        })
     
-    # Check specific bot rules first
-    for agent, agent_rules in rules.items():
-        if agent == lower_agent:
-            if "disallow-all" in agent_rules and "allow-all" not in agent_rules:
-                return False
-            if "allow-all" in agent_rules:
-                return True
+    allowed_count = sum(1 for b in ai_bots if b["allowed"])
     
-    # Fall back to wildcard rules
-    wildcard_rules = rules.get("*", set())
-    if "disallow-all" in wildcard_rules and "allow-all" not in wildcard_rules:
-        return False
+    # Check for issues
+    blocked_bots = [b["name"] for b in ai_bots if not b["allowed"]]
+    if blocked_bots:
+        issues.append(("robots.bots_blocked", len(blocked_bots), ", ".join(blocked_bots)))
+        recommendations.append(("robots.allow_bots", ", ".join(blocked_bots)))
     
-    return True  # Default to allowed
+    # Check if all bots blocked via wildcard
+    wildcard_blocks_all = "*" in rules.groups and not rules.is_allowed("*")
+    if wildcard_blocks_all:
+        issues.append("robots.wildcard_blocks_all")
+        recommendations.append("robots.add_allow_rules")
+    
+    if allowed_count == len(ai_bots):
+        issues.append("robots.all_allowed")
+    
+    # Scored by the shared rule table (app/scoring.py)
+    features = {
+        "found": True,
+        "allowed_ratio": allowed_count / len(ai_bots),
+        "wildcard_blocks_all": wildcard_blocks_all,
+    }
+    
+    return CategoryResult(
+        score_category("robots", features),
+        features,
+        issues,
+        recommendations,
+        {"found": True, "ai_bots": ai_bots},
+        preview=content[:2000],
+    )
+
+
+# RFC 9309: an unreachable robots.txt (5xx, network error) means nothing may be crawled
+DISALLOW_ALL = "User-agent: *\nDisallow: /"
+
+
+def robots_rules_response(response: httpx.Response) -> RobotsRules:
+    """Compiled rules of a fetched robots.txt for crawling (a 4xx allows everything)"""
+    if response.status_code >= 500:
+        return parse_robots_txt(DISALLOW_ALL)
+    if response.status_code >= 400:
+        return RobotsRules()
+    return parse_robots_txt(response.text)
 
 
-async def analyze_robots_txt(base_url: str) -> Dict[str, Any]:
+def robots_fetch_failed(error: Exception) -> CategoryResult:
+    """Result for a robots.txt that could not be fetched"""
+    features = {"found": False, "fetch_error": True}
+    return CategoryResult(
+        score_category("robots", features),
+        features,
+        [("robots.fetch_failed", str(error))],
+        ["robots.make_accessible"],
+        {"found": False, "ai_bots": ALL_ALLOWED},
+    )
+
+
+def robots_response(response: httpx.Response) -> Tuple[CategoryResult, RobotsRules]:
+    """Analysis and crawl rules of a fetched robots.txt, from one parse of its body"""
+    rules = robots_rules_response(response)
+    # Below 400 the crawl rules are the file's own; error statuses get fixed ones and the analysis parses the body
+    return analyze_robots_response(response, rules if response.status_code < 400 else None), rules
+
+
+def robots_failed(error: Exception) -> Tuple[CategoryResult, RobotsRules]:
+    return robots_fetch_failed(error), parse_robots_txt(DISALLOW_ALL)
+
+
+async def fetch_robots(base_url: str, client: Optional[httpx.AsyncClient] = None) -> Tuple[CategoryResult, RobotsRules]:
+    """
+    Analysis and crawl rules of an origin's robots.txt, cached together as one
+    side-file entry so the file is downloaded and parsed once for both.
+    Network failures are cached for SIDE_FILE_CACHE_ERROR_TTL like error statuses.
+    """
+    robots_url = f"{base_url.rstrip('/')}/robots.txt"
+    return await side_file_cache.fetch(robots_url, robots_response, client or get_client(), on_error=robots_failed)
+
+
+async def fetch_robots_rules(base_url: str, client: Optional[httpx.AsyncClient] = None) -> RobotsRules:
+    """Compiled robots.txt rules for an origin, shared with its analysis"""
+    try:
+        _, rules = await fetch_robots(base_url, client)
+        return rules
+    except Exception:
+        return parse_robots_txt(DISALLOW_ALL)
+
+
+async def analyze_robots_txt(base_url: str, client: Optional[httpx.AsyncClient] = None) -> CategoryResult:
     """Analyze robots.txt for AI bot access"""
-    issues = []
-    recommendations = []
-    
     try:
-        robots_url = f"{base_url.rstrip('/')}/robots.txt"
+        analysis, _ = await fetch_robots(base_url, client)
+        return analysis
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(robots_url)
-            
-            if response.status_code == 404:
-                return {
-                    "found": False,
-                    "content": None,
-                    "ai_bots": [{"name": b["name"], "owner": b["owner"], "allowed": True} for b in AI_BOTS],
-                    "score": 70,
-                    "issues": ["No robots.txt file found (all bots allowed by default)"],
-                    "recommendations": [
-                        "Create a robots.txt file to explicitly control crawler access",
-                        "Consider adding specific rules for AI bots"
-                    ]
-                }
-            
-            content = response.text
-            rules = parse_robots_txt(content)
-            
-            # Check each AI bot
-            ai_bots = []
-            for bot in AI_BOTS:
-                allowed = is_bot_allowed(rules, bot["user_agent"])
-                ai_bots.append({
-                    "name": bot["name"],
-                    "owner": bot["owner"],
-                    "allowed": allowed
-                })
-            
-            # Calculate score
-            allowed_count = sum(1 for b in ai_bots if b["allowed"])
-            score = int((allowed_count / len(ai_bots)) * 100)
-            
-            # Check for issues
-            blocked_bots = [b["name"] for b in ai_bots if not b["allowed"]]
-            if blocked_bots:
-                issues.append(f"{len(blocked_bots)} AI bot(s) blocked: {', '.join(blocked_bots)}")
-                recommendations.append(f"Consider allowing {', '.join(blocked_bots)} for better AI visibility")
-            
-            # Check if all bots blocked via wildcard
-            if "disallow-all" in rules.get("*", set()) and "allow-all" not in rules.get("*", set()):
-                issues.append("Wildcard rule blocks all crawlers by default")
-                recommendations.append("Add explicit Allow rules for AI bots you want to permit")
-                score = min(score, 30)
-            
-            if allowed_count == len(ai_bots):
-                issues.append("All AI bots are allowed - great for visibility!")
-            
-            return {
-                "found": True,
-                "content": content[:2000],
-                "ai_bots": ai_bots,
-                "score": score,
-                "issues": issues,
-                "recommendations": recommendations
-            }
-            
     except Exception as e:
-        return {
-            "found": False,
-            "content": None,
-            "ai_bots": [{"name": b["name"], "owner": b["owner"], "allowed": True} for b in AI_BOTS],
-            "score": 50,
-            "issues": [f"Could not fetch robots.txt: {str(e)}"],
-            "recommendations": ["Ensure your robots.txt is publicly accessible"]
-        }
+        return robots_fetch_failed(e)
@@ -1,9 +1,12 @@
 """
 Schema Analyzer - Check JSON-LD structured data
 """
-import re
-import json
-from typing import Dict, List, Any
+from typing import List, Tuple
+from app import config
+from app.analyzers.document import ParsedDocument
+from app.analyzers.json_ld import scan_block
+from app.results import CategoryResult
+from app.scoring import score_category
 
 # Valuable schema types for AI
 VALUABLE_SCHEMAS = [
@@ -15,26 +18,29 @@ VALUABLE_SCHEMAS = [
 ]
 
 
-def extract_json_ld(html: str) -> List[dict]:
-    """Extract JSON-LD schemas from HTML"""
+def block_size(block: str) -> int:
+    """UTF-8 size of a block without encoding it when it is plain ASCII"""
+    return len(block) if block.isascii() else len(block.encode("utf-8"))
+
+
+def extract_json_ld(doc: ParsedDocument) -> Tuple[List[dict], int]:
+    """JSON-LD entities in the parsed document, and how many blocks were skipped for size"""
     schemas = []
-    pattern = r'<script[^>]*type\s*=\s*["\']application/ld\+json["\'][^>]*>(.*?)</script>'
-    
-    matches = re.findall(pattern, html, re.DOTALL | re.IGNORECASE)
-    
-    for match in matches:
+    skipped = 0
+    budget = config.JSON_LD_MAX_TOTAL_BYTES
+
+    for block in doc.json_ld:
+        size = block_size(block)
+        if size > config.JSON_LD_MAX_BLOCK_BYTES or size > budget:
+            skipped += 1
+            continue
+        budget -= size
         try:
-            content = match.strip()
-            parsed = json.loads(content)
-            
-            if isinstance(parsed, list):
-                schemas.extend(parsed)
-            else:
-                schemas.append(parsed)
-        except json.JSONDecodeError:
+            schemas.extend(scan_block(block.strip(), config.JSON_LD_STREAM_THRESHOLD))
+        except ValueError:
             pass  # Skip invalid JSON
-    
-    return schemas
+
+    return schemas, skipped
 
 
 def analyze_schema_item(schema: dict) -> dict:
@@ -60,69 +66,70 @@ def analyze_schema_item(schema: dict) -> dict:
     return {"type": schema_type, "properties": properties, "valid": valid}
 
 
-def analyze_schema(html: str) -> Dict[str, Any]:
+def analyze_schema(doc: ParsedDocument) -> CategoryResult:
     """Analyze JSON-LD structured data in HTML"""
     issues = []
     recommendations = []
     
-    json_ld_schemas = extract_json_ld(html)
+    json_ld_schemas, skipped = extract_json_ld(doc)
+    if skipped:
+        issues.append(("schema.blocks_skipped", skipped))
     
     if not json_ld_schemas:
-        return {
-            "found": False,
-            "schemas": [],
-            "score": 20,
-            "issues": ["No JSON-LD structured data found on the page"],
-            "recommendations": [
-                "Add JSON-LD structured data to help AI understand your content",
-                "Consider adding Article, FAQPage, or Organization schema",
-                "Use Google's Structured Data Testing Tool to validate"
-            ]
-        }
+        features = {"found": False}
+        return CategoryResult(
+            score_category("schema", features),
+            features,
+            issues + ["schema.missing"],
+            ["schema.add_json_ld", "schema.add_types", "schema.validate"],
+            {"found": False, "schemas": []},
+        )
     
     schemas = [analyze_schema_item(s) for s in json_ld_schemas]
     
-    # Calculate score
-    score = 50  # Base score for having some schema
-    
-    # Bonus for valuable schema types
+    # Valuable schema types for AI
     found_types = set(s["type"] for s in schemas)
     valuable_found = [t for t in VALUABLE_SCHEMAS if t in found_types]
-    score += len(valuable_found) * 10
     
     # Check for FAQPage (very valuable for AI)
-    if "FAQPage" in found_types:
-        score += 15
-        issues.append("✓ FAQPage schema found - excellent for AI answers!")
+    has_faq = "FAQPage" in found_types
+    if has_faq:
+        issues.append("schema.faq_found")
     else:
-        recommendations.append("Consider adding FAQPage schema for Q&A content")
+        recommendations.append("schema.add_faq")
     
     # Check for Article schemas
-    if any(t in found_types for t in ["Article", "BlogPosting", "NewsArticle"]):
-        score += 10
-        issues.append("✓ Article schema found - helps AI understand your content")
+    has_article = any(t in found_types for t in ["Article", "BlogPosting", "NewsArticle"])
+    if has_article:
+        issues.append("schema.article_found")
     
     # Check for Organization/Author (E-E-A-T)
-    if "Organization" in found_types or "Person" in found_types:
-        score += 10
-        issues.append("✓ Organization/Person schema found - supports E-E-A-T signals")
+    has_organization = "Organization" in found_types or "Person" in found_types
+    if has_organization:
+        issues.append("schema.organization_found")
     else:
-        recommendations.append("Add Organization or Person schema for credibility")
+        recommendations.append("schema.add_organization")
     
     # Check for validity
     invalid_schemas = [s for s in schemas if not s["valid"]]
     if invalid_schemas:
-        score -= 10
-        issues.append(f"{len(invalid_schemas)} schema(s) may be missing required properties")
-        recommendations.append("Review and complete required properties in your schemas")
+        issues.append(("schema.invalid", len(invalid_schemas)))
+        recommendations.append("schema.complete_properties")
     
-    # Cap score
-    score = min(100, max(0, score))
-    
-    return {
+    # Scored by the shared rule table (app/scoring.py)
+    features = {
         "found": True,
-        "schemas": schemas,
-        "score": score,
-        "issues": issues,
-        "recommendations": recommendations
+        "valuable_type_count": len(valuable_found),
+        "has_faq_schema": has_faq,
+        "has_article_schema": has_article,
+        "has_organization_schema": has_organization,
+        "invalid_count": len(invalid_schemas),
     }
+    
+    return CategoryResult(
+        score_category("schema", features),
+        features,
+        issues,
+        recommendations,
+        {"found": True, "schemas": schemas},
+    )
@@ -2,115 +2,119 @@
 Technical SEO Analyzer - Check meta tags and technical elements
 """
 import re
-from typing import Dict, Any
-from bs4 import BeautifulSoup
+from typing import Optional, Tuple
+from app.analyzers.document import ParsedDocument
+from app.results import CategoryResult
+from app.scoring import score_category
 
+# Visible text in the raw HTML above which a page is taken to be server-rendered
+SSR_TEXT_LENGTH = 500
 
-def analyze_technical(html: str) -> Dict[str, Any]:
+
+def ssr_findings(is_ssr: bool) -> Tuple[str, Optional[str]]:
+    """Issue and recommendation codes (None when nothing to fix) for an is_ssr verdict"""
+    if is_ssr:
+        return "technical.ssr", None
+    return "technical.csr", "technical.add_ssr"
+
+
+def analyze_technical(doc: ParsedDocument) -> CategoryResult:
     """Analyze technical SEO elements"""
     issues = []
     recommendations = []
     
-    soup = BeautifulSoup(html, "html.parser")
-    
     # Check meta title
-    title_tag = soup.find("title")
-    has_title = title_tag is not None and len(title_tag.get_text(strip=True)) > 0
+    has_title = doc.title is not None and len(doc.title) > 0
     
     if has_title:
-        title_text = title_tag.get_text(strip=True)
+        title_text = doc.title
         if len(title_text) < 30:
-            issues.append(f"Title tag is short ({len(title_text)} chars)")
-            recommendations.append("Expand title to 50-60 characters for better visibility")
+            issues.append(("technical.title_short", len(title_text)))
+            recommendations.append("technical.expand_title")
         elif len(title_text) > 60:
-            issues.append(f"Title tag may be truncated ({len(title_text)} chars)")
+            issues.append(("technical.title_long", len(title_text)))
         else:
-            issues.append("✓ Good title length")
+            issues.append("technical.title_ok")
     else:
-        issues.append("Missing title tag")
-        recommendations.append("Add a descriptive title tag")
+        issues.append("technical.title_missing")
+        recommendations.append("technical.add_title")
     
     # Check meta description
-    meta_desc = soup.find("meta", attrs={"name": "description"})
+    meta_desc = doc.find_meta("name", "description")
     has_description = meta_desc is not None and meta_desc.get("content")
     
     if has_description:
         desc_len = len(meta_desc["content"])
         if desc_len < 120:
-            issues.append(f"Meta description is short ({desc_len} chars)")
-            recommendations.append("Expand meta description to 150-160 characters")
+            issues.append(("technical.description_short", desc_len))
+            recommendations.append("technical.expand_description")
         elif desc_len > 160:
-            issues.append(f"Meta description may be truncated ({desc_len} chars)")
+            issues.append(("technical.description_long", desc_len))
         else:
-            issues.append("✓ Good meta description length")
+            issues.append("technical.description_ok")
     else:
-        issues.append("Missing meta description")
-        recommendations.append("Add a compelling meta description")
+        issues.append("technical.description_missing")
+        recommendations.append("technical.add_description")
     
     # Check canonical
-    canonical = soup.find("link", attrs={"rel": "canonical"})
+    canonical = doc.find_link("canonical")
     has_canonical = canonical is not None and canonical.get("href")
     
     if has_canonical:
-        issues.append("✓ Canonical URL present")
+        issues.append("technical.canonical_ok")
     else:
-        recommendations.append("Add a canonical URL to prevent duplicate content issues")
+        recommendations.append("technical.add_canonical")
     
     # Check Open Graph
-    og_title = soup.find("meta", attrs={"property": "og:title"})
-    og_desc = soup.find("meta", attrs={"property": "og:description"})
+    og_title = doc.find_meta("property", "og:title")
+    og_desc = doc.find_meta("property", "og:description")
     has_og = og_title is not None or og_desc is not None
     
     if has_og:
-        issues.append("✓ Open Graph tags present")
+        issues.append("technical.open_graph_ok")
     else:
-        recommendations.append("Add Open Graph meta tags for better social sharing")
+        recommendations.append("technical.add_open_graph")
     
     # Check Twitter Card
-    twitter_card = soup.find("meta", attrs={"name": "twitter:card"})
+    twitter_card = doc.find_meta("name", "twitter:card")
     has_twitter = twitter_card is not None
     
     if has_twitter:
-        issues.append("✓ Twitter Card meta present")
+        issues.append("technical.twitter_ok")
     else:
-        recommendations.append("Add Twitter Card meta tags")
+        recommendations.append("technical.add_twitter")
     
     # Check if SSR (simple heuristic: meaningful content in initial HTML)
-    text_content = soup.get_text(strip=True)
-    is_ssr = len(text_content) > 500  # If significant text in HTML, likely SSR
+    text_length = doc.text_length
+    is_ssr = text_length > SSR_TEXT_LENGTH  # If significant text in HTML, likely SSR
     
-    if is_ssr:
-        issues.append("✓ Content appears server-rendered (good for AI crawlers)")
-    else:
-        issues.append("Page may be client-rendered (limited text in initial HTML)")
-        recommendations.append("Consider server-side rendering for better AI accessibility")
+    issue, recommendation = ssr_findings(is_ssr)
+    issues.append(issue)
+    if recommendation:
+        recommendations.append(recommendation)
     
-    # Calculate score
-    score = 30  # Base
-    
-    if has_title:
-        score += 15
-    if has_description:
-        score += 15
-    if has_canonical:
-        score += 10
-    if has_og:
-        score += 10
-    if has_twitter:
-        score += 5
-    if is_ssr:
-        score += 15
-    
-    score = min(100, max(0, score))
-    
-    return {
+    # Scored by the shared rule table (app/scoring.py)
+    features = {
         "has_meta_title": has_title,
-        "has_meta_description": has_description,
-        "has_canonical": has_canonical,
+        "has_meta_description": bool(has_description),
+        "has_canonical": bool(has_canonical),
         "has_open_graph": has_og,
         "has_twitter_card": has_twitter,
         "is_ssr": is_ssr,
-        "score": score,
-        "issues": issues,
-        "recommendations": recommendations
     }
+    
+    return CategoryResult(
+        score_category("technical", features),
+        features,
+        issues,
+        recommendations,
+        {
+            "has_meta_title": has_title,
+            "has_meta_description": has_description,
+            "has_canonical": has_canonical,
+            "has_open_graph": has_og,
+            "has_twitter_card": has_twitter,
+            "is_ssr": is_ssr,
+            "text_length": text_length,
+        },
+    )
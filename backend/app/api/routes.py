@@ -1,75 +1,206 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, HttpUrl
-from app.analyzers.robots_analyzer import analyze_robots_txt
-from app.analyzers.schema_analyzer import analyze_schema
-from app.analyzers.content_analyzer import analyze_content
-from app.analyzers.technical_analyzer import analyze_technical
-from app.analyzers.llms_txt_analyzer import analyze_llms_txt
-from datetime import datetime
-import httpx
+import asyncio
+from fastapi import APIRouter, HTTPException, Path, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl, model_validator
+from typing import List, Literal, Optional
+from app import config
+from app.bulk import format_sse, stream_bulk
+from app.cache import side_file_cache
+from app.crawl import create_crawl, open_crawl, resume_crawl, stream_crawl
+from app.feature_store import AGGREGATES, GROUP_KEYS, PERIODS, get_feature_store
+from app.host_policy import host_policy
+from app.jobs import get_job_runner
+from app.pipeline import run_analysis
+from app.render import get_render_pool
+from app.results import dumps
+from app.result_cache import result_cache
+from app.robots_audit import stream_audit
 
 router = APIRouter()
 
 class AnalyzeRequest(BaseModel):
     url: HttpUrl
+    include_timings: bool = config.RESPONSE_TIMINGS
+
+class BulkAnalyzeRequest(BaseModel):
+    urls: List[HttpUrl] = []
+    sitemap_url: Optional[HttpUrl] = None
+    format: Literal["ndjson", "sse"] = "ndjson"
+    concurrency: int = Field(default=config.BULK_CONCURRENCY, ge=1, le=config.BULK_MAX_CONCURRENCY)
+    # Above the fetch policy's own per-host cap, extra workers would only queue for its slots
+    per_host_concurrency: int = Field(default=config.BULK_PER_HOST_CONCURRENCY, ge=1, le=max(1, config.FETCH_HOST_CONCURRENCY))
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if not self.urls and not self.sitemap_url:
+            raise ValueError("Provide urls or sitemap_url")
+        if self.urls and self.sitemap_url:
+            raise ValueError("Provide urls or sitemap_url, not both")
+        return self
+
+class CrawlRequest(BaseModel):
+    seed_url: Optional[HttpUrl] = None
+    sitemap_url: Optional[HttpUrl] = None
+    crawl_id: Optional[str] = Field(default=None, pattern=r"^[0-9a-f]{32}$")  # resume an interrupted crawl
+    format: Literal["ndjson", "sse"] = "ndjson"
+    max_pages: int = Field(default=config.CRAWL_MAX_PAGES, ge=1, le=config.CRAWL_HARD_MAX_PAGES)
+    max_depth: int = Field(default=config.CRAWL_MAX_DEPTH, ge=0)
+    concurrency: int = Field(default=config.CRAWL_CONCURRENCY, ge=1, le=config.BULK_MAX_CONCURRENCY)
+    # Above the fetch policy's own per-host cap, extra workers would only queue for its slots
+    per_host_concurrency: int = Field(default=config.BULK_PER_HOST_CONCURRENCY, ge=1, le=max(1, config.FETCH_HOST_CONCURRENCY))
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if not self.seed_url and not self.sitemap_url and not self.crawl_id:
+            raise ValueError("Provide seed_url, sitemap_url or crawl_id")
+        return self
+
+class RobotsAuditRequest(BaseModel):
+    domains: List[str] = Field(min_length=1)
+    format: Literal["ndjson", "csv"] = "ndjson"
+    concurrency: int = Field(default=config.ROBOTS_AUDIT_CONCURRENCY, ge=1, le=config.BULK_MAX_CONCURRENCY)
 
 class AnalysisResponse(BaseModel):
     url: str
     timestamp: str
     overall_score: int
+    truncated: bool = False
     categories: dict
+    timings: Optional[dict] = None
 
 @router.post("/analyze")
 async def analyze_url(request: AnalyzeRequest):
     """Analyze a URL for AI SEO readiness"""
-    url = str(request.url)
-    
-    try:
-        # Fetch the page HTML
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(url, follow_redirects=True)
-            html = response.text
-            base_url = str(response.url)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Could not fetch URL: {str(e)}")
-    
-    # Run all analyzers
-    robots = await analyze_robots_txt(base_url)
-    schema = analyze_schema(html)
-    content = analyze_content(html)
-    technical = analyze_technical(html)
-    llms_txt = await analyze_llms_txt(base_url)
-    
-    # Calculate weighted overall score
-    weights = {
-        'robots': 0.25,
-        'schema': 0.25,
-        'content': 0.25,
-        'technical': 0.15,
-        'llms_txt': 0.10
-    }
-    
-    overall_score = int(
-        robots['score'] * weights['robots'] +
-        schema['score'] * weights['schema'] +
-        content['score'] * weights['content'] +
-        technical['score'] * weights['technical'] +
-        llms_txt['score'] * weights['llms_txt']
+    result = await run_analysis(str(request.url), include_timings=request.include_timings)
+    # Message codes become text here; single-URL responses also carry the robots.txt/llms.txt content
+    return Response(dumps(result.to_dict(previews=True)), media_type="application/json")
+
+@router.post("/analyze/bulk")
+async def analyze_bulk(request: BulkAnalyzeRequest):
+    """Analyze many URLs (or a sitemap) and stream each result as it completes"""
+    media_type = "text/event-stream" if request.format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_bulk(
+            [str(u) for u in request.urls],
+            str(request.sitemap_url) if request.sitemap_url else None,
+            request.format,
+            request.concurrency,
+            request.per_host_concurrency,
+        ),
+        media_type=media_type,
     )
-    
-    return {
-        "url": url,
-        "timestamp": datetime.utcnow().isoformat(),
-        "overall_score": overall_score,
-        "categories": {
-            "robots": robots,
-            "schema": schema,
-            "content": content,
-            "technical": technical,
-            "llms_txt": llms_txt
-        }
-    }
+
+@router.post("/robots/audit")
+async def robots_audit(request: RobotsAuditRequest):
+    """AI bot access matrix for many domains, streamed as rows (NDJSON arrays or CSV)"""
+    media_type = "text/csv" if request.format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_audit(request.domains, request.format, request.concurrency),
+        media_type=media_type,
+    )
+
+@router.post("/crawl")
+async def crawl_site(request: CrawlRequest):
+    """Crawl a site from a seed URL or sitemap, streaming page results and then site-level scores"""
+    if request.crawl_id:
+        crawl_id, store = request.crawl_id, await asyncio.to_thread(resume_crawl, request.crawl_id)
+    else:
+        crawl_id, store = await asyncio.to_thread(
+            create_crawl,
+            str(request.seed_url) if request.seed_url else None,
+            str(request.sitemap_url) if request.sitemap_url else None,
+            request.max_pages,
+            request.max_depth,
+        )
+    media_type = "text/event-stream" if request.format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_crawl(crawl_id, store, request.format, request.concurrency, request.per_host_concurrency),
+        media_type=media_type,
+    )
+
+@router.get("/crawl/{crawl_id}")
+async def crawl_summary(crawl_id: str = Path(pattern=r"^[0-9a-f]{32}$")):
+    """Site-level aggregates of a running or finished crawl"""
+    store = await asyncio.to_thread(open_crawl, crawl_id)
+    return {"crawl_id": crawl_id, **await asyncio.to_thread(store.summary)}
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: AnalyzeRequest):
+    """Queue an analysis and return its job id at once (429 when the queue is full)"""
+    return await get_job_runner().submit(str(request.url), {"include_timings": request.include_timings})
+
+@router.get("/jobs")
+async def job_stats():
+    return await asyncio.to_thread(get_job_runner().queue.stats)
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll a job; the analysis result is included once it is done"""
+    job = await asyncio.to_thread(get_job_runner().queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events with the job on every status change, ending when it finishes"""
+    await get_job(job_id)
+
+    async def events():
+        async for job in get_job_runner().watch(job_id):
+            yield format_sse(job, job["status"])
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.websocket("/jobs/{job_id}/ws")
+async def job_websocket(websocket: WebSocket, job_id: str):
+    """WebSocket variant of /jobs/{job_id}/events: one JSON message per status change"""
+    await websocket.accept()
+    try:
+        job = await asyncio.to_thread(get_job_runner().queue.get, job_id)
+        if job is None:
+            await websocket.close(code=4404, reason=f"Unknown job {job_id}")
+            return
+        async for job in get_job_runner().watch(job_id):
+            await websocket.send_json(job)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+@router.get("/features/report")
+async def feature_report(
+    metric: str,
+    agg: Literal[AGGREGATES] = "mean",
+    period: Literal[PERIODS] = "week",
+    group_by: List[Literal[GROUP_KEYS]] = Query(default=list(GROUP_KEYS)),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    host: Optional[str] = None,
+    limit: int = Query(default=1000, ge=1, le=100000),
+):
+    """Aggregate one stored score/feature column per host and/or period (e.g. mean schema_score per host per week)"""
+    store = get_feature_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="Feature store is disabled (set FEATURE_STORE_DIR)")
+    try:
+        return await asyncio.to_thread(store.report, metric, agg, period, group_by, start, end, host, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return {
+        "results": result_cache.stats(),
+        "side_files": side_file_cache.stats(),
+        "renders": pool.stats() if (pool := get_render_pool()) is not None else None,
+    }
+
+
+@router.get("/hosts")
+async def host_stats(limit: int = Query(default=20, ge=0, le=1000)):
+    """Fetch policy totals, plus the hosts with open circuits and the slowest ones"""
+    return host_policy.stats(limit)
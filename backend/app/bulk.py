@@ -0,0 +1,171 @@
+"""
+Bulk Analysis - Run many URLs with global and per-host concurrency limits
+"""
+import asyncio
+import gzip
+import xml.etree.ElementTree as ET
+from typing import AsyncIterator, Dict, Any, Iterable, List, Optional, Set, Union
+from urllib.parse import urlsplit
+from fastapi import HTTPException
+from app import config
+from app.host_policy import host_policy, queue_for_slots
+from app.http_client import get_client, origin_of, PAGE_TIMEOUT
+from app.pipeline import run_analysis, fetch_side_files
+from app.results import AnalysisResult, dumps
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+def _parse_sitemap(body: bytes) -> Dict[str, List[str]]:
+    """Split a sitemap into page URLs and nested sitemap URLs"""
+    if body[:2] == b"\x1f\x8b":
+        body = gzip.decompress(body)
+
+    parser = ET.XMLPullParser(events=("end",))
+    parser.feed(body)
+    parser.close()
+
+    found = {"urls": [], "sitemaps": []}
+    loc = None
+    for _, elem in parser.read_events():
+        tag = elem.tag.replace(SITEMAP_NS, "")
+        if tag == "loc":
+            loc = (elem.text or "").strip() or None
+        elif tag in ("url", "sitemap"):
+            if loc:
+                found["urls" if tag == "url" else "sitemaps"].append(loc)
+            loc = None
+            elem.clear()
+    return found
+
+
+async def iter_sitemap_urls(sitemap_url: str, limit: int) -> AsyncIterator[str]:
+    """Yield page URLs from a sitemap, following sitemap index files"""
+    queue_for_slots()
+    client = get_client()
+    queue = [sitemap_url]
+    seen: Set[str] = set()
+    emitted = 0
+
+    while queue and emitted < limit:
+        current = queue.pop(0)
+        if current in seen:
+            continue
+        seen.add(current)
+
+        try:
+            async with host_policy.request(current, PAGE_TIMEOUT) as call:
+                response = await call.send(
+                    lambda timeout: client.get(current, follow_redirects=True, timeout=timeout)
+                )
+            response.raise_for_status()
+            found = _parse_sitemap(response.content)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Could not read sitemap {current}: {str(e)}")
+
+        queue.extend(found["sitemaps"])
+        for url in found["urls"]:
+            if emitted >= limit:
+                break
+            emitted += 1
+            yield url
+
+
+async def _iter_list(urls: Iterable[str]) -> AsyncIterator[str]:
+    for url in urls:
+        yield url
+
+
+async def run_bulk(
+    urls: AsyncIterator[str],
+    concurrency: int,
+    per_host_concurrency: int,
+) -> AsyncIterator[Union[AnalysisResult, Dict[str, Any]]]:
+    """Analyze URLs concurrently and yield each result as soon as it completes"""
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+    side_files: Dict[str, asyncio.Task] = {}
+    url_lock = asyncio.Lock()
+    done = object()
+
+    async def next_url() -> Optional[str]:
+        async with url_lock:
+            try:
+                return await urls.__anext__()
+            except StopAsyncIteration:
+                return None
+
+    async def worker() -> None:
+        queue_for_slots()
+        try:
+            while True:
+                url = await next_url()
+                if url is None:
+                    break
+                host = urlsplit(url).netloc.lower()
+                limit = host_limits.setdefault(host, asyncio.Semaphore(per_host_concurrency))
+
+                # robots.txt and llms.txt are fetched once per origin for the whole batch
+                origin = origin_of(url)
+                if origin not in side_files:
+                    side_files[origin] = asyncio.create_task(fetch_side_files(origin))
+
+                async with limit:
+                    try:
+                        result = await run_analysis(url, side_files[origin])
+                    except HTTPException as e:
+                        result = {"url": url, "error": e.detail}
+                    except Exception as e:
+                        result = {"url": url, "error": f"Analysis failed: {str(e)}"}
+                await results.put(result)
+        finally:
+            await results.put(done)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    running = len(workers)
+    try:
+        while running:
+            item = await results.get()
+            if item is done:
+                running -= 1
+            else:
+                yield item
+        for worker_task in workers:
+            # Surface errors raised while reading the URL source (e.g. a bad sitemap)
+            worker_task.result()
+    finally:
+        for task in workers + list(side_files.values()):
+            task.cancel()
+
+
+def format_ndjson(item: Union[AnalysisResult, Dict[str, Any]]) -> bytes:
+    return dumps(item) + b"\n"
+
+
+def format_sse(item: Union[AnalysisResult, Dict[str, Any]], event: str = "result") -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(item) + b"\n\n"
+
+
+async def stream_bulk(
+    urls: List[str],
+    sitemap_url: Optional[str],
+    output: str,
+    concurrency: int,
+    per_host_concurrency: int,
+) -> AsyncIterator[bytes]:
+    """Encode run_bulk results as NDJSON lines or SSE events"""
+    if sitemap_url:
+        source = iter_sitemap_urls(sitemap_url, config.BULK_MAX_URLS)
+    else:
+        source = _iter_list(urls[:config.BULK_MAX_URLS])
+
+    fmt = format_sse if output == "sse" else format_ndjson
+    count = 0
+    try:
+        async for item in run_bulk(source, concurrency, per_host_concurrency):
+            count += 1
+            yield fmt(item)
+    except HTTPException as e:
+        yield format_sse({"error": e.detail}, "error") if output == "sse" else fmt({"error": e.detail})
+    if output == "sse":
+        yield format_sse({"completed": count}, "done")
@@ -0,0 +1,312 @@
+"""
+Caches - In-process LRU/TTL caches for origin-level side files, optionally backed by a store shared between worker processes
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import httpx
+from app import config
+from app.host_policy import host_policy
+from app.http_client import SIDE_FILE_TIMEOUT
+from app.metrics import FETCH_BYTES
+from app.result_cache import body_hash
+
+MAX_AGE_PATTERN = re.compile(r"(?:^|,)\s*(?:s-maxage|max-age)\s*=\s*\"?(\d+)", re.IGNORECASE)
+
+# Larger side-file bodies are cached per process only
+SHARED_MAX_BODY = 1024 * 1024
+
+# The shared store is trimmed back to its size limit once every this many writes
+SHARED_PRUNE_EVERY = 256
+
+
+class CacheEntry:
+    __slots__ = ("result", "status_code", "etag", "last_modified", "expires_at", "body_hash")
+
+    def __init__(self, result: Any, status_code: int, etag: Optional[str], last_modified: Optional[str],
+                 expires_at: float, body_hash: Optional[str] = None):
+        self.result = result
+        self.status_code = status_code
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.body_hash = body_hash
+
+
+class SharedSideFileStore:
+    """
+    Side-file responses (status, validators, wall-clock expiry and body) shared
+    by the worker processes of one host through an SQLite file, normally on
+    /dev/shm. Each worker keeps its own built results in memory; a worker that
+    misses a URL another worker already fetched rebuilds the result from the
+    shared body instead of downloading the file again.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        # Connections must not cross fork(): the launcher opens this store before forking workers
+        os.register_at_fork(after_in_child=self._forget_connections)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS side_files ("
+                " url TEXT PRIMARY KEY,"
+                " status_code INTEGER NOT NULL,"
+                " content_type TEXT,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " expires_at REAL NOT NULL,"
+                " body_hash TEXT NOT NULL,"
+                " body BLOB NOT NULL,"
+                " stored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS side_files_stored ON side_files (stored_at)")
+
+    def _forget_connections(self) -> None:
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # a lost write only costs a re-fetch
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def get(self, url: str) -> Optional[sqlite3.Row]:
+        return self._connect().execute(
+            "SELECT status_code, content_type, etag, last_modified, expires_at, body_hash, body"
+            " FROM side_files WHERE url = ?", (url,),
+        ).fetchone()
+
+    def put(self, url: str, response: httpx.Response, expires_at: float, digest: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO side_files"
+                " (url, status_code, content_type, etag, last_modified, expires_at, body_hash, body, stored_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.status_code, response.headers.get("content-type"), response.headers.get("etag"),
+                 response.headers.get("last-modified"), expires_at, digest, response.content, time.time()),
+            )
+        self._writes += 1
+        if self._writes % SHARED_PRUNE_EVERY == 0:
+            self.prune()
+
+    def touch(self, url: str, expires_at: float, digest: str) -> None:
+        """Extend a record after a 304, unless another worker replaced its body meanwhile"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE side_files SET expires_at = MAX(expires_at, ?) WHERE url = ? AND body_hash = ?",
+                (expires_at, url, digest),
+            )
+
+    def prune(self) -> None:
+        """Drop the oldest records beyond max_entries"""
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM side_files WHERE url IN ("
+                " SELECT url FROM side_files ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM side_files")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM side_files").fetchone()[0]
+
+
+def shared_response(url: str, record: sqlite3.Row) -> httpx.Response:
+    """Rebuild the response a shared record was stored from, for the build functions"""
+    headers = {"content-type": record["content_type"]} if record["content_type"] else {}
+    return httpx.Response(record["status_code"], headers=headers, content=record["body"],
+                          request=httpx.Request("GET", url))
+
+
+class SideFileCache:
+    """
+    Per-URL cache of side-file analysis results (robots.txt, llms.txt).
+
+    Fresh entries are served from memory, stale entries are revalidated with
+    If-None-Match/If-Modified-Since, and concurrent misses for the same URL
+    share one in-flight fetch. Each result is stored with the hash of the body
+    it was built from, so a full re-download of an unchanged file reuses the
+    result instead of rebuilding it. Cached results are shared and must not be mutated.
+
+    With a shared store, local misses look there before going to the network
+    and every download is published to it, so adding worker processes does
+    not multiply the fetches per origin.
+    """
+
+    def __init__(self, max_entries: int, default_ttl: float, max_ttl: float, error_ttl: float,
+                 shared: Optional[SharedSideFileStore] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.error_ttl = error_ttl
+        self.shared = shared
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.revalidated = 0
+        self.unchanged = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def ttl_for(self, response: httpx.Response, status_code: Optional[int] = None) -> float:
+        """Seconds to keep a response, from Cache-Control or the configured defaults"""
+        status_code = status_code or response.status_code
+        cache_control = response.headers.get("cache-control", "")
+        lowered = cache_control.lower()
+        if "no-store" in lowered:
+            return -1
+        if "no-cache" in lowered:
+            return 0
+        if status_code not in (200, 404, 410):
+            return self.error_ttl
+        match = MAX_AGE_PATTERN.search(cache_control)
+        ttl = float(match.group(1)) if match else self.default_ttl
+        return min(ttl, self.max_ttl)
+
+    async def fetch(self, url: str, build: Callable[[httpx.Response], Any], client: httpx.AsyncClient,
+                    key: Optional[str] = None, on_error: Optional[Callable[[Exception], Any]] = None) -> Any:
+        """
+        Return build(response) for url, from cache when fresh; key separates
+        different builds of one url. With on_error, a network failure (connect
+        error, timeout, ...) returns on_error(error), cached for error_ttl so an
+        unreachable origin is not retried on every request.
+        """
+        key = key or url
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.result
+
+        pending = self._inflight.get(key)
+        if pending is None:
+            self.misses += 1
+            pending = asyncio.ensure_future(self._refresh(url, key, entry, build, client, on_error))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(pending)
+
+    def _finish(self, key: str, done: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        # Mark the error as seen even if every waiter was cancelled meanwhile
+        if not done.cancelled():
+            done.exception()
+
+    async def _refresh(self, url: str, key: str, entry: Optional[CacheEntry], build: Callable[[httpx.Response], Any],
+                       client: httpx.AsyncClient, on_error: Optional[Callable[[Exception], Any]]) -> Any:
+        if self.shared is not None:
+            record = await asyncio.to_thread(self.shared.get, url)
+            if record is not None:
+                fresh_for = record["expires_at"] - time.time()
+                if entry is not None and entry.body_hash == record["body_hash"] and entry.status_code == record["status_code"]:
+                    result = entry.result
+                else:
+                    result = build(shared_response(url, record))
+                entry = CacheEntry(result, record["status_code"], record["etag"], record["last_modified"],
+                                   time.monotonic() + fresh_for, record["body_hash"])
+                if fresh_for > 0:
+                    # Another worker fetched it recently
+                    self.shared_hits += 1
+                    self._store(key, entry)
+                    return result
+                # Stale everywhere: revalidate with the shared validators below
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        try:
+            async with host_policy.request(url, SIDE_FILE_TIMEOUT) as call:
+                response = await call.send(
+                    lambda timeout: client.get(url, headers=headers, follow_redirects=True, timeout=timeout)
+                )
+        except httpx.TransportError as e:
+            if on_error is None:
+                raise
+            self.failed += 1
+            result = on_error(e)
+            # No validators or body hash: the next fetch after error_ttl is a plain download
+            self._store(key, CacheEntry(result, 0, None, None, time.monotonic() + self.error_ttl))
+            return result
+
+        if response.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            ttl = self.ttl_for(response, entry.status_code)
+            entry.expires_at = time.monotonic() + ttl
+            self._store(key, entry)
+            if self.shared is not None and ttl > 0 and entry.body_hash:
+                await asyncio.to_thread(self.shared.touch, url, time.time() + ttl, entry.body_hash)
+            return entry.result
+
+        FETCH_BYTES.observe(url.rsplit("/", 1)[-1], len(response.content))
+        digest = body_hash(response.content)
+        if entry is not None and entry.body_hash == digest and entry.status_code == response.status_code:
+            # Same bytes as last time (the server just doesn't do conditional requests)
+            self.unchanged += 1
+            result = entry.result
+        else:
+            result = build(response)
+        ttl = self.ttl_for(response)
+        if ttl >= 0:
+            # Kept even when already stale, so the next fetch can revalidate or compare hashes
+            self._store(key, CacheEntry(
+                result, response.status_code, response.headers.get("etag"), response.headers.get("last-modified"),
+                time.monotonic() + ttl, digest,
+            ))
+            if self.shared is not None and len(response.content) <= SHARED_MAX_BODY:
+                await asyncio.to_thread(self.shared.put, url, response, time.time() + ttl, digest)
+        else:
+            self._entries.pop(key, None)
+        return result
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_hits": self.shared_hits,
+            "revalidated": self.revalidated,
+            "unchanged": self.unchanged,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+        }
+
+
+side_file_cache = SideFileCache(
+    max_entries=config.SIDE_FILE_CACHE_SIZE,
+    default_ttl=config.SIDE_FILE_CACHE_TTL,
+    max_ttl=config.SIDE_FILE_CACHE_MAX_TTL,
+    error_ttl=config.SIDE_FILE_CACHE_ERROR_TTL,
+    shared=SharedSideFileStore(config.SIDE_FILE_SHARED_PATH, config.SIDE_FILE_CACHE_SIZE) if config.SIDE_FILE_SHARED_PATH else None,
+)
@@ -0,0 +1,139 @@
+"""
+Configuration - Deployment settings read from the environment (.env supported)
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def env_int(name: str, default: int) -> int:
+    """Integer setting from the environment, falling back to default"""
+    value = os.getenv(name, "").strip()
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    """Float setting from the environment, falling back to default"""
+    value = os.getenv(name, "").strip()
+    return float(value) if value else default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Boolean setting from the environment (1/true/yes/on)"""
+    value = os.getenv(name, "").strip().lower()
+    if not value:
+        return default
+    return value in ("1", "true", "yes", "on")
+
+
+# Page fetch: bytes analyzed per page (larger pages are cut to a prefix) and accepted types
+PAGE_MAX_BYTES = env_int("PAGE_MAX_BYTES", 5 * 1024 * 1024)
+PAGE_CONTENT_TYPES = frozenset(
+    t.strip().lower()
+    for t in os.getenv("PAGE_CONTENT_TYPES", "text/html,application/xhtml+xml,text/plain").split(",")
+    if t.strip()
+)
+
+# Per-host fetch policy (app/host_policy.py), per server process
+FETCH_HOST_CONCURRENCY = env_int("FETCH_HOST_CONCURRENCY", 8)  # requests to one host at once
+FETCH_HOST_QUEUE_TIMEOUT = env_float("FETCH_HOST_QUEUE_TIMEOUT", 10.0)  # seconds an interactive fetch waits for a slot before failing
+FETCH_TIMEOUT_FACTOR = env_float("FETCH_TIMEOUT_FACTOR", 4.0)  # timeout = factor x the host's p95 latency...
+FETCH_TIMEOUT_MIN = env_float("FETCH_TIMEOUT_MIN", 2.0)  # ...but at least this, and at most the fixed timeout
+FETCH_MAX_RETRIES = env_int("FETCH_MAX_RETRIES", 2)  # retries of a failed connection per request
+FETCH_RETRY_BUDGET = env_float("FETCH_RETRY_BUDGET", 0.2)  # retries a host earns per request
+FETCH_BREAKER_FAILURES = env_int("FETCH_BREAKER_FAILURES", 5)  # consecutive failures that open the circuit
+FETCH_BREAKER_COOLDOWN = env_float("FETCH_BREAKER_COOLDOWN", 30.0)  # seconds an open circuit fails fast
+FETCH_HOST_STATES = env_int("FETCH_HOST_STATES", 10000)  # hosts tracked before idle ones are forgotten
+
+# Offline record/replay of every fetch (app/replay.py): "off", "record" (to the archive) or "replay" (from it, no network)
+HTTP_ARCHIVE_MODE = os.getenv("HTTP_ARCHIVE_MODE", "off").strip().lower()
+HTTP_ARCHIVE_PATH = os.getenv("HTTP_ARCHIVE_PATH", "insightengine.httparchive").strip()
+HTTP_ARCHIVE_LATENCY_SCALE = env_float("HTTP_ARCHIVE_LATENCY_SCALE", 0.0)  # replay recorded response times x this
+
+# JSON-LD: blocks over the per-block or remaining total budget are skipped; blocks over
+# the stream threshold are scanned shallowly instead of fully decoded
+JSON_LD_MAX_BLOCK_BYTES = env_int("JSON_LD_MAX_BLOCK_BYTES", 2 * 1024 * 1024)
+JSON_LD_MAX_TOTAL_BYTES = env_int("JSON_LD_MAX_TOTAL_BYTES", 4 * 1024 * 1024)
+JSON_LD_STREAM_THRESHOLD = env_int("JSON_LD_STREAM_THRESHOLD", 64 * 1024)
+
+# Scoring rule table: a JSON file replacing the built-in table in app/scoring.py (empty = built-in)
+SCORING_RULES_PATH = os.getenv("SCORING_RULES_PATH", "").strip()
+
+# HTML parser backend: "stream" (default), "soup", "lxml" or "selectolax"
+HTML_PARSER = os.getenv("HTML_PARSER", "stream").strip().lower()
+
+# Where parse-and-score work runs: "thread", "process" or "inline" (on the event loop)
+ANALYZER_EXECUTOR = os.getenv("ANALYZER_EXECUTOR", "thread").strip().lower()
+
+# Importing analyzers/parsers and starting pool workers: "background" (after startup, default),
+# "eager" (before the server accepts requests) or "off" (on the first request)
+ANALYZER_WARMUP = os.getenv("ANALYZER_WARMUP", "background").strip().lower()
+
+# Headless-browser check of is_ssr: "off" (default) or "uncertain" (only pages the HTML heuristic can't call; needs playwright)
+RENDER_CHECK = os.getenv("RENDER_CHECK", "off").strip().lower()
+RENDER_CONCURRENCY = env_int("RENDER_CONCURRENCY", 2)  # pages rendering at once per server process
+RENDER_TIMEOUT = env_float("RENDER_TIMEOUT", 10.0)  # seconds per render
+RENDER_QUEUE_TIMEOUT = env_float("RENDER_QUEUE_TIMEOUT", 2.0)  # seconds to wait for a free page before skipping
+RENDER_CACHE_SIZE = env_int("RENDER_CACHE_SIZE", 5000)
+
+# Worker count for the analyzer pool (defaults to one per CPU core)
+ANALYZER_POOL_SIZE = env_int("ANALYZER_POOL_SIZE", os.cpu_count() or 1)
+
+# Bulk analysis: URL cap per batch and default/maximum concurrency
+BULK_MAX_URLS = env_int("BULK_MAX_URLS", 50000)
+BULK_CONCURRENCY = env_int("BULK_CONCURRENCY", 32)
+BULK_MAX_CONCURRENCY = env_int("BULK_MAX_CONCURRENCY", 256)
+BULK_PER_HOST_CONCURRENCY = env_int("BULK_PER_HOST_CONCURRENCY", 4)
+
+# Per-origin robots.txt / llms.txt cache (seconds; Cache-Control max-age wins up to the max)
+SIDE_FILE_CACHE_SIZE = env_int("SIDE_FILE_CACHE_SIZE", 10000)
+SIDE_FILE_CACHE_TTL = env_float("SIDE_FILE_CACHE_TTL", 3600)
+SIDE_FILE_CACHE_MAX_TTL = env_float("SIDE_FILE_CACHE_MAX_TTL", 86400)
+SIDE_FILE_CACHE_ERROR_TTL = env_float("SIDE_FILE_CACHE_ERROR_TTL", 60)
+# SQLite file through which worker processes share fetched side files (empty = per process; serve.py sets one)
+SIDE_FILE_SHARED_PATH = os.getenv("SIDE_FILE_SHARED_PATH", "").strip()
+
+# Full-page result cache: "memory", "sqlite" or "none"
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory").strip().lower()
+RESULT_CACHE_SIZE = env_int("RESULT_CACHE_SIZE", 5000)
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "insightengine_results.sqlite3")
+# Seconds the sqlite backend keeps a record past its freshness, for revalidation and body-hash reuse
+RESULT_CACHE_STALE_TTL = env_float("RESULT_CACHE_STALE_TTL", 7 * 86400)
+# Cap on how long a page's own Cache-Control max-age lets us skip re-fetching it (0 = always revalidate)
+RESULT_CACHE_MAX_FRESHNESS = env_int("RESULT_CACHE_MAX_FRESHNESS", 3600)
+
+# Bulk robots.txt audit: domains per request, concurrent fetches and bytes read per robots.txt
+ROBOTS_AUDIT_MAX_DOMAINS = env_int("ROBOTS_AUDIT_MAX_DOMAINS", 100000)
+ROBOTS_AUDIT_CONCURRENCY = env_int("ROBOTS_AUDIT_CONCURRENCY", 128)
+ROBOTS_MAX_BYTES = env_int("ROBOTS_MAX_BYTES", 512 * 1024)
+
+# Site crawls: frontier/results database per crawl, page caps and politeness
+CRAWL_DIR = os.getenv("CRAWL_DIR", "crawls")
+CRAWL_MAX_PAGES = env_int("CRAWL_MAX_PAGES", 10000)
+CRAWL_HARD_MAX_PAGES = env_int("CRAWL_HARD_MAX_PAGES", 100000)
+CRAWL_MAX_DEPTH = env_int("CRAWL_MAX_DEPTH", 10)
+CRAWL_CONCURRENCY = env_int("CRAWL_CONCURRENCY", 8)
+CRAWL_DELAY = env_float("CRAWL_DELAY", 0.5)  # seconds between requests to a host; robots Crawl-delay raises it
+CRAWL_LEASE = env_float("CRAWL_LEASE", 120.0)  # seconds a silent runner keeps a crawl before it can be resumed
+
+# Async analysis jobs: SQLite queue file, background workers and backpressure
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "insightengine_jobs.sqlite3")
+JOB_WORKERS = env_int("JOB_WORKERS", 16)  # 0 accepts jobs without running them here
+JOB_QUEUE_MAX = env_int("JOB_QUEUE_MAX", 10000)  # queued jobs before POST /api/jobs returns 429
+JOB_RETRY_AFTER = env_int("JOB_RETRY_AFTER", 5)
+JOB_POLL_INTERVAL = env_float("JOB_POLL_INTERVAL", 1.0)
+JOB_RETENTION = env_int("JOB_RETENTION", 86400)  # seconds finished jobs stay readable
+JOB_STALE_AFTER = env_int("JOB_STALE_AFTER", 600)  # running jobs older than this are requeued at startup
+
+# Feature store: directory of date-partitioned Parquet files (empty = disabled; needs pyarrow)
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR", "").strip()
+FEATURE_STORE_FLUSH_ROWS = env_int("FEATURE_STORE_FLUSH_ROWS", 50000)
+FEATURE_STORE_FLUSH_INTERVAL = env_float("FEATURE_STORE_FLUSH_INTERVAL", 60.0)  # seconds between file writes
+FEATURE_STORE_MAX_PENDING = env_int("FEATURE_STORE_MAX_PENDING", 200000)  # buffered rows kept while writes fail (0 = no limit)
+
+# Multi-process serving (serve.py): worker processes forked from one preloaded parent
+SERVER_WORKERS = env_int("SERVER_WORKERS", os.cpu_count() or 1)
+
+# Add per-stage wall/CPU timings to /api/analyze responses by default
+RESPONSE_TIMINGS = env_bool("RESPONSE_TIMINGS", False)
@@ -0,0 +1,499 @@
+"""
+Site Crawl - Crawl a site from a seed URL or sitemap and roll page scores up per site
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from fastapi import HTTPException
+from app import config
+from app.analyzers.robots_analyzer import RobotsRules, fetch_robots_rules
+from app.bulk import format_ndjson, format_sse, iter_sitemap_urls
+from app.host_policy import queue_for_slots
+from app.http_client import origin_of
+from app.pipeline import fetch_side_files, run_analysis
+from app.results import AnalysisResult
+from app.scoring import CATEGORIES
+
+# Token matched against robots.txt User-agent lines (the product token of USER_AGENT)
+CRAWLER_AGENT = "InsightEngine"
+
+
+# Query parameters that never change page content
+TRACKING_PARAMS = frozenset(["fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "_ga"])
+
+# Links to these are never HTML, so they are not worth a request
+SKIP_EXTENSIONS = frozenset([
+    ".7z", ".avi", ".bmp", ".css", ".csv", ".doc", ".docx", ".exe", ".gif", ".gz", ".ico",
+    ".jpeg", ".jpg", ".js", ".json", ".mov", ".mp3", ".mp4", ".pdf", ".png", ".ppt",
+    ".pptx", ".rar", ".rss", ".svg", ".tar", ".tgz", ".webm", ".webp", ".woff", ".woff2",
+    ".xls", ".xlsx", ".xml", ".zip",
+])
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Frontier row states
+PENDING, CLAIMED, DONE, SKIPPED = range(4)
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """Canonical form used to dedupe the frontier, or None for non-HTTP URLs"""
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.rstrip(".")
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+
+    # Resolve dot segments the way a browser would
+    segments: List[str] = []
+    for segment in (parts.path or "/").split("/")[1:]:
+        if segment == "..":
+            if segments:
+                segments.pop()
+        elif segment != ".":
+            segments.append(segment)
+    path = "/" + "/".join(segments)
+    if parts.path.endswith(("/.", "/..")):
+        path = path.rstrip("/") + "/"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def site_host(url: str) -> str:
+    """Host a crawl stays on, with any leading "www." dropped"""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def is_crawlable(url: str, host: str) -> bool:
+    """True for pages on the crawled site that could be HTML"""
+    if site_host(url) != host:
+        return False
+    path = urlsplit(url).path.lower()
+    return os.path.splitext(path)[1] not in SKIP_EXTENSIONS
+
+
+class CrawlStore:
+    """
+    Frontier and per-page scores of one crawl, in SQLite so memory stays flat.
+    Only the runner holding the crawl's lease (see acquire) claims pages; a
+    readonly store just reads the summary.
+    """
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        self.owner: Optional[str] = None
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        if readonly:
+            self.size = self._connect().execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS frontier ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " url TEXT UNIQUE NOT NULL,"
+                " depth INTEGER NOT NULL,"
+                " state INTEGER NOT NULL DEFAULT 0,"
+                " overall INTEGER,"
+                + "".join(f' "{name}" INTEGER,' for name in CATEGORIES) +
+                " error TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state, seq)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS owner ("
+                " id INTEGER PRIMARY KEY CHECK (id = 0),"
+                " token TEXT NOT NULL,"
+                " lease_until REAL NOT NULL)"
+            )
+        self.size = self._connect().execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.readonly:
+                conn = sqlite3.connect(Path(self.path).resolve().as_uri() + "?mode=ro", uri=True, timeout=30.0)
+            else:
+                conn = sqlite3.connect(self.path, timeout=30.0)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self) -> bool:
+        """
+        Take the crawl's lease unless another runner holds a live one. Pages the
+        previous runner claimed but never recorded go back in the queue.
+        """
+        token = uuid.uuid4().hex
+        with self._write_lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT lease_until FROM owner WHERE id = 0").fetchone()
+                if row and row[0] > time.time():
+                    conn.rollback()
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO owner (id, token, lease_until) VALUES (0, ?, ?)",
+                    (token, time.time() + config.CRAWL_LEASE),
+                )
+                conn.execute("UPDATE frontier SET state = ? WHERE state = ?", (PENDING, CLAIMED))
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        self.owner = token
+        return True
+
+    def release(self) -> None:
+        """Give up the lease so the crawl can be resumed at once"""
+        if self.owner is None:
+            return
+        with self._write_lock, self._connect() as conn:
+            conn.execute("DELETE FROM owner WHERE token = ?", (self.owner,))
+        self.owner = None
+
+    def _renew(self, conn: sqlite3.Connection) -> bool:
+        """Extend our lease; False once another runner has taken the crawl over"""
+        cursor = conn.execute(
+            "UPDATE owner SET lease_until = ? WHERE token = ?", (time.time() + config.CRAWL_LEASE, self.owner)
+        )
+        return cursor.rowcount == 1
+
+    def set_meta(self, values: Dict[str, Any]) -> None:
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(key, str(value)) for key, value in values.items()],
+            )
+
+    def meta(self) -> Dict[str, str]:
+        return dict(self._connect().execute("SELECT key, value FROM meta").fetchall())
+
+    def add(self, urls: Iterable[str], depth: int, max_pages: int) -> int:
+        """Queue URLs not seen before, up to max_pages in total; returns how many were new"""
+        with self._write_lock:
+            room = max_pages - self.size
+            if room <= 0:
+                return 0
+            added = 0
+            with self._connect() as conn:
+                for url in urls:
+                    cursor = conn.execute("INSERT OR IGNORE INTO frontier (url, depth) VALUES (?, ?)", (url, depth))
+                    added += cursor.rowcount
+                    if added >= room:
+                        break
+            self.size += added
+            return added
+
+    def claim(self, limit: int) -> List[Tuple[str, int]]:
+        """Take up to limit pending URLs, shallowest first (none once the lease is lost)"""
+        with self._write_lock, self._connect() as conn:
+            if not self._renew(conn):
+                return []
+            rows = conn.execute(
+                "SELECT seq, url, depth FROM frontier WHERE state = ? ORDER BY seq LIMIT ?", (PENDING, limit)
+            ).fetchall()
+            conn.executemany("UPDATE frontier SET state = ? WHERE seq = ?", [(CLAIMED, seq) for seq, _, _ in rows])
+        return [(url, depth) for _, url, depth in rows]
+
+    def record(self, url: str, result: Union[AnalysisResult, Dict[str, Any]]) -> None:
+        """Store a finished page's scores (or its {"url", "error"})"""
+        if isinstance(result, AnalysisResult):
+            scores = [result.categories[name].score for name in CATEGORIES]
+            values = [result.overall_score] + scores + [None]
+        else:
+            values = [None] * (len(CATEGORIES) + 1) + [result["error"]]
+        columns = ", ".join(f'"{name}" = ?' for name in ["overall"] + CATEGORIES + ["error"])
+        with self._write_lock, self._connect() as conn:
+            conn.execute(f"UPDATE frontier SET state = ?, {columns} WHERE url = ?", [DONE] + values + [url])
+            self._renew(conn)
+
+    def skip(self, url: str, reason: str) -> None:
+        with self._write_lock, self._connect() as conn:
+            conn.execute("UPDATE frontier SET state = ?, error = ? WHERE url = ?", (SKIPPED, reason, url))
+
+    def summary(self, lowest: int = 10) -> Dict[str, Any]:
+        """Site-level aggregates over every page scored so far"""
+        conn = self._connect()
+        states = dict(conn.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state").fetchall())
+        scored = f"state = {DONE} AND error IS NULL"
+        pages = conn.execute(f"SELECT COUNT(*) FROM frontier WHERE {scored}").fetchone()[0]
+
+        def stats(column: str) -> Dict[str, Any]:
+            mean, low, high = conn.execute(
+                f'SELECT AVG("{column}"), MIN("{column}"), MAX("{column}") FROM frontier WHERE {scored}'
+            ).fetchone()
+            median = conn.execute(
+                f'SELECT "{column}" FROM frontier WHERE {scored} ORDER BY "{column}" LIMIT 1 OFFSET ?',
+                (max(pages - 1, 0) // 2,),
+            ).fetchone()
+            return {
+                "mean": round(mean, 1) if mean is not None else None,
+                "median": median[0] if median else None,
+                "min": low,
+                "max": high,
+            }
+
+        overall = stats("overall")
+        distribution = conn.execute(
+            f"SELECT SUM(overall >= 80), SUM(overall >= 50 AND overall < 80), SUM(overall < 50) FROM frontier WHERE {scored}"
+        ).fetchone()
+        worst = conn.execute(
+            f"SELECT url, overall FROM frontier WHERE {scored} ORDER BY overall, seq LIMIT ?", (lowest,)
+        ).fetchall()
+        errors = conn.execute("SELECT COUNT(*) FROM frontier WHERE state = ? AND error IS NOT NULL", (DONE,)).fetchone()[0]
+
+        return {
+            "meta": self.meta(),
+            "pages_scored": pages,
+            "pages_failed": errors,
+            "pages_skipped": states.get(SKIPPED, 0),
+            "pages_pending": states.get(PENDING, 0) + states.get(CLAIMED, 0),
+            "overall_score": round(overall["mean"]) if overall["mean"] is not None else None,
+            "overall": overall,
+            "categories": {name: stats(name) for name in CATEGORIES},
+            "distribution": {
+                "good": distribution[0] or 0,
+                "needs_work": distribution[1] or 0,
+                "poor": distribution[2] or 0,
+            },
+            "lowest_pages": [{"url": url, "overall_score": score} for url, score in worst],
+        }
+
+
+class HostScheduler:
+    """Per-host concurrency cap plus a minimum gap between request starts"""
+
+    def __init__(self, per_host_concurrency: int):
+        self.per_host_concurrency = per_host_concurrency
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str, delay: float):
+        limit = self._limits.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+        async with limit:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            # Reserve the start time before sleeping so concurrent waiters queue up behind it
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+def crawl_path(crawl_id: str) -> str:
+    return os.path.join(config.CRAWL_DIR, f"{crawl_id}.sqlite3")
+
+
+def create_crawl(seed_url: Optional[str], sitemap_url: Optional[str], max_pages: int, max_depth: int) -> Tuple[str, CrawlStore]:
+    """A new crawl id and its empty store, leased to the caller, with the crawl settings saved for resuming"""
+    crawl_id = uuid.uuid4().hex
+    os.makedirs(config.CRAWL_DIR, exist_ok=True)
+    store = CrawlStore(crawl_path(crawl_id))
+    store.set_meta({
+        "host": site_host(seed_url or sitemap_url),
+        "seed_url": seed_url or "",
+        "sitemap_url": sitemap_url or "",
+        "max_pages": max_pages,
+        "max_depth": max_depth,
+    })
+    store.acquire()
+    return crawl_id, store
+
+
+def open_crawl(crawl_id: str) -> CrawlStore:
+    """An existing crawl's store, read-only (404 if there is none)"""
+    path = crawl_path(crawl_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Unknown crawl {crawl_id}")
+    return CrawlStore(path, readonly=True)
+
+
+def resume_crawl(crawl_id: str) -> CrawlStore:
+    """An existing crawl's store, leased to the caller (404 if there is none, 409 if it is still running)"""
+    path = crawl_path(crawl_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Unknown crawl {crawl_id}")
+    store = CrawlStore(path)
+    if not store.acquire():
+        raise HTTPException(status_code=409, detail=f"Crawl {crawl_id} is already running")
+    return store
+
+
+async def seed_crawl(store: CrawlStore, seed_url: Optional[str], sitemap_url: Optional[str], host: str, max_pages: int) -> None:
+    """Queue the seed URL and every on-site sitemap URL at depth 0"""
+    if seed_url:
+        await asyncio.to_thread(store.add, [normalize_url(seed_url)], 0, max_pages)
+    if sitemap_url:
+        batch: List[str] = []
+        async for url in iter_sitemap_urls(sitemap_url, max_pages):
+            url = normalize_url(url)
+            if url and is_crawlable(url, host):
+                batch.append(url)
+            if len(batch) >= 500:
+                await asyncio.to_thread(store.add, batch, 0, max_pages)
+                batch = []
+        if batch:
+            await asyncio.to_thread(store.add, batch, 0, max_pages)
+
+
+async def run_crawl(
+    store: CrawlStore,
+    host: str,
+    max_pages: int,
+    max_depth: int,
+    concurrency: int,
+    per_host_concurrency: int,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Analyze pages from the frontier, queueing their on-site links, and yield each result"""
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    scheduler = HostScheduler(per_host_concurrency)
+    side_files: Dict[str, asyncio.Task] = {}
+    robots: Dict[str, asyncio.Task] = {}
+    claimed: Deque[Tuple[str, int]] = deque()
+    ready = asyncio.Condition()
+    in_flight = 0
+    done = object()
+
+    async def next_page() -> Optional[Tuple[str, int]]:
+        nonlocal in_flight
+        async with ready:
+            while True:
+                if not claimed:
+                    claimed.extend(await asyncio.to_thread(store.claim, concurrency))
+                if claimed:
+                    in_flight += 1
+                    return claimed.popleft()
+                if in_flight == 0:
+                    # Nothing queued and nobody left who could discover more
+                    return None
+                await ready.wait()
+
+    async def finished() -> None:
+        nonlocal in_flight
+        async with ready:
+            in_flight -= 1
+            ready.notify_all()
+
+    async def crawl_page(url: str, depth: int) -> Dict[str, Any]:
+        origin = origin_of(url)
+        if origin not in side_files:
+            side_files[origin] = asyncio.create_task(fetch_side_files(origin))
+            robots[origin] = asyncio.create_task(fetch_robots_rules(origin))
+        rules: RobotsRules = await asyncio.shield(robots[origin])
+
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        if not rules.is_allowed(CRAWLER_AGENT, path):
+            await asyncio.to_thread(store.skip, url, "Disallowed by robots.txt")
+            return {"url": url, "depth": depth, "skipped": "Disallowed by robots.txt"}
+
+        delay = max(config.CRAWL_DELAY, rules.crawl_delay(CRAWLER_AGENT) or 0.0)
+        async with scheduler.slot(parts.netloc.lower(), delay):
+            try:
+                result = await run_analysis(url, side_files[origin], include_links=depth < max_depth)
+            except HTTPException as e:
+                result = {"url": url, "error": e.detail}
+            except Exception as e:
+                result = {"url": url, "error": f"Analysis failed: {str(e)}"}
+
+        links = None
+        if isinstance(result, AnalysisResult):
+            links, result.links = result.links, None
+        if links:
+            found = {normalize_url(link) for link in links}
+            found = sorted(link for link in found if link and is_crawlable(link, host))
+            await asyncio.to_thread(store.add, found, depth + 1, max_pages)
+        await asyncio.to_thread(store.record, url, result)
+        if isinstance(result, AnalysisResult):
+            return {**result.to_dict(), "depth": depth}
+        result["depth"] = depth
+        return result
+
+    async def worker() -> None:
+        queue_for_slots()
+        try:
+            while True:
+                item = await next_page()
+                if item is None:
+                    break
+                try:
+                    result = await crawl_page(*item)
+                finally:
+                    await finished()
+                await results.put(result)
+        finally:
+            await results.put(done)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    running = len(workers)
+    try:
+        while running:
+            item = await results.get()
+            if item is done:
+                running -= 1
+            else:
+                yield item
+        for worker_task in workers:
+            worker_task.result()
+    finally:
+        for task in workers + list(side_files.values()) + list(robots.values()):
+            task.cancel()
+
+
+async def stream_crawl(
+    crawl_id: str,
+    store: CrawlStore,
+    output: str,
+    concurrency: int,
+    per_host_concurrency: int,
+) -> AsyncIterator[bytes]:
+    """Run (or resume) a crawl and encode its page results and final summary as NDJSON or SSE"""
+    fmt = format_sse if output == "sse" else format_ndjson
+    meta = store.meta()
+    host, max_pages, max_depth = meta["host"], int(meta["max_pages"]), int(meta["max_depth"])
+
+    def event(item: Dict[str, Any], name: str) -> bytes:
+        return format_sse(item, name) if output == "sse" else format_ndjson({name: item})
+
+    count = 0
+    try:
+        yield event({"crawl_id": crawl_id, "host": host}, "crawl")
+        try:
+            if store.size == 0:
+                await seed_crawl(store, meta["seed_url"], meta["sitemap_url"], host, max_pages)
+            async for item in run_crawl(store, host, max_pages, max_depth, concurrency, per_host_concurrency):
+                count += 1
+                yield fmt(item)
+        except HTTPException as e:
+            yield format_sse({"error": e.detail}, "error") if output == "sse" else fmt({"error": e.detail})
+    finally:
+        store.release()
+    summary = await asyncio.to_thread(store.summary)
+    yield event({"crawl_id": crawl_id, **summary}, "summary")
+    if output == "sse":
+        yield format_sse({"completed": count}, "done")
@@ -0,0 +1,114 @@
+"""
+Analyzer Executor - Run CPU-bound page analysis off the event loop
+"""
+import asyncio
+import importlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from app import config
+from app.analyzers.document import parse_document
+from app.metrics import StageTimings
+from app.results import CategoryResult
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+WARMUP_MODES = ("background", "eager", "off")
+
+# Page-level analyzers as category -> "module:function", imported on first use
+PAGE_ANALYZERS: Dict[str, str] = {
+    "schema": "app.analyzers.schema_analyzer:analyze_schema",
+    "content": "app.analyzers.content_analyzer:analyze_content",
+    "technical": "app.analyzers.technical_analyzer:analyze_technical",
+}
+
+# Small page that touches every analyzer path worth warming (JSON-LD, headings, meta)
+WARMUP_PAGE = (
+    "<html><head><title>Warm-up page</title><meta name=\"description\" content=\"warm-up\">"
+    "<script type=\"application/ld+json\">{\"@type\": \"Organization\", \"name\": \"x\"}</script></head>"
+    "<body><h1>Warm-up</h1><h2>FAQ</h2><p>Some text to count.</p><a href=\"/next\">next</a></body></html>"
+)
+
+_executor: Optional[Executor] = None
+_analyzers: Optional[List[Tuple[str, Callable[[Any], CategoryResult]]]] = None
+
+
+def load_analyzers() -> List[Tuple[str, Callable[[Any], CategoryResult]]]:
+    """Resolve PAGE_ANALYZERS, importing their modules the first time"""
+    global _analyzers
+    if _analyzers is None:
+        loaded = []
+        for category, target in PAGE_ANALYZERS.items():
+            module, name = target.split(":")
+            loaded.append((category, getattr(importlib.import_module(module), name)))
+        _analyzers = loaded
+    return _analyzers
+
+
+def analyze_page(html: str) -> Dict[str, Any]:
+    """Parse the page once and run the page-level analyzers (plus their stage timings)"""
+    analyzers = load_analyzers()
+    timings = StageTimings()
+    with timings.stage("parse") as record:
+        doc = parse_document(html)
+        record["elements"] = doc.element_count
+    result: Dict[str, Any] = {}
+    for category, analyze in analyzers:
+        with timings.stage(category):
+            result[category] = analyze(doc)
+    # Raw <a href> targets and <base href>, resolved against the final URL by the pipeline
+    result["links"] = doc.anchors
+    result["base_href"] = doc.base_href
+    result["timings"] = timings.stages
+    return result
+
+
+def warm_up() -> None:
+    """Import the analyzers and the configured parser backend by analyzing a tiny page once"""
+    analyze_page(WARMUP_PAGE)
+
+
+def get_executor() -> Optional[Executor]:
+    """Return the configured pool, creating it on first use (None when inline)"""
+    global _executor
+    kind = config.ANALYZER_EXECUTOR
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"ANALYZER_EXECUTOR must be one of {', '.join(EXECUTOR_KINDS)}, got {kind!r}")
+    if kind == "inline":
+        return None
+    if _executor is None:
+        workers = max(1, config.ANALYZER_POOL_SIZE)
+        if kind == "process":
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyzer")
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the pool, waiting for running analyses to finish"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def warm_up_pool() -> None:
+    """Warm every analyzer worker (or this process, for thread/inline pools) before real pages arrive"""
+    executor = get_executor()
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ProcessPoolExecutor):
+        # One call per worker; queued together they make the pool start all of its processes
+        await asyncio.gather(*[
+            loop.run_in_executor(executor, warm_up) for _ in range(max(1, config.ANALYZER_POOL_SIZE))
+        ])
+    else:
+        # Threads share the process's imports, so warming once covers them all
+        await asyncio.to_thread(warm_up)
+
+
+async def run_page_analysis(html: str) -> Dict[str, Any]:
+    """Run analyze_page on the configured backend and await its result"""
+    executor = get_executor()
+    if executor is None:
+        return analyze_page(html)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, analyze_page, html)
@@ -0,0 +1,445 @@
+"""
+Feature Store - Append-only Parquet history of analysis scores and features, partitioned by date
+
+Every successful analysis adds one row: the overall and category scores, each
+analyzer's features and per-AI-bot robots.txt access. Rows are buffered and
+written as immutable files under
+
+    FEATURE_STORE_DIR/date=YYYY-MM-DD/part-<time>-<id>.parquet
+
+so several server processes can append to one directory without coordination.
+Reports read only the columns and date partitions they need (needs pyarrow),
+and stored features can be re-scored under a changed rule table (needs numpy).
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+from app import config
+from app.analyzers.robots_analyzer import AI_BOTS
+from app.results import AnalysisResult
+from app.scoring import CATEGORIES, ScoringPlan, load_rules, score_pages
+
+logger = logging.getLogger(__name__)
+
+# pyarrow is optional and slow to import, so it is loaded when a store is first opened
+pa = pc = pa_dataset = pq = None
+
+# Features kept per category, as (feature, type); column names are "<category>_<feature>"
+FEATURE_COLUMNS: Dict[str, List[Tuple[str, str]]] = {
+    "robots": [("found", "bool"), ("fetch_error", "bool"), ("allowed_ratio", "float64"), ("wildcard_blocks_all", "bool")],
+    "schema": [
+        ("found", "bool"), ("valuable_type_count", "int16"), ("has_faq_schema", "bool"),
+        ("has_article_schema", "bool"), ("has_organization_schema", "bool"), ("invalid_count", "int32"),
+    ],
+    "content": [
+        ("h1_count", "int32"), ("heading_count", "int32"), ("has_faq_section", "bool"),
+        ("has_answer_first", "bool"), ("word_count", "int32"),
+    ],
+    "technical": [
+        ("has_meta_title", "bool"), ("has_meta_description", "bool"), ("has_canonical", "bool"),
+        ("has_open_graph", "bool"), ("has_twitter_card", "bool"), ("is_ssr", "bool"),
+    ],
+    "llms_txt": [
+        ("found", "bool"), ("fetch_error", "bool"), ("content_length", "int32"),
+        ("has_description", "bool"), ("has_attribution", "bool"),
+    ],
+}
+
+
+def bot_column(name: str) -> str:
+    """Column holding whether robots.txt lets an AI bot in, e.g. robots_allows_chatgpt_user"""
+    return "robots_allows_" + re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+# (column, type) in file order; "date" is not stored in the files, it is the partition
+COLUMNS: List[Tuple[str, str]] = (
+    [("analyzed_at", "timestamp"), ("url", "string"), ("host", "string"), ("truncated", "bool"), ("overall_score", "int16")]
+    + [(f"{category}_score", "int16") for category in CATEGORIES]
+    + [(f"{category}_{feature}", kind) for category in CATEGORIES for feature, kind in FEATURE_COLUMNS[category]]
+    + [(bot_column(bot["name"]), "bool") for bot in AI_BOTS]
+)
+METRICS = frozenset(name for name, kind in COLUMNS if kind not in ("timestamp", "string"))
+
+PERIODS = ("day", "week", "month", "all")
+AGGREGATES = ("mean", "min", "max", "sum", "count")
+GROUP_KEYS = ("host", "period")
+
+
+def result_row(result: AnalysisResult, analyzed_at: float) -> Dict[str, Any]:
+    """Flatten one run_analysis result into a store row"""
+    categories = result.categories
+    row: Dict[str, Any] = {
+        "analyzed_at": int(analyzed_at * 1000),
+        "url": result.url,
+        "host": (urlsplit(result.url).hostname or "").lower(),
+        "truncated": bool(result.truncated),
+        "overall_score": result.overall_score,
+    }
+    for category in CATEGORIES:
+        category_result = categories.get(category)
+        row[f"{category}_score"] = category_result.score if category_result else None
+        features = category_result.features if category_result else {}
+        for feature, _ in FEATURE_COLUMNS[category]:
+            row[f"{category}_{feature}"] = features.get(feature)
+    robots = categories.get("robots")
+    allowed = {bot["name"]: bot["allowed"] for bot in (robots.details.get("ai_bots", []) if robots else [])}
+    for bot in AI_BOTS:
+        row[bot_column(bot["name"])] = allowed.get(bot["name"])
+    return row
+
+
+def _load_pyarrow() -> None:
+    global pa, pc, pa_dataset, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("FEATURE_STORE_DIR is set but pyarrow is not installed (pip install pyarrow)")
+    pa, pc, pa_dataset, pq = pyarrow, pyarrow.compute, pyarrow.dataset, pyarrow.parquet
+
+
+def _arrow_schema():
+    types = {
+        "bool": pa.bool_(), "int16": pa.int16(), "int32": pa.int32(), "float64": pa.float64(),
+        "string": pa.string(), "timestamp": pa.timestamp("ms", tz="UTC"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[str]:
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"{name} must be a YYYY-MM-DD date, got {value!r}")
+
+
+class FeatureStore:
+    """
+    Row buffer plus the partitioned Parquet files it is flushed into. At most
+    max_pending analyses are buffered (0 = no limit): while writes keep failing,
+    the oldest rows are dropped and counted in `dropped`.
+    """
+
+    def __init__(self, root: str, max_pending: int = 0):
+        _load_pyarrow()
+        self.root = root
+        self.max_pending = max_pending
+        self.schema = _arrow_schema()
+        self._rows: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.dropped = 0
+        os.makedirs(root, exist_ok=True)
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    def add(self, result: AnalysisResult, analyzed_at: Optional[float] = None) -> None:
+        row = result_row(result, analyzed_at if analyzed_at is not None else time.time())
+        with self._lock:
+            self._rows.append(row)
+            self._trim()
+
+    def _trim(self) -> None:
+        """Drop the oldest buffered rows beyond max_pending (lock held)"""
+        excess = len(self._rows) - self.max_pending
+        if self.max_pending > 0 and excess > 0:
+            del self._rows[:excess]
+            self.dropped += excess
+
+    def add_rows(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """Buffer already-flattened rows (imports, backfills)"""
+        with self._lock:
+            self._rows.extend(rows)
+            self._trim()
+
+    def flush(self) -> int:
+        """Write buffered rows to one new file per date partition; returns the row count"""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        by_date: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            day = datetime.fromtimestamp(row["analyzed_at"] / 1000, timezone.utc).date().isoformat()
+            by_date.setdefault(day, []).append(row)
+        unwritten = list(by_date.items())
+        try:
+            while unwritten:
+                day, day_rows = unwritten[0]
+                self._write(day, pa.Table.from_pylist(day_rows, schema=self.schema))
+                unwritten.pop(0)
+        except Exception:
+            # Rows of the days not written go back in front of newer ones for the next flush
+            with self._lock:
+                self._rows[:0] = [row for _, day_rows in unwritten for row in day_rows]
+                self._trim()
+            raise
+        return len(rows)
+
+    def _write(self, day: str, table, prefix: str = "part") -> str:
+        partition = os.path.join(self.root, f"date={day}")
+        os.makedirs(partition, exist_ok=True)
+        name = f"{prefix}-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+        # Readers skip dot-files, so a file only becomes visible once it is complete
+        temporary = os.path.join(partition, f".{name}")
+        pq.write_table(table, temporary, compression="zstd")
+        os.replace(temporary, os.path.join(partition, name))
+        return name
+
+    def partitions(self) -> List[str]:
+        return sorted(
+            entry[len("date="):] for entry in os.listdir(self.root)
+            if entry.startswith("date=") and os.path.isdir(os.path.join(self.root, entry))
+        )
+
+    def compact(self, before: Optional[str] = None) -> int:
+        """
+        Merge each finished day's files (days before `before`, default today) into one.
+        Run it from a single process (cron, or the CLI below): two compactions of the
+        same day at once would both write the merged rows.
+        """
+        before = _parse_date(before, "before") or datetime.now(timezone.utc).date().isoformat()
+        merged = 0
+        for day in self.partitions():
+            if day >= before:
+                continue
+            partition = os.path.join(self.root, f"date={day}")
+            files = sorted(f for f in os.listdir(partition) if f.endswith(".parquet") and not f.startswith("."))
+            if len(files) < 2:
+                continue
+            paths = [os.path.join(partition, f) for f in files]
+            self._write(day, pa.concat_tables(pq.read_table(path, schema=self.schema) for path in paths), "compacted")
+            for path in paths:
+                os.remove(path)
+            merged += len(files)
+        return merged
+
+    def report(self, metric: str, agg: str = "mean", period: str = "week", group_by: Sequence[str] = GROUP_KEYS,
+               start: Optional[str] = None, end: Optional[str] = None, host: Optional[str] = None,
+               limit: int = 1000) -> Dict[str, Any]:
+        """
+        Aggregate one metric column over rows analyzed between start and end
+        (inclusive dates), grouped by host and/or time period.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; choose one of {', '.join(sorted(METRICS))}")
+        if agg not in AGGREGATES:
+            raise ValueError(f"agg must be one of {', '.join(AGGREGATES)}")
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+        unknown = [key for key in group_by if key not in GROUP_KEYS]
+        if unknown:
+            raise ValueError(f"group_by may only contain {', '.join(GROUP_KEYS)}")
+        keys = [key for key in group_by if key != "period" or period != "all"]
+        columns = [metric] + (["host"] if "host" in keys else []) + (["analyzed_at"] if "period" in keys else [])
+        table = self._scan(columns, start, end, host)
+
+        if "period" in keys:
+            unit = "week" if period == "week" else period
+            table = table.append_column(
+                "period", pc.floor_temporal(table["analyzed_at"], unit=unit, week_starts_monday=True)
+            ).drop_columns(["analyzed_at"])
+        aggregations = [(metric, agg)] if agg == "count" else [(metric, agg), (metric, "count")]
+        grouped = table.group_by(keys).aggregate(aggregations)
+        if keys:
+            grouped = grouped.sort_by([(key, "ascending") for key in keys])
+
+        rows = []
+        for item in grouped.slice(0, limit).to_pylist():
+            row = {key: item[key] for key in keys}
+            if "period" in row:
+                row["period"] = row["period"].date().isoformat()
+            row["value"] = item[f"{metric}_{agg}"]
+            row["count"] = item[f"{metric}_count"]
+            rows.append(row)
+        return {
+            "metric": metric,
+            "agg": agg,
+            "period": period,
+            "group_by": keys,
+            "rows_scanned": table.num_rows,
+            "groups": grouped.num_rows,
+            "results": rows,
+        }
+
+    def rescore(self, plan: Optional[ScoringPlan] = None, start: Optional[str] = None, end: Optional[str] = None,
+                host: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Score the stored features of rows analyzed between start and end with
+        plan (default: the current rule table) in one vectorized pass, and
+        compare with the stored scores. Features the store doesn't keep count as 0.
+        """
+        score_columns = ["overall_score"] + [f"{category}_score" for category in CATEGORIES]
+        feature_columns = [f"{category}_{feature}" for category in CATEGORIES for feature, _ in FEATURE_COLUMNS[category]]
+        table = self._scan(score_columns + feature_columns, start, end, host)
+        # Rows stored without a category have nothing to compare
+        valid = None
+        for name in score_columns:
+            clause = pc.is_valid(table[name])
+            valid = clause if valid is None else pc.and_(valid, clause)
+        if valid is not None:
+            table = table.filter(valid)
+
+        columns = {
+            name: pc.fill_null(table[name], False if pa.types.is_boolean(table[name].type) else 0).to_numpy()
+            for name in feature_columns
+        }
+        rescored = score_pages(columns, plan)
+        scores = {}
+        for category in ["overall"] + CATEGORIES:
+            stored = table["overall_score" if category == "overall" else f"{category}_score"].to_numpy()
+            new = rescored[category]
+            scores[category] = {
+                "changed": int((stored != new).sum()),
+                "mean_before": round(float(stored.mean()), 2) if len(stored) else None,
+                "mean_after": round(float(new.mean()), 2) if len(new) else None,
+            }
+        return {"rows_scanned": table.num_rows, "scores": scores}
+
+    def _scan(self, columns: Sequence[str], start: Optional[str], end: Optional[str], host: Optional[str]):
+        """The given columns of rows analyzed between start and end (inclusive dates), optionally for one host"""
+        start, end = _parse_date(start, "start"), _parse_date(end, "end")
+
+        # Date bounds prune whole partitions before any file is opened
+        dataset = pa_dataset.dataset(
+            self.root, format="parquet", schema=self.schema.append(pa.field("date", pa.string())),
+            partitioning=pa_dataset.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+        )
+        condition = None
+        for clause in (
+            pa_dataset.field("date") >= start if start else None,
+            pa_dataset.field("date") <= end if end else None,
+            pa_dataset.field("host") == host.lower() if host else None,
+        ):
+            if clause is not None:
+                condition = clause if condition is None else condition & clause
+        return dataset.to_table(columns=list(columns), filter=condition)
+
+
+class FeatureRecorder:
+    """Flushes the store in the background: every interval, or sooner once flush_rows are buffered"""
+
+    def __init__(self, store: FeatureStore, flush_rows: int, flush_interval: float):
+        self.store = store
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.store.flush)
+
+    def record(self, result: AnalysisResult) -> None:
+        self.store.add(result)
+        if self.store.pending >= self.flush_rows:
+            self._full.set()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await asyncio.to_thread(self.store.flush)
+            except Exception:
+                logger.exception(
+                    "Feature store flush to %s failed; %d rows buffered, %d dropped so far",
+                    self.store.root, self.store.pending, self.store.dropped,
+                )
+                # A full buffer would set _full again at once: wait a whole interval before retrying
+                await asyncio.sleep(self.flush_interval)
+
+
+_store: Optional[FeatureStore] = None
+_recorder: Optional[FeatureRecorder] = None
+
+
+def get_feature_store() -> Optional[FeatureStore]:
+    """Return the store for FEATURE_STORE_DIR, or None when the store is disabled"""
+    global _store
+    if _store is None and config.FEATURE_STORE_DIR:
+        _store = FeatureStore(config.FEATURE_STORE_DIR, config.FEATURE_STORE_MAX_PENDING)
+    return _store
+
+
+def record_result(result: AnalysisResult) -> None:
+    """Add an analysis to the store if the background recorder is running"""
+    if _recorder is not None:
+        _recorder.record(result)
+
+
+def start_feature_store() -> None:
+    global _recorder
+    store = get_feature_store()
+    if store is not None:
+        _recorder = FeatureRecorder(store, config.FEATURE_STORE_FLUSH_ROWS, config.FEATURE_STORE_FLUSH_INTERVAL)
+        _recorder.start()
+
+
+async def stop_feature_store() -> None:
+    global _recorder
+    if _recorder is not None:
+        await _recorder.stop()
+        _recorder = None
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Maintain and query the feature store in FEATURE_STORE_DIR")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compact = commands.add_parser("compact", help="merge each finished day's files into one")
+    compact.add_argument("--before", help="only days before this date (default today, UTC)")
+    report = commands.add_parser("report", help="aggregate one metric")
+    report.add_argument("metric")
+    report.add_argument("--agg", default="mean", choices=AGGREGATES)
+    report.add_argument("--period", default="week", choices=PERIODS)
+    report.add_argument("--group-by", action="append", choices=GROUP_KEYS)
+    report.add_argument("--start")
+    report.add_argument("--end")
+    report.add_argument("--host")
+    report.add_argument("--limit", type=int, default=1000)
+    rescore = commands.add_parser("rescore", help="re-score stored features and count changed scores")
+    rescore.add_argument("--rules", help="scoring rules JSON (default: SCORING_RULES_PATH or the built-in table)")
+    rescore.add_argument("--start")
+    rescore.add_argument("--end")
+    rescore.add_argument("--host")
+    args = parser.parse_args()
+
+    store = get_feature_store()
+    if store is None:
+        parser.error("FEATURE_STORE_DIR is not set")
+    if args.command == "compact":
+        print(f"Merged {store.compact(args.before)} files")
+    elif args.command == "rescore":
+        plan = ScoringPlan(load_rules(args.rules)) if args.rules else None
+        print(json.dumps(store.rescore(plan, args.start, args.end, args.host), indent=2))
+    else:
+        print(json.dumps(store.report(
+            args.metric, args.agg, args.period, args.group_by or GROUP_KEYS,
+            args.start, args.end, args.host, args.limit,
+        ), indent=2))
@@ -0,0 +1,86 @@
+"""
+Page Fetch - Streaming, size-capped download of the page being analyzed
+"""
+import codecs
+import hashlib
+from typing import Dict, List, Optional
+import httpx
+from fastapi import HTTPException
+from app import config
+from app.host_policy import host_policy
+from app.http_client import PAGE_TIMEOUT
+
+
+class FetchedPage:
+    """A downloaded page (or a 304), decoded and hashed while streaming"""
+
+    def __init__(self, url: str, status_code: int, headers: httpx.Headers, text: str,
+                 body_hash: Optional[str], bytes_read: int, truncated: bool):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.body_hash = body_hash
+        self.bytes_read = bytes_read
+        self.truncated = truncated
+
+
+def is_allowed_content_type(content_type: str) -> bool:
+    """True for HTML-like responses, or when the server sends no Content-Type"""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return not media_type or media_type in config.PAGE_CONTENT_TYPES
+
+
+async def fetch_page(client: httpx.AsyncClient, url: str, headers: Optional[Dict[str, str]] = None,
+                     max_bytes: Optional[int] = None) -> FetchedPage:
+    """
+    Stream a page, stopping after max_bytes of (decompressed) body.
+
+    Oversized pages are cut to a prefix rather than rejected, so memory per
+    request stays bounded and the analyzers still see the head of the page.
+    """
+    max_bytes = max_bytes or config.PAGE_MAX_BYTES
+
+    async with host_policy.request(url, PAGE_TIMEOUT) as call:
+        response = await call.send(lambda timeout: client.send(
+            client.build_request("GET", url, headers=headers, timeout=timeout), stream=True, follow_redirects=True,
+        ))
+        try:
+            if response.status_code == 304:
+                return FetchedPage(str(response.url), 304, response.headers, "", None, 0, False)
+
+            content_type = response.headers.get("content-type", "")
+            if not is_allowed_content_type(content_type):
+                raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
+
+            try:
+                decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+            except LookupError:
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+            digest = hashlib.blake2b(digest_size=16)
+            parts: List[str] = []
+            bytes_read = 0
+            truncated = False
+
+            async for chunk in response.aiter_bytes():
+                remaining = max_bytes - bytes_read
+                if len(chunk) > remaining:
+                    chunk = chunk[:remaining]
+                    truncated = True
+                bytes_read += len(chunk)
+                digest.update(chunk)
+                parts.append(decoder.decode(chunk))
+                if truncated or bytes_read >= max_bytes:
+                    # Leaving the block closes the connection without reading the rest
+                    truncated = True
+                    break
+
+            parts.append(decoder.decode(b"", final=True))
+        finally:
+            await response.aclose()
+
+    return FetchedPage(
+        str(response.url), response.status_code, response.headers,
+        "".join(parts), digest.hexdigest(), bytes_read, truncated,
+    )
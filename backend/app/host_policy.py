@@ -0,0 +1,317 @@
+"""
+Host Policy - Per-host adaptive timeouts, concurrency caps, retry budgets and circuit breakers for outgoing fetches
+
+Page, robots.txt, llms.txt and sitemap fetches all go through the policy of
+their host (netloc). From a window of the host's recent response times the
+policy:
+
+- times a request out at FETCH_TIMEOUT_FACTOR x the host's p95, kept between
+  FETCH_TIMEOUT_MIN and the fetch's fixed timeout, so a host that normally
+  answers in 200 ms cannot hold a slot for 15 s when it hangs;
+- runs at most FETCH_HOST_CONCURRENCY requests to the host at once; an
+  interactive request that waits FETCH_HOST_QUEUE_TIMEOUT for a slot fails
+  with HostUnavailable, while bulk, crawl and job fetches (see
+  queue_for_slots) wait as long as it takes;
+- retries failed connections from a per-host budget that grows by
+  FETCH_RETRY_BUDGET per request, so retries add at most that share of load;
+- opens the host's circuit after FETCH_BREAKER_FAILURES consecutive failures
+  (network errors, timeouts, 502/503/504): requests then fail at once for
+  FETCH_BREAKER_COOLDOWN seconds, after which a single probe with the full
+  timeout decides whether the host is back.
+
+A slow origin therefore ties up at most its own slots, and only until its
+timeouts or its circuit cut it off. State is per server process.
+"""
+import asyncio
+import math
+import random
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+from app import config
+from app.metrics import HOST_EVENTS
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Failures worth another attempt: the request most likely never reached the application.
+# A read timeout is not retried - the host is slow, not gone, and a retry would double its load.
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadError, httpx.RemoteProtocolError)
+
+# Responses that count as the host failing (overloaded, or down behind a proxy)
+FAILURE_STATUSES = frozenset({502, 503, 504})
+
+# Response times kept per host, and how many are needed before timeouts adapt
+LATENCY_WINDOW = 100
+MIN_SAMPLES = 10
+
+# Seconds before the first retry (doubling, with jitter)
+RETRY_BACKOFF = 0.2
+
+# Retry tokens a new host starts with, and the most it can save up
+RETRY_TOKENS_START = 2.0
+RETRY_TOKENS_MAX = 10.0
+
+# True in tasks doing queued work, whose fetches wait for a host slot without the queue timeout
+_queued_work: ContextVar[bool] = ContextVar("queued_work", default=False)
+
+
+def queue_for_slots() -> None:
+    """
+    Let fetches from the current task, and from tasks it starts, wait for host
+    slots for as long as it takes. Called at the top of bulk, crawl and job
+    worker tasks: their backlog should queue behind a busy host, not fail.
+    """
+    _queued_work.set(True)
+
+
+class HostUnavailable(Exception):
+    """A fetch refused before it was sent: the host's circuit is open or its slots stayed full"""
+
+    def __init__(self, host: str, reason: str, retry_after: float):
+        super().__init__(f"{host} {reason}")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def is_host_failure(error: BaseException) -> bool:
+    """Whether an error says something about the host (not the URL, and not our own connection pool)"""
+    if isinstance(error, httpx.PoolTimeout):
+        return False
+    return isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError))
+
+
+class HostState:
+    """One host's latency window, slots, retry tokens and circuit"""
+    __slots__ = (
+        "host", "latencies", "slots", "active", "retry_tokens", "consecutive_failures", "circuit", "open_until",
+        "probing", "requests", "failures", "timeouts", "retries", "refused",
+    )
+
+    def __init__(self, host: str, concurrency: int):
+        self.host = host
+        self.latencies: "deque[float]" = deque(maxlen=LATENCY_WINDOW)
+        self.slots = asyncio.Semaphore(concurrency)
+        self.active = 0
+        self.retry_tokens = RETRY_TOKENS_START
+        self.consecutive_failures = 0
+        self.circuit = CLOSED
+        self.open_until = 0.0
+        self.probing = False
+        self.requests = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.refused = 0
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def timeout_for(self, default: float) -> float:
+        """Timeout for the next request; probes and hosts without enough history get the fixed one"""
+        p95 = self.p95()
+        if p95 is None or self.circuit != CLOSED:
+            return default
+        return min(default, max(config.FETCH_TIMEOUT_MIN, p95 * config.FETCH_TIMEOUT_FACTOR))
+
+    def admit(self) -> bool:
+        """Let a request through the circuit, raising HostUnavailable if it is open; True for the half-open probe"""
+        if self.circuit == OPEN:
+            remaining = self.open_until - time.monotonic()
+            if remaining > 0:
+                self.refused += 1
+                HOST_EVENTS.inc("refused")
+                raise HostUnavailable(self.host, f"is failing ({self.consecutive_failures} errors in a row), "
+                                                 f"not retrying for {remaining:.0f}s", remaining)
+            self.circuit = HALF_OPEN
+        if self.circuit == HALF_OPEN:
+            if self.probing:
+                self.refused += 1
+                HOST_EVENTS.inc("refused")
+                raise HostUnavailable(self.host, "is failing, waiting for a probe request", config.FETCH_BREAKER_COOLDOWN)
+            self.probing = True
+            return True
+        return False
+
+    def succeeded(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.consecutive_failures = 0
+        if self.circuit != CLOSED:
+            self.circuit = CLOSED
+            HOST_EVENTS.inc("closed")
+
+    def failed(self, elapsed: float, timed_out: bool) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        if timed_out:
+            self.timeouts += 1
+            HOST_EVENTS.inc("timeout")
+            # A lower bound on the real latency, so a host that got slower earns longer timeouts
+            self.latencies.append(elapsed)
+        if self.circuit == HALF_OPEN or (
+            self.circuit == CLOSED and self.consecutive_failures >= config.FETCH_BREAKER_FAILURES
+        ):
+            self.circuit = OPEN
+            self.open_until = time.monotonic() + config.FETCH_BREAKER_COOLDOWN
+            HOST_EVENTS.inc("opened")
+
+    def take_retry(self) -> bool:
+        """Spend a retry token if the circuit is still closed and the budget allows one"""
+        if self.circuit != CLOSED or self.retry_tokens < 1:
+            return False
+        self.retry_tokens -= 1
+        self.retries += 1
+        HOST_EVENTS.inc("retry")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "host": self.host,
+            "circuit": self.circuit,
+            "p95": round(p95, 3) if p95 is not None else None,
+            "active": self.active,
+            "requests": self.requests,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "refused": self.refused,
+        }
+
+
+class HostCall:
+    """One request's pass through its host's policy (handed out by HostPolicy.request)"""
+
+    def __init__(self, state: HostState, default_timeout: float):
+        self.state = state
+        self.timeout = state.timeout_for(default_timeout)
+        self.sent = False
+
+    async def send(self, send: Callable[[float], Awaitable[httpx.Response]]) -> httpx.Response:
+        """send(timeout), retrying failed connections while the host's budget allows"""
+        state = self.state
+        state.requests += 1
+        state.retry_tokens = min(RETRY_TOKENS_MAX, state.retry_tokens + config.FETCH_RETRY_BUDGET)
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                response = await send(self.timeout)
+            except httpx.HTTPError as e:
+                if not is_host_failure(e):
+                    raise
+                state.failed(time.monotonic() - started, isinstance(e, httpx.TimeoutException))
+                if (not isinstance(e, RETRYABLE_ERRORS) or attempt >= config.FETCH_MAX_RETRIES
+                        or not state.take_retry()):
+                    raise
+                attempt += 1
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.0))
+                continue
+            self.sent = True
+            # Time to the response headers (streamed bodies are read afterwards)
+            elapsed = time.monotonic() - started
+            if response.status_code in FAILURE_STATUSES:
+                state.failed(elapsed, False)
+            else:
+                state.succeeded(elapsed)
+            return response
+
+
+class HostPolicy:
+    """Host states by netloc, least recently used first; idle hosts beyond max_hosts are forgotten"""
+
+    def __init__(self, concurrency: int, queue_timeout: float, max_hosts: int):
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self.max_hosts = max_hosts
+        self._hosts: "OrderedDict[str, HostState]" = OrderedDict()
+
+    def host(self, url: str) -> HostState:
+        key = urlsplit(url).netloc.lower()
+        state = self._hosts.get(key)
+        if state is None:
+            state = self._hosts[key] = HostState(key, self.concurrency)
+            if len(self._hosts) > self.max_hosts:
+                # Hosts with requests in flight or an open circuit are kept
+                idle = next((name for name, other in self._hosts.items()
+                             if other.active == 0 and other.circuit == CLOSED), None)
+                if idle is not None:
+                    del self._hosts[idle]
+        else:
+            self._hosts.move_to_end(key)
+        return state
+
+    @asynccontextmanager
+    async def request(self, url: str, default_timeout: float) -> AsyncIterator[HostCall]:
+        """
+        Hold one of url's host slots for a request (and the body read that
+        follows it). Raises HostUnavailable without sending anything when the
+        host's circuit is open or, outside queued work, no slot frees up in time.
+        """
+        state = self.host(url)
+        probe = state.admit()
+        try:
+            await asyncio.wait_for(state.slots.acquire(), None if _queued_work.get() else self.queue_timeout)
+        except BaseException as e:
+            # Cancelled or timed out before a slot freed up: let the next request probe instead
+            if probe:
+                state.probing = False
+            if not isinstance(e, asyncio.TimeoutError):
+                raise
+            state.refused += 1
+            HOST_EVENTS.inc("busy")
+            raise HostUnavailable(state.host, f"already has {self.concurrency} requests in flight", self.queue_timeout)
+
+        call = HostCall(state, default_timeout)
+        state.active += 1
+        try:
+            yield call
+        except httpx.HTTPError as e:
+            # Errors while reading a body; errors from send() were counted there
+            if call.sent and is_host_failure(e):
+                state.failed(0.0, False)
+            raise
+        finally:
+            state.active -= 1
+            state.slots.release()
+            if probe:
+                state.probing = False
+
+    def clear(self) -> None:
+        self._hosts.clear()
+
+    def stats(self, limit: int = 20) -> Dict[str, Any]:
+        """Totals, plus the hosts with open circuits and the slowest ones"""
+        states = list(self._hosts.values())
+        troubled = sorted(
+            states, key=lambda s: (s.circuit == CLOSED, -(s.p95() or 0.0), -s.failures),
+        )
+        return {
+            "hosts": len(states),
+            "open": sum(1 for s in states if s.circuit != CLOSED),
+            "active": sum(s.active for s in states),
+            "requests": sum(s.requests for s in states),
+            "failures": sum(s.failures for s in states),
+            "timeouts": sum(s.timeouts for s in states),
+            "retries": sum(s.retries for s in states),
+            "refused": sum(s.refused for s in states),
+            "top": [s.stats() for s in troubled[:limit]],
+        }
+
+
+def retry_after(error: HostUnavailable) -> Dict[str, str]:
+    """Retry-After header for a refused request"""
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+
+
+host_policy = HostPolicy(
+    concurrency=max(1, config.FETCH_HOST_CONCURRENCY),
+    queue_timeout=config.FETCH_HOST_QUEUE_TIMEOUT,
+    max_hosts=config.FETCH_HOST_STATES,
+)
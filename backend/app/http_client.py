@@ -0,0 +1,63 @@
+"""
+HTTP Client - Application-lifetime connection pool shared by all fetches
+"""
+from typing import Optional
+from urllib.parse import urlsplit
+import httpx
+from app import config
+
+try:
+    import h2  # noqa: F401  (installed via httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+PAGE_TIMEOUT = 15.0
+SIDE_FILE_TIMEOUT = 10.0
+
+POOL_LIMITS = httpx.Limits(
+    max_connections=200,
+    max_keepalive_connections=50,
+    keepalive_expiry=30.0,
+)
+
+USER_AGENT = "InsightEngine/1.0 (+AI SEO Analyzer)"
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        transport = None
+        if config.HTTP_ARCHIVE_MODE != "off":
+            from app.replay import archive_transport
+
+            # Recorded bodies stop where the page fetch would stop reading anyway
+            transport = archive_transport(
+                config.HTTP_ARCHIVE_MODE, config.HTTP_ARCHIVE_PATH, config.HTTP_ARCHIVE_LATENCY_SCALE,
+                config.PAGE_MAX_BYTES,
+            )
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=POOL_LIMITS,
+            timeout=PAGE_TIMEOUT,
+            headers={"User-Agent": USER_AGENT},
+            transport=transport,
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client and its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def origin_of(url: str) -> str:
+    """scheme://host[:port] of a URL, where robots.txt and llms.txt live"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
@@ -0,0 +1,299 @@
+"""
+Analysis Jobs - SQLite-backed queue so clients submit a URL and poll or subscribe for the result
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from fastapi import HTTPException
+from app import config
+from app.host_policy import queue_for_slots
+from app.pipeline import run_analysis
+from app.results import AnalysisResult, dumps, loads
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+logger = logging.getLogger(__name__)
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """Jobs table shared by every worker (and every process) pointed at the same file"""
+
+    def __init__(self, path: str, max_queued: int):
+        self.path = path
+        self.max_queued = max_queued
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " id TEXT UNIQUE NOT NULL,"
+                " url TEXT NOT NULL,"
+                " options TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " claim TEXT,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL,"
+                " result TEXT,"
+                " error TEXT,"
+                " status_code INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, seq)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, url: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a job, or raise JobQueueFull when max_queued jobs are already waiting"""
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            # Hold the write lock from the count to the insert so concurrent submits cannot overshoot max_queued
+            conn.execute("BEGIN IMMEDIATE")
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+            if queued >= self.max_queued:
+                raise JobQueueFull()
+            conn.execute(
+                "INSERT INTO jobs (id, url, options, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, url, json.dumps(options), QUEUED, time.time()),
+            )
+        return self.get(job_id)
+
+    def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to running under owner and return it"""
+        token = f"{owner}:{uuid.uuid4().hex}"
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, claim = ?, started_at = ?"
+                " WHERE seq = (SELECT seq FROM jobs WHERE status = ? ORDER BY seq LIMIT 1)",
+                (RUNNING, token, time.time(), QUEUED),
+            )
+            row = conn.execute("SELECT id, url, options FROM jobs WHERE claim = ?", (token,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "url": row[1], "options": json.loads(row[2])}
+
+    def finish(self, job_id: str, result: AnalysisResult) -> None:
+        """Store the result packed (message codes, no text) until a client reads it"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ? WHERE id = ?",
+                (DONE, time.time(), dumps(result.pack()).decode(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str, status_code: int) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ?, status_code = ? WHERE id = ?",
+                (FAILED, time.time(), error, status_code, job_id),
+            )
+
+    def requeue(self, owner: Optional[str] = None, started_before: Optional[float] = None) -> int:
+        """Put running jobs back in the queue: one owner's, or any started before a cutoff"""
+        query = "UPDATE jobs SET status = ?, claim = NULL, started_at = NULL WHERE status = ?"
+        params: List[Any] = [QUEUED, RUNNING]
+        if owner is not None:
+            query += " AND claim LIKE ?"
+            params.append(f"{owner}:%")
+        if started_before is not None:
+            query += " AND started_at < ?"
+            params.append(started_before)
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount
+
+    def prune(self, older_than: float) -> int:
+        """Drop finished jobs (and their results) older than older_than seconds"""
+        with self._connect() as conn:
+            return conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED))}) AND finished_at < ?",
+                (*FINISHED, time.time() - older_than),
+            ).rowcount
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT seq, url, status, created_at, started_at, finished_at, result, error, status_code"
+            " FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        seq, url, status, created_at, started_at, finished_at, result, error, status_code = row
+        job = {
+            "job_id": job_id,
+            "url": url,
+            "status": status,
+            "created_at": _iso(created_at),
+            "started_at": _iso(started_at),
+            "finished_at": _iso(finished_at),
+        }
+        if status == QUEUED:
+            job["position"] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND seq < ?", (QUEUED, seq)
+            ).fetchone()[0]
+        elif status == DONE:
+            stored = loads(result)
+            # Rows written before results were packed hold the response dict itself
+            job["result"] = AnalysisResult.unpack(stored).to_dict() if isinstance(stored, list) else stored
+        elif status == FAILED:
+            job["error"] = error
+            job["status_code"] = status_code
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict(self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)}
+
+
+class JobRunner:
+    """Background workers draining the queue, plus change notifications for subscribers"""
+
+    def __init__(self, queue: JobQueue, workers: int):
+        self.queue = queue
+        self.workers = workers
+        self.owner = uuid.uuid4().hex
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._watchers: Dict[str, Set[asyncio.Event]] = {}
+        self._last_prune = 0.0
+
+    def start(self) -> None:
+        # Jobs running far longer than any analysis can belong only to a server that died
+        self.queue.requeue(started_before=time.time() - config.JOB_STALE_AFTER)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs this server was running go back in the queue for whoever runs next
+        await asyncio.to_thread(self.queue.requeue, self.owner)
+
+    def _changed(self, job_id: str) -> None:
+        for event in self._watchers.get(job_id, ()):
+            event.set()
+
+    async def submit(self, url: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            job = await asyncio.to_thread(self.queue.submit, url, options)
+        except JobQueueFull:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Job queue is full ({self.queue.max_queued} waiting), retry later",
+                headers={"Retry-After": str(config.JOB_RETRY_AFTER)},
+            )
+        self._wakeup.set()
+        return job
+
+    async def _work(self) -> None:
+        queue_for_slots()
+        while True:
+            # Clear before claiming so a submit that lands after the claim still wakes us
+            self._wakeup.clear()
+            try:
+                job = await asyncio.to_thread(self.queue.claim, self.owner)
+                if job is None:
+                    await self._maybe_prune()
+                    try:
+                        # The timeout picks up jobs submitted by other processes sharing the file
+                        await asyncio.wait_for(self._wakeup.wait(), config.JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(job)
+            except Exception:
+                # A locked or unwritable queue file must not end the worker; a job left
+                # running is requeued on stop or once it is older than JOB_STALE_AFTER
+                logger.exception("Job worker failed on queue %s", self.queue.path)
+                await asyncio.sleep(config.JOB_POLL_INTERVAL)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        self._changed(job_id)
+        try:
+            result = await run_analysis(job["url"], include_timings=job["options"].get("include_timings", False))
+        except HTTPException as e:
+            await asyncio.to_thread(self.queue.fail, job_id, e.detail, e.status_code)
+        except Exception as e:
+            await asyncio.to_thread(self.queue.fail, job_id, f"Analysis failed: {str(e)}", 500)
+        else:
+            await asyncio.to_thread(self.queue.finish, job_id, result)
+        self._changed(job_id)
+
+    async def _maybe_prune(self) -> None:
+        now = time.monotonic()
+        if now - self._last_prune >= 60:
+            self._last_prune = now
+            await asyncio.to_thread(self.queue.prune, config.JOB_RETENTION)
+
+    async def watch(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job each time its status (or queue position) changes, until it finishes"""
+        event = asyncio.Event()
+        self._watchers.setdefault(job_id, set()).add(event)
+        last = None
+        try:
+            while True:
+                event.clear()
+                job = await asyncio.to_thread(self.queue.get, job_id)
+                if job is None:
+                    return
+                state = (job["status"], job.get("position"))
+                if state != last:
+                    last = state
+                    yield job
+                if job["status"] in FINISHED:
+                    return
+                try:
+                    await asyncio.wait_for(event.wait(), config.JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            watchers = self._watchers.get(job_id)
+            if watchers is not None:
+                watchers.discard(event)
+                if not watchers:
+                    del self._watchers[job_id]
+
+
+_runner: Optional[JobRunner] = None
+
+
+def get_job_runner() -> JobRunner:
+    """Return the job runner, creating its queue on first use"""
+    global _runner
+    if _runner is None:
+        _runner = JobRunner(JobQueue(config.JOB_QUEUE_PATH, config.JOB_QUEUE_MAX), config.JOB_WORKERS)
+    return _runner
+
+
+def start_job_workers() -> None:
+    if config.JOB_WORKERS > 0:
+        get_job_runner().start()
+
+
+async def stop_job_workers() -> None:
+    global _runner
+    if _runner is not None:
+        await _runner.stop()
+        _runner = None
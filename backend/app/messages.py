@@ -0,0 +1,113 @@
+"""
+Messages - Catalog of issue/recommendation texts that analyzer results reference by code
+
+Results carry a message as its code (an interned string shared by every
+result) or, when the text has values in it, as a (code, *args) tuple. The
+text is only produced by expand(), when a result is turned into an API
+response (see app/results.py).
+"""
+import sys
+from typing import Any, List, Sequence, Tuple, Union
+
+# A code, or (code, *format args)
+Message = Union[str, Tuple[Any, ...]]
+
+MESSAGES = {
+    # robots.txt
+    "robots.missing": "No robots.txt file found (all bots allowed by default)",
+    "robots.create": "Create a robots.txt file to explicitly control crawler access",
+    "robots.add_ai_rules": "Consider adding specific rules for AI bots",
+    "robots.bots_blocked": "{0} AI bot(s) blocked: {1}",
+    "robots.allow_bots": "Consider allowing {0} for better AI visibility",
+    "robots.wildcard_blocks_all": "Wildcard rule blocks all crawlers by default",
+    "robots.add_allow_rules": "Add explicit Allow rules for AI bots you want to permit",
+    "robots.all_allowed": "All AI bots are allowed - great for visibility!",
+    "robots.fetch_failed": "Could not fetch robots.txt: {0}",
+    "robots.make_accessible": "Ensure your robots.txt is publicly accessible",
+    # Structured data
+    "schema.blocks_skipped": "{0} JSON-LD block(s) over the size limit were not analyzed",
+    "schema.missing": "No JSON-LD structured data found on the page",
+    "schema.add_json_ld": "Add JSON-LD structured data to help AI understand your content",
+    "schema.add_types": "Consider adding Article, FAQPage, or Organization schema",
+    "schema.validate": "Use Google's Structured Data Testing Tool to validate",
+    "schema.faq_found": "✓ FAQPage schema found - excellent for AI answers!",
+    "schema.add_faq": "Consider adding FAQPage schema for Q&A content",
+    "schema.article_found": "✓ Article schema found - helps AI understand your content",
+    "schema.organization_found": "✓ Organization/Person schema found - supports E-E-A-T signals",
+    "schema.add_organization": "Add Organization or Person schema for credibility",
+    "schema.invalid": "{0} schema(s) may be missing required properties",
+    "schema.complete_properties": "Review and complete required properties in your schemas",
+    # Content structure
+    "content.h1_missing": "No H1 heading found",
+    "content.add_h1": "Add a clear H1 heading that describes the page content",
+    "content.h1_multiple": "Multiple H1 tags found ({0}) - should have only one",
+    "content.single_h1": "Use only one H1 per page for clarity",
+    "content.h1_ok": "✓ Single H1 heading present",
+    "content.few_headings": "Limited heading structure",
+    "content.add_headings": "Use more headings (H2, H3) to organize content hierarchically",
+    "content.headings_ok": "✓ Good heading structure ({0} headings)",
+    "content.faq_found": "✓ FAQ/Q&A section detected",
+    "content.add_faq": "Consider adding an FAQ section - very valuable for AI answers",
+    "content.answer_first": "✓ Answer-first content pattern detected",
+    "content.add_answer_first": "Start with a clear, direct answer in the first paragraph",
+    "content.words_low": "Low word count ({0} words)",
+    "content.add_words": "Add more comprehensive content (aim for 500+ words)",
+    "content.words_moderate": "Moderate word count ({0} words)",
+    "content.words_ok": "✓ Good content depth ({0} words)",
+    # Technical SEO
+    "technical.title_short": "Title tag is short ({0} chars)",
+    "technical.expand_title": "Expand title to 50-60 characters for better visibility",
+    "technical.title_long": "Title tag may be truncated ({0} chars)",
+    "technical.title_ok": "✓ Good title length",
+    "technical.title_missing": "Missing title tag",
+    "technical.add_title": "Add a descriptive title tag",
+    "technical.description_short": "Meta description is short ({0} chars)",
+    "technical.expand_description": "Expand meta description to 150-160 characters",
+    "technical.description_long": "Meta description may be truncated ({0} chars)",
+    "technical.description_ok": "✓ Good meta description length",
+    "technical.description_missing": "Missing meta description",
+    "technical.add_description": "Add a compelling meta description",
+    "technical.canonical_ok": "✓ Canonical URL present",
+    "technical.add_canonical": "Add a canonical URL to prevent duplicate content issues",
+    "technical.open_graph_ok": "✓ Open Graph tags present",
+    "technical.add_open_graph": "Add Open Graph meta tags for better social sharing",
+    "technical.twitter_ok": "✓ Twitter Card meta present",
+    "technical.add_twitter": "Add Twitter Card meta tags",
+    "technical.ssr": "✓ Content appears server-rendered (good for AI crawlers)",
+    "technical.csr": "Page may be client-rendered (limited text in initial HTML)",
+    "technical.add_ssr": "Consider server-side rendering for better AI accessibility",
+    # llms.txt
+    "llms.missing": "No llms.txt file found",
+    "llms.add": "Consider adding an llms.txt file to guide AI assistants",
+    "llms.standard": "llms.txt is an emerging standard for AI crawler instructions",
+    "llms.include": "Include: site purpose, key content areas, preferred citation format",
+    "llms.found": "✓ llms.txt file found!",
+    "llms.minimal": "llms.txt content is minimal",
+    "llms.expand": "Expand llms.txt with more details about your site",
+    "llms.substantial": "✓ llms.txt has substantial content",
+    "llms.has_description": "✓ Includes site description",
+    "llms.has_attribution": "✓ Includes attribution info",
+    "llms.status": "llms.txt returned status {0}",
+    "llms.make_accessible": "Ensure llms.txt is publicly accessible",
+    "llms.fetch_failed": "Could not check llms.txt: {0}",
+    "llms.consider": "Consider adding an llms.txt file",
+}
+
+
+def intern_message(message: Any) -> Message:
+    """A message read back from storage (JSON turns tuples into lists), with its code interned"""
+    if isinstance(message, str):
+        return sys.intern(message)
+    return (sys.intern(message[0]), *message[1:])
+
+
+def expand(message: Message) -> str:
+    """Text of a message; unknown codes come out as themselves"""
+    if isinstance(message, str):
+        return MESSAGES.get(message, message)
+    template = MESSAGES.get(message[0])
+    return template.format(*message[1:]) if template is not None else str(message[0])
+
+
+def expand_all(messages: Sequence[Message]) -> List[str]:
+    return [expand(message) for message in messages]
@@ -0,0 +1,119 @@
+"""
+Metrics - Per-stage timing histograms in Prometheus text format
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(9))  # 1 KB .. 64 MB
+ELEMENT_BUCKETS = (100, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one label, exposed like prometheus_client's"""
+
+    def __init__(self, name: str, description: str, label: str, buckets: Sequence[float]):
+        self.name = name
+        self.description = description
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, label_value: str, value: float) -> None:
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for label_value, (counts, total) in sorted(self._series.items()):
+            label = f'{self.label}="{label_value}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound:g}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total[0]:.6f}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, description: str, label: str):
+        self.name = name
+        self.description = description
+        self.label = label
+        self._values: Dict[str, float] = {}
+
+    def inc(self, label_value: str, amount: float = 1) -> None:
+        self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for label_value, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value:g}')
+        return lines
+
+
+STAGE_SECONDS = Histogram("insightengine_stage_seconds", "Wall time per analysis stage", "stage", SECONDS_BUCKETS)
+STAGE_CPU_SECONDS = Histogram("insightengine_stage_cpu_seconds", "CPU time per synchronous analysis stage", "stage", SECONDS_BUCKETS)
+FETCH_BYTES = Histogram("insightengine_fetch_bytes", "Body bytes read per fetch", "resource", BYTES_BUCKETS)
+PARSE_ELEMENTS = Histogram("insightengine_parse_elements", "Elements seen while parsing a page", "parser", ELEMENT_BUCKETS)
+ANALYSES = Counter("insightengine_analyses_total", "Completed /api/analyze runs by outcome", "outcome")
+HOST_EVENTS = Counter("insightengine_host_events_total", "Fetch policy retries, timeouts, refusals and circuit changes", "event")
+
+REGISTRY = [STAGE_SECONDS, STAGE_CPU_SECONDS, FETCH_BYTES, PARSE_ELEMENTS, ANALYSES, HOST_EVENTS]
+
+
+class StageTimings:
+    """Wall/CPU time per stage for one analysis, recorded into the histograms on demand"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str, cpu: bool = True) -> Iterator[Dict[str, float]]:
+        """Time a block; cpu=False for async stages where thread CPU time is meaningless"""
+        record: Dict[str, float] = {}
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time() if cpu else None
+        try:
+            yield record
+        finally:
+            record["wall_ms"] = round((time.perf_counter() - wall_start) * 1000, 3)
+            if cpu_start is not None:
+                record["cpu_ms"] = round((time.thread_time() - cpu_start) * 1000, 3)
+            self.stages[name] = record
+
+    def merge(self, stages: Optional[Dict[str, Dict[str, float]]]) -> None:
+        for name, record in (stages or {}).items():
+            self.stages[name] = record
+
+    def observe(self) -> None:
+        """Feed every stage into the Prometheus histograms"""
+        for name, record in self.stages.items():
+            if "wall_ms" in record:
+                STAGE_SECONDS.observe(name, record["wall_ms"] / 1000)
+            if "cpu_ms" in record:
+                STAGE_CPU_SECONDS.observe(name, record["cpu_ms"] / 1000)
+            if "bytes" in record:
+                FETCH_BYTES.observe(name, record["bytes"])
+            if "elements" in record:
+                PARSE_ELEMENTS.observe(name, record["elements"])
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,162 @@
+"""
+Analysis Pipeline - Fetch a URL and run every analyzer on it
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urljoin
+import httpx
+from fastapi import HTTPException
+from app import config
+from app.analyzers.robots_analyzer import analyze_robots_txt
+from app.analyzers.llms_txt_analyzer import analyze_llms_txt
+from app.executor import run_page_analysis
+from app.feature_store import record_result
+from app.fetch import fetch_page
+from app.host_policy import HostUnavailable, retry_after
+from app.http_client import get_client, origin_of
+from app.metrics import ANALYSES, StageTimings
+from app.render import check_rendering
+from app.results import AnalysisResult, CategoryResult
+from app.result_cache import page_freshness, result_cache
+from app.scoring import overall_score
+
+
+async def _timed(timings: StageTimings, stage: str, coro):
+    with timings.stage(stage, cpu=False):
+        return await coro
+
+
+async def fetch_side_files(origin: str, client: Optional[httpx.AsyncClient] = None) -> Tuple[CategoryResult, CategoryResult, StageTimings]:
+    """Analyze robots.txt and llms.txt for an origin concurrently"""
+    timings = StageTimings()
+    robots, llms_txt = await asyncio.gather(
+        _timed(timings, "fetch_robots", analyze_robots_txt(origin, client)),
+        _timed(timings, "fetch_llms_txt", analyze_llms_txt(origin, client)),
+    )
+    return robots, llms_txt, timings
+
+
+def page_links(page_url: str, page: Dict[str, Any]) -> List[str]:
+    """Absolute URLs of a page's followable <a href> links, honouring <base href>"""
+    base = urljoin(page_url, page.get("base_href") or "")
+    links = []
+    for href in page.get("links", []):
+        href = href.strip()
+        if href and not href.startswith("#"):
+            links.append(urljoin(base, href))
+    return links
+
+
+async def run_analysis(url: str, side_files: Optional["asyncio.Future"] = None, include_timings: bool = False,
+                       include_links: bool = False) -> AnalysisResult:
+    """Analyze one URL; side_files may be a shared fetch_side_files task for its origin"""
+    timings = StageTimings()
+    with timings.stage("total", cpu=False):
+        result = await _analyze(url, side_files, timings, include_links)
+
+    timings.observe()
+    ANALYSES.inc("ok")
+    record_result(result)
+    if include_timings:
+        result.timings = timings.stages
+    return result
+
+
+async def _load_page(client: httpx.AsyncClient, url: str, timings: StageTimings) -> Tuple[Dict[str, Any], str, bool]:
+    """
+    Page categories (schema, content, technical) for url, plus its final URL and truncation flag.
+
+    They are cached with the hash of the body they were computed from and only
+    recomputed when that changes: inside the page's own max-age no request is
+    made, a 304 or an identical body reuses them as they are.
+    """
+    with timings.stage("cache_lookup", cpu=False):
+        cached = await result_cache.get(url)
+    if cached is not None and cached["fresh_until"] > time.time():
+        result_cache.fresh_hits += 1
+        return cached["page"], cached["final_url"], cached["truncated"]
+
+    # A previous result lets the server answer 304 instead of resending the page
+    headers = {}
+    if cached is not None:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        # Fetch the page HTML (streamed and capped at PAGE_MAX_BYTES)
+        with timings.stage("fetch_page", cpu=False) as record:
+            fetched = await fetch_page(client, url, headers)
+            record["bytes"] = fetched.bytes_read
+    except Exception as e:
+        ANALYSES.inc("fetch_error")
+        if isinstance(e, HTTPException):
+            raise
+        if isinstance(e, HostUnavailable):
+            # Refused without a request: the origin is failing or saturated, not the URL
+            raise HTTPException(status_code=503, detail=f"Could not fetch URL: {e}", headers=retry_after(e))
+        raise HTTPException(status_code=400, detail=f"Could not fetch URL: {str(e)}")
+
+    if cached is not None and fetched.status_code == 304:
+        result_cache.not_modified_hits += 1
+        page, digest, truncated = cached["page"], cached["body_hash"], cached["truncated"]
+        etag = fetched.headers.get("etag") or cached["etag"]
+        last_modified = fetched.headers.get("last-modified") or cached["last_modified"]
+    else:
+        if cached is not None and cached["body_hash"] == fetched.body_hash:
+            result_cache.body_hits += 1
+            page = cached["page"]
+        else:
+            # Run the page analyzers (parsing happens in the analyzer pool)
+            result_cache.misses += 1
+            with timings.stage("analyze_page", cpu=False):
+                page = await run_page_analysis(fetched.text)
+            timings.merge(page.pop("timings", None))
+            if config.RENDER_CHECK != "off":
+                # Before the result is cached, so an unchanged body is never rendered again
+                with timings.stage("render_check", cpu=False):
+                    page["technical"] = await check_rendering(url, fetched.body_hash, fetched.text, page["technical"])
+        digest, truncated = fetched.body_hash, fetched.truncated
+        etag, last_modified = fetched.headers.get("etag"), fetched.headers.get("last-modified")
+
+    await result_cache.set(url, digest, etag, last_modified, page, fetched.url, truncated, page_freshness(fetched.headers))
+    return page, fetched.url, truncated
+
+
+async def _analyze(url: str, side_files: Optional["asyncio.Future"], timings: StageTimings,
+                   include_links: bool) -> AnalysisResult:
+    client = get_client()
+
+    # robots.txt and llms.txt live at the origin, so fetch them alongside the page
+    owns_side_files = side_files is None
+    if owns_side_files:
+        side_files = asyncio.create_task(fetch_side_files(origin_of(url), client))
+
+    try:
+        page, final_url, truncated = await _load_page(client, url, timings)
+    except BaseException:
+        if owns_side_files:
+            side_files.cancel()
+        raise
+
+    robots, llms_txt, side_timings = await (side_files if owns_side_files else asyncio.shield(side_files))
+    if owns_side_files:
+        # A shared side-file fetch is timed once, not once per page that used it
+        timings.merge(side_timings.stages)
+
+    categories = {
+        "robots": robots,
+        "schema": page["schema"],
+        "content": page["content"],
+        "technical": page["technical"],
+        "llms_txt": llms_txt
+    }
+
+    result = AnalysisResult(url, datetime.utcnow().isoformat(), overall_score(categories), truncated, categories)
+    if include_links:
+        # Relative links resolve against where the page ended up after redirects
+        result.links = page_links(final_url, page)
+    return result
@@ -0,0 +1,249 @@
+"""
+Render Check - Second opinion on is_ssr from a headless browser, for pages the raw-HTML heuristic can't call
+
+analyze_technical decides is_ssr from how much visible text the raw HTML
+has. That is clear-cut for near-empty app shells and long articles, but not
+for pages in between or pages that ship their content as hydration data
+(__NEXT_DATA__, window.__NUXT__, ...). With RENDER_CHECK=uncertain those pages
+are loaded in a pooled headless Chromium (Playwright) and the visible text of
+the rendered DOM is compared with the raw HTML's: if most of it was already
+there, the page is server-rendered.
+
+Renders are bounded by a fixed number of concurrent pages, a wait limit for a
+free page and a time limit per render; a page that can't get a render in time
+keeps the heuristic verdict. Outcomes are cached per URL and body hash, and
+because they are folded into the technical result before it is cached, an
+unchanged page is never rendered twice.
+"""
+import asyncio
+import importlib.util
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from app import config
+from app.results import CategoryResult
+from app.scoring import score_category
+
+RENDER_MODES = ["off", "uncertain"]
+
+# Raw text lengths outside this band are taken at face value (unless hydration data is present)
+UNCERTAIN_TEXT_RANGE = (200, 2000)
+
+# Pages with at least this much raw text are server-rendered whatever else they carry
+CERTAIN_TEXT_LENGTH = 5000
+
+# Server-rendered when the raw HTML has at least this share of the rendered page's text
+SSR_TEXT_RATIO = 0.5
+
+# Framework hydration payloads and empty mount points of client-rendered apps
+HYDRATION_MARKERS = re.compile(
+    r"""id=["']?__NEXT_DATA__|window\.__(?:NUXT|INITIAL_STATE|APOLLO_STATE|PRELOADED_STATE)__"""
+    r"""|window\.__remixContext|data-reactroot|ng-version=|<app-root"""
+    r"""|<div\s+id=["']?(?:root|app|__next|__nuxt)["']?\s*>\s*</div>""",
+    re.IGNORECASE,
+)
+
+# Same measure as ParsedDocument.text_length: stripped text nodes outside script/style
+RENDERED_TEXT_LENGTH = """() => {
+    const skip = new Set(["SCRIPT", "STYLE", "NOSCRIPT", "TEMPLATE"]);
+    const root = document.body || document.documentElement;
+    if (!root) return 0;
+    const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+    let total = 0;
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        const parent = node.parentElement;
+        if (!parent || !skip.has(parent.tagName)) total += node.data.trim().length;
+    }
+    return total;
+}"""
+
+# Requests a render doesn't need: the text is the same without them
+SKIPPED_RESOURCES = {"image", "media", "font", "stylesheet"}
+
+
+def is_uncertain(html: str, technical: CategoryResult) -> bool:
+    """Whether the text-length heuristic's is_ssr for this page is worth checking in a browser"""
+    text_length = technical.details.get("text_length", 0)
+    if text_length >= CERTAIN_TEXT_LENGTH:
+        return False
+    low, high = UNCERTAIN_TEXT_RANGE
+    return low <= text_length <= high or HYDRATION_MARKERS.search(html) is not None
+
+
+def apply_render(technical: CategoryResult, render: Dict[str, Any]) -> CategoryResult:
+    """A copy of a technical result with is_ssr, its findings and the score taken from a render"""
+    from app.analyzers.technical_analyzer import ssr_findings  # analyzers load lazily (see executor.PAGE_ANALYZERS)
+
+    was_ssr, is_ssr = technical.details["is_ssr"], render["is_ssr"]
+    old_issue, old_recommendation = ssr_findings(was_ssr)
+    issue, recommendation = ssr_findings(is_ssr)
+    features = {**technical.features, "is_ssr": is_ssr}
+    recommendations = [r for r in technical.recommendations if r != old_recommendation]
+    if recommendation:
+        recommendations.append(recommendation)
+    return CategoryResult(
+        score_category("technical", features),
+        features,
+        [issue if message == old_issue else message for message in technical.issues],
+        recommendations,
+        {**technical.details, "is_ssr": is_ssr, "render": render},
+    )
+
+
+def require_playwright() -> None:
+    """Fail fast when rendering is enabled without the browser driver"""
+    if importlib.util.find_spec("playwright") is None:
+        raise RuntimeError(
+            "RENDER_CHECK is enabled but playwright is not installed "
+            "(pip install playwright && playwright install chromium)"
+        )
+
+
+async def _skip_heavy(route) -> None:
+    if route.request.resource_type in SKIPPED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class RenderPool:
+    """
+    One headless Chromium (launched on first use) rendering at most `size`
+    pages at a time, each in a fresh context, with a per-URL/body-hash LRU of
+    outcomes and coalescing of concurrent renders of the same page.
+    """
+
+    def __init__(self, size: int, timeout: float, queue_timeout: float, cache_size: int):
+        self.size = size
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.cache_size = cache_size
+        self._slots = asyncio.Semaphore(size)
+        self._launching = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self._cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.renders = 0
+        self.cached = 0
+        self.busy = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    async def _get_browser(self):
+        async with self._launching:
+            if self._browser is None or not self._browser.is_connected():
+                from playwright.async_api import async_playwright
+
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch()
+        return self._browser
+
+    async def rendered_text_length(self, url: str) -> int:
+        """Visible text length of url after its scripts ran (network idle or the time limit)"""
+        browser = await self._get_browser()
+        context = await browser.new_context()
+        try:
+            page = await context.new_page()
+            await page.route("**/*", _skip_heavy)
+            await page.goto(url, wait_until="networkidle", timeout=self.timeout * 1000)
+            return await page.evaluate(RENDERED_TEXT_LENGTH)
+        finally:
+            await context.close()
+
+    async def check(self, url: str, digest: str, raw_text_length: int) -> Optional[Dict[str, Any]]:
+        """Render outcome for a page body, or None when no render fit in the budget"""
+        key = (url, digest)
+        render = self._cache.get(key)
+        if render is not None:
+            self._cache.move_to_end(key)
+            self.cached += 1
+            return render
+
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._render(url, key, raw_text_length))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda done: self._inflight.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def _render(self, url: str, key: Tuple[str, str], raw_text_length: int) -> Optional[Dict[str, Any]]:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.busy += 1
+            return None
+        try:
+            rendered = await asyncio.wait_for(self.rendered_text_length(url), self.timeout)
+        except Exception as e:
+            # The heuristic verdict stands; a failed render is not cached so a later request can retry
+            self.failures += 1
+            self.last_error = f"{url}: {e!r}"
+            return None
+        finally:
+            self._slots.release()
+
+        self.renders += 1
+        render = {
+            "is_ssr": raw_text_length >= SSR_TEXT_RATIO * rendered,
+            "raw_text_length": raw_text_length,
+            "rendered_text_length": rendered,
+        }
+        self._cache[key] = render
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return render
+
+    async def close(self) -> None:
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._cache),
+            "renders": self.renders,
+            "cached": self.cached,
+            "busy": self.busy,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+_pool: Optional[RenderPool] = None
+
+
+def get_render_pool() -> Optional[RenderPool]:
+    """The render pool when RENDER_CHECK is on (None when off)"""
+    global _pool
+    if config.RENDER_CHECK not in RENDER_MODES:
+        raise ValueError(f"RENDER_CHECK must be one of {', '.join(RENDER_MODES)}, got {config.RENDER_CHECK!r}")
+    if config.RENDER_CHECK == "off":
+        return None
+    if _pool is None:
+        require_playwright()
+        _pool = RenderPool(
+            max(1, config.RENDER_CONCURRENCY), config.RENDER_TIMEOUT, config.RENDER_QUEUE_TIMEOUT,
+            config.RENDER_CACHE_SIZE,
+        )
+    return _pool
+
+
+async def close_render_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def check_rendering(url: str, digest: str, html: str, technical: CategoryResult) -> CategoryResult:
+    """The technical result, corrected by a render when the heuristic is uncertain and a render fits the budget"""
+    pool = get_render_pool()
+    if pool is None or not is_uncertain(html, technical):
+        return technical
+    render = await pool.check(url, digest, technical.details.get("text_length", 0))
+    return technical if render is None else apply_render(technical, render)
@@ -0,0 +1,371 @@
+"""
+HTTP Archive - Record every response the shared client receives, or replay them offline from a memory-mapped file
+
+With HTTP_ARCHIVE_MODE=record the shared client's transport saves each
+response (status, headers, raw body and time to headers) and each connection
+failure to HTTP_ARCHIVE_PATH while passing it on. With
+HTTP_ARCHIVE_MODE=replay nothing touches the network: requests are answered
+from the archive, so pages, robots.txt and llms.txt files captured once can be
+analyzed thousands of times at local-disk speed. HTTP_ARCHIVE_LATENCY_SCALE
+replays the recorded response times too (1.0 = as recorded, 0 = instant),
+including timeouts against the request's own timeout, which makes a
+production slowdown reproducible on a laptop.
+
+The archive is one append-only file:
+
+    b"IEHTTPA1"
+    record*  = header (RECORD) | key "METHOD URL" | meta (JSON) | body
+
+Bodies are stored as received (still Content-Encoded) and zlib-compressed
+when that makes them smaller. They are passed through to the client as they
+arrive, so the page fetch's own size cap and content-type check still apply,
+and recorded up to max_body bytes (PAGE_MAX_BYTES). A response is archived
+when the client closes it: with only the part that was read (TRUNCATED) if
+the client stopped early, and with the error if the connection failed
+mid-body, which replay raises at the same point. Replay maps the file and
+indexes it by scanning the record headers only; the latest record of a URL
+wins. A record cut short by a crash ends the archive. Record from one process
+at a time.
+"""
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import httpx
+from app.http_client import HTTP2_AVAILABLE, POOL_LIMITS
+
+ARCHIVE_MODES = ["off", "record", "replay"]
+
+MAGIC = b"IEHTTPA1"
+
+# flags, status, key length, meta length, body length, seconds to headers, recorded at (unix time)
+RECORD = struct.Struct("<BHIIIdd")
+
+COMPRESSED = 1  # body is zlib-compressed
+FAILED = 2  # a connection failure (status 0) or one while reading the body; meta holds the httpx error class and message
+TRUNCATED = 4  # body is a prefix: the client stopped reading, or it passed max_body
+
+# Bodies smaller than this are stored as they are
+COMPRESS_MIN_BYTES = 512
+
+# Response extensions worth keeping (the rest describe the live connection)
+KEPT_EXTENSIONS = ("http_version", "reason_phrase")
+
+
+class NotRecorded(httpx.TransportError):
+    """Replay of a request the archive has no response for (not a network failure, so never retried)"""
+
+
+def archive_key(request: httpx.Request) -> str:
+    return f"{request.method} {request.url}"
+
+
+def encode_record(key: str, status: int, meta: Any, body: bytes, elapsed: float, flags: int = 0) -> bytes:
+    if len(body) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(body, 6)
+        if len(packed) < len(body):
+            body, flags = packed, flags | COMPRESSED
+    key_bytes = key.encode("utf-8")
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    return RECORD.pack(flags, status, len(key_bytes), len(meta_bytes), len(body), elapsed, time.time()) \
+        + key_bytes + meta_bytes + body
+
+
+class ArchiveWriter:
+    """Appends records to an archive file, one write per record"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        if os.fstat(self._fd).st_size == 0:
+            os.write(self._fd, MAGIC)
+        self.records = 0
+
+    def append(self, record: bytes) -> None:
+        os.write(self._fd, record)
+        self.records += 1
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class ArchiveReader:
+    """A memory-mapped archive and its index of the latest record per key"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < len(MAGIC):
+                raise ValueError(f"{path} is not an HTTP archive (empty)")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not an HTTP archive")
+        self.index: Dict[str, int] = {}
+        self.records = 0
+        self.end = self._scan()
+
+    def _scan(self) -> int:
+        """Index every complete record; returns where the complete records end"""
+        data, offset, size = self._map, len(MAGIC), len(self._map)
+        while offset + RECORD.size <= size:
+            _, _, key_length, meta_length, body_length, _, _ = RECORD.unpack_from(data, offset)
+            end = offset + RECORD.size + key_length + meta_length + body_length
+            if end > size:
+                break
+            key_start = offset + RECORD.size
+            self.index[data[key_start:key_start + key_length].decode("utf-8")] = offset
+            self.records += 1
+            offset = end
+        return offset
+
+    def read(self, offset: int) -> Tuple[int, int, Any, bytes, float]:
+        """(flags, status, meta, body, seconds to headers) of the record at offset"""
+        flags, status, key_length, meta_length, body_length, elapsed, _ = RECORD.unpack_from(self._map, offset)
+        meta_start = offset + RECORD.size + key_length
+        body_start = meta_start + meta_length
+        meta = json.loads(self._map[meta_start:body_start])
+        body = self._map[body_start:body_start + body_length]
+        if flags & COMPRESSED:
+            body = zlib.decompress(body)
+        return flags, status, meta, body, elapsed
+
+    def get(self, key: str) -> Optional[Tuple[int, int, Any, bytes, float]]:
+        offset = self.index.get(key)
+        return None if offset is None else self.read(offset)
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def error_meta(error: httpx.TransportError) -> Dict[str, str]:
+    return {"error": type(error).__name__, "message": str(error)}
+
+
+def recorded_error(meta: Dict[str, Any], request: httpx.Request) -> httpx.TransportError:
+    """The httpx error a FAILED record stands for"""
+    error = getattr(httpx, meta.get("error", ""), None)
+    if not (isinstance(error, type) and issubclass(error, httpx.TransportError)):
+        error = httpx.ConnectError
+    return error(meta.get("message", "Replayed failure"), request=request)
+
+
+class RecordingStream(httpx.AsyncByteStream):
+    """A response body passed through chunk by chunk; up to max_body bytes of it are archived on close"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, transport: "RecordingTransport", request: httpx.Request,
+                 status: int, meta: Dict[str, Any], elapsed: float):
+        self.stream = stream
+        self.transport = transport
+        self.request = request
+        self.status = status
+        self.meta = meta
+        self.elapsed = elapsed
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._flags = 0
+        self._complete = False
+        self._archived = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        max_body = self.transport.max_body
+        try:
+            async for chunk in self.stream:
+                if not self._flags & TRUNCATED:
+                    if self._size + len(chunk) > max_body:
+                        chunk_kept = chunk[:max_body - self._size]
+                        self._flags |= TRUNCATED
+                    else:
+                        chunk_kept = chunk
+                    self._chunks.append(chunk_kept)
+                    self._size += len(chunk_kept)
+                yield chunk
+        except httpx.TransportError as e:
+            self._flags |= FAILED
+            self.meta.update(error_meta(e))
+            raise
+        self._complete = True
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            self._archive()
+
+    def _archive(self) -> None:
+        if self._archived:
+            return
+        self._archived = True
+        flags = self._flags
+        if not self._complete and not flags & FAILED:
+            # Closed before the end: the client only wanted a prefix (size cap, wrong content type, ...)
+            flags |= TRUNCATED
+        self.transport.writer.append(encode_record(
+            archive_key(self.request), self.status, self.meta, b"".join(self._chunks), self.elapsed, flags,
+        ))
+
+
+class ReplayStream(httpx.AsyncByteStream):
+    """A recorded body, followed by the error that cut it short when there was one"""
+
+    def __init__(self, body: bytes, error: Optional[httpx.TransportError] = None):
+        self.body = body
+        self.error = error
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        if self.body:
+            yield self.body
+        if self.error is not None:
+            raise self.error
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests to the network and archives what comes back (bodies up to max_body bytes)"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, writer: ArchiveWriter, max_body: int):
+        self.transport = transport
+        self.writer = writer
+        self.max_body = max_body
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.monotonic()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except httpx.TransportError as e:
+            self.writer.append(encode_record(
+                archive_key(request), 0, error_meta(e), b"", time.monotonic() - started, FAILED,
+            ))
+            raise
+        elapsed = time.monotonic() - started
+
+        headers = [[name.decode("latin-1"), value.decode("latin-1")] for name, value in response.headers.raw]
+        extensions = {name: value for name, value in response.extensions.items() if name in KEPT_EXTENSIONS}
+        meta = {"headers": headers, "extensions": {name: value.decode("latin-1") for name, value in extensions.items()}}
+        # The raw body: decoding (Content-Encoding) is left to the client, on replay as now
+        return httpx.Response(
+            response.status_code, headers=response.headers.raw, request=request, extensions=extensions,
+            stream=RecordingStream(response.stream, self, request, response.status_code, meta, elapsed),
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+        self.writer.close()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers requests from an archive; latency_scale > 0 also replays the recorded response times"""
+
+    def __init__(self, reader: ArchiveReader, latency_scale: float = 0.0):
+        self.reader = reader
+        self.latency_scale = latency_scale
+        self.hits = 0
+        self.misses = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        record = self.reader.get(archive_key(request))
+        if record is None:
+            self.misses += 1
+            raise NotRecorded(f"{request.method} {request.url} is not in the HTTP archive", request=request)
+        self.hits += 1
+        flags, status, meta, body, elapsed = record
+
+        if self.latency_scale > 0:
+            delay = elapsed * self.latency_scale
+            timeout = request.extensions.get("timeout", {})
+            limit = timeout.get("read") if status else timeout.get("connect")
+            if limit is not None and delay > limit:
+                await asyncio.sleep(limit)
+                raise (httpx.ReadTimeout if status else httpx.ConnectTimeout)("Replayed timeout", request=request)
+            await asyncio.sleep(delay)
+
+        if flags & FAILED and not status:
+            raise recorded_error(meta, request)
+
+        extensions = {name: value.encode("latin-1") for name, value in meta["extensions"].items()}
+        return httpx.Response(
+            status, headers=[(name, value) for name, value in meta["headers"]], request=request, extensions=extensions,
+            stream=ReplayStream(body, recorded_error(meta, request) if flags & FAILED else None),
+        )
+
+    async def aclose(self) -> None:
+        self.reader.close()
+
+
+def archive_transport(mode: str, path: str, latency_scale: float = 0.0,
+                      max_body: int = 5 * 1024 * 1024) -> Optional[httpx.AsyncBaseTransport]:
+    """The shared client's transport for an HTTP_ARCHIVE_MODE (None when off)"""
+    if mode not in ARCHIVE_MODES:
+        raise ValueError(f"HTTP_ARCHIVE_MODE must be one of {', '.join(ARCHIVE_MODES)}, got {mode!r}")
+    if mode == "off":
+        return None
+    if not path:
+        raise ValueError(f"HTTP_ARCHIVE_MODE={mode} needs HTTP_ARCHIVE_PATH")
+    if mode == "record":
+        network = httpx.AsyncHTTPTransport(http2=HTTP2_AVAILABLE, limits=POOL_LIMITS)
+        return RecordingTransport(network, ArchiveWriter(path), max_body)
+    return ReplayTransport(ArchiveReader(path), latency_scale)
+
+
+def page_urls(reader: ArchiveReader) -> List[str]:
+    """URLs of the archive's successful HTML responses, side files excluded"""
+    pages = []
+    for key, offset in reader.index.items():
+        url = key.split(" ", 1)[1]
+        flags, status, meta, _, _ = reader.read(offset)
+        content_type = next((v for k, v in meta.get("headers", []) if k.lower() == "content-type"), "")
+        if flags & FAILED or status != 200 or url.endswith(("/robots.txt", "/llms.txt")) \
+                or "html" not in content_type.lower():
+            continue
+        pages.append(url)
+    return pages
+
+
+def summarize(reader: ArchiveReader) -> Dict[str, Any]:
+    """Counts and sizes of an archive's latest records"""
+    statuses: Dict[str, int] = {}
+    hosts = set()
+    body_bytes = truncated = 0
+    for key, offset in reader.index.items():
+        flags, status, _, body, _ = reader.read(offset)
+        label = "error" if flags & FAILED else str(status)
+        statuses[label] = statuses.get(label, 0) + 1
+        truncated += bool(flags & TRUNCATED)
+        hosts.add(httpx.URL(key.split(" ", 1)[1]).host)
+        body_bytes += len(body)
+    return {
+        "path": reader.path,
+        "records": reader.records,
+        "urls": len(reader.index),
+        "hosts": len(hosts),
+        "statuses": statuses,
+        "truncated": truncated,
+        "body_bytes": body_bytes,
+        "file_bytes": reader.end,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect an HTTP archive written with HTTP_ARCHIVE_MODE=record")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="record, URL and host counts, statuses and sizes")
+    info.add_argument("path")
+    urls = commands.add_parser("urls", help="recorded URLs, one per line")
+    urls.add_argument("path")
+    urls.add_argument("--pages", action="store_true", help="only successful HTML responses other than side files")
+    args = parser.parse_args()
+
+    archive = ArchiveReader(args.path)
+    if args.command == "info":
+        print(json.dumps(summarize(archive), indent=2))
+    else:
+        for url in page_urls(archive) if args.pages else [key.split(" ", 1)[1] for key in archive.index]:
+            print(url)
@@ -0,0 +1,246 @@
+"""
+Result Cache - Page analysis results keyed by URL and body hash
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app import config
+from app.executor import PAGE_ANALYZERS
+from app.results import dumps, loads, pack_page, unpack_page
+
+# Bump when analyzer output changes so stored results are not reused
+RESULT_CACHE_VERSION = 7
+
+# The SQLite backend drops expired and excess records once every this many writes
+PRUNE_EVERY = 256
+
+CACHE_CONTROL_MAX_AGE = re.compile(r"(?:^|,)\s*(s-maxage|max-age)\s*=\s*\"?(\d+)", re.IGNORECASE)
+
+
+def body_hash(body: bytes) -> str:
+    """Content hash of a fetched body, the fingerprint cached results are keyed on"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def page_freshness(headers) -> float:
+    """Seconds a page response may be reused without contacting the server (0 = always revalidate)"""
+    cache_control = headers.get("cache-control", "")
+    lowered = cache_control.lower()
+    if "no-store" in lowered or "no-cache" in lowered:
+        return 0.0
+    ages = dict((name.lower(), int(value)) for name, value in CACHE_CONTROL_MAX_AGE.findall(cache_control))
+    max_age = ages.get("s-maxage", ages.get("max-age"))
+    if max_age is None:
+        return 0.0
+    try:
+        age = int(headers.get("age", "0"))
+    except ValueError:
+        age = 0
+    return float(max(0, min(max_age, config.RESULT_CACHE_MAX_FRESHNESS) - age))
+
+
+class ResultCacheBackend:
+    """Storage for cache records ({body_hash, etag, last_modified, fresh_until, final_url, truncated, page, version})"""
+
+    # Backends doing disk I/O are called from a worker thread
+    blocking = False
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, url: str, record: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryBackend(ResultCacheBackend):
+    """Bounded in-process LRU"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        record = self._records.get(url)
+        if record is not None:
+            self._records.move_to_end(url)
+        return record
+
+    def set(self, url: str, record: Dict[str, Any]) -> None:
+        self._records[url] = record
+        self._records.move_to_end(url)
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+
+    def clear(self) -> None:
+        self._records.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class SQLiteBackend(ResultCacheBackend):
+    """
+    On-disk store that survives restarts and can be shared by workers on one
+    host. A record is kept for stale_ttl seconds past its fresh_until (so it can
+    still be revalidated or matched by body hash), and at most max_entries
+    records are kept, the most recently written ones.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int, stale_ttl: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._writes = 0
+        self._local = threading.local()
+        # Created at import, so a preloading launcher would otherwise hand this connection to every worker
+        os.register_at_fork(after_in_child=self._forget_connections)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " url TEXT PRIMARY KEY,"
+                " record TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+            if "expires_at" not in columns:
+                # Files written before pruning existed: their records expire at the first prune
+                conn.execute("ALTER TABLE results ADD COLUMN expires_at REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_updated ON results (updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_expires ON results (expires_at)")
+        self.prune()
+
+    def _forget_connections(self) -> None:
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT record FROM results WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        record = loads(row[0])
+        if record.get("version") == RESULT_CACHE_VERSION:
+            record["page"] = unpack_page(record["page"], PAGE_ANALYZERS)
+        return record
+
+    def set(self, url: str, record: Dict[str, Any]) -> None:
+        # Pages are stored packed: category results as arrays with message codes
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (url, record, updated_at, expires_at) VALUES (?, ?, ?, ?)",
+                (url, dumps({**record, "page": pack_page(record["page"])}).decode(), time.time(),
+                 record["fresh_until"] + self.stale_ttl),
+            )
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> None:
+        """Drop records past their stale window, then the oldest beyond max_entries"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results WHERE expires_at < ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM results WHERE url IN ("
+                " SELECT url FROM results ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+class ResultCache:
+    """Front end over a backend, with hit/miss counters"""
+
+    def __init__(self, backend: Optional[ResultCacheBackend]):
+        self.backend = backend
+        self.fresh_hits = 0
+        self.not_modified_hits = 0
+        self.body_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def _call(self, method, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def get(self, url: str) -> Optional[Dict[str, Any]]:
+        if self.backend is None:
+            return None
+        record = await self._call(self.backend.get, url)
+        if record is None or record.get("version") != RESULT_CACHE_VERSION:
+            return None
+        return record
+
+    async def set(self, url: str, digest: str, etag: Optional[str], last_modified: Optional[str], page: Dict[str, Any],
+                  final_url: Optional[str] = None, truncated: bool = False, fresh_for: float = 0.0) -> None:
+        """Store the page categories with the body hash they were computed from"""
+        if self.backend is None:
+            return
+        record = {
+            "version": RESULT_CACHE_VERSION,
+            "body_hash": digest,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh_until": time.time() + fresh_for,
+            "final_url": final_url or url,
+            "truncated": truncated,
+            "page": page,
+        }
+        await self._call(self.backend.set, url, record)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.fresh_hits + self.not_modified_hits + self.body_hits
+        total = hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": hits,
+            "fresh_hits": self.fresh_hits,
+            "not_modified_hits": self.not_modified_hits,
+            "body_hits": self.body_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+def create_backend(kind: str) -> Optional[ResultCacheBackend]:
+    """Backend for RESULT_CACHE_BACKEND ("memory", "sqlite" or "none")"""
+    if kind == "memory":
+        return MemoryBackend(config.RESULT_CACHE_SIZE)
+    if kind == "sqlite":
+        return SQLiteBackend(config.RESULT_CACHE_PATH, config.RESULT_CACHE_SIZE, config.RESULT_CACHE_STALE_TTL)
+    if kind == "none":
+        return None
+    raise ValueError(f"RESULT_CACHE_BACKEND must be memory, sqlite or none, got {kind!r}")
+
+
+result_cache = ResultCache(create_backend(config.RESULT_CACHE_BACKEND))
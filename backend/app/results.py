@@ -0,0 +1,135 @@
+"""
+Results - Slotted analysis result types, their packed storage form and the JSON encoder for responses
+
+In memory and in storage a result holds message codes (app/messages.py), not
+text, and no raw side-file content. to_dict() builds the response shape (the
+one /api/analyze has always returned) and is only called at the API edge,
+by dumps() when it meets a result. pack()/unpack() give the compact form kept
+in the result cache and the job queue: arrays, with codes instead of text.
+"""
+import json
+from typing import Any, Dict, List, Optional, Sequence
+from app.messages import Message, expand_all, intern_message
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead (pip install orjson)
+    orjson = None
+
+
+# Categories whose responses carry a "content" preview of their side file
+PREVIEW_CATEGORIES = ("robots", "llms_txt")
+
+
+class CategoryResult:
+    """
+    One analyzer's output: score, scoring features, message codes and the
+    category-specific response fields (details). preview holds the start of
+    a side file (robots.txt, llms.txt); it is not stored and only single-URL
+    responses include it, as "content".
+    """
+    __slots__ = ("score", "features", "issues", "recommendations", "details", "preview")
+
+    def __init__(self, score: int, features: Dict[str, Any], issues: Sequence[Message],
+                 recommendations: Sequence[Message], details: Optional[Dict[str, Any]] = None,
+                 preview: Optional[str] = None):
+        self.score = score
+        self.features = features
+        self.issues = tuple(issues)
+        self.recommendations = tuple(recommendations)
+        self.details = details or {}
+        self.preview = preview
+
+    def to_dict(self, previews: bool = False) -> Dict[str, Any]:
+        result = dict(self.details)
+        if previews:
+            # null when the file is missing or failed, as it always was
+            result["content"] = self.preview
+        result["score"] = self.score
+        result["features"] = self.features
+        result["issues"] = expand_all(self.issues)
+        result["recommendations"] = expand_all(self.recommendations)
+        return result
+
+    def pack(self) -> List[Any]:
+        return [self.score, self.features, self.issues, self.recommendations, self.details]
+
+    @classmethod
+    def unpack(cls, packed: Sequence[Any]) -> "CategoryResult":
+        score, features, issues, recommendations, details = packed
+        return cls(score, features, [intern_message(m) for m in issues],
+                   [intern_message(m) for m in recommendations], details)
+
+
+class AnalysisResult:
+    """One URL's analysis: overall score plus a CategoryResult per category"""
+    __slots__ = ("url", "timestamp", "overall_score", "truncated", "categories", "links", "timings")
+
+    def __init__(self, url: str, timestamp: str, overall_score: int, truncated: bool,
+                 categories: Dict[str, CategoryResult], links: Optional[List[str]] = None,
+                 timings: Optional[Dict[str, Any]] = None):
+        self.url = url
+        self.timestamp = timestamp
+        self.overall_score = overall_score
+        self.truncated = truncated
+        self.categories = categories
+        self.links = links
+        self.timings = timings
+
+    def to_dict(self, previews: bool = False) -> Dict[str, Any]:
+        result = {
+            "url": self.url,
+            "timestamp": self.timestamp,
+            "overall_score": self.overall_score,
+            "truncated": self.truncated,
+            "categories": {
+                name: category.to_dict(previews and name in PREVIEW_CATEGORIES)
+                for name, category in self.categories.items()
+            },
+        }
+        if self.links is not None:
+            result["links"] = self.links
+        if self.timings is not None:
+            result["timings"] = self.timings
+        return result
+
+    def pack(self) -> List[Any]:
+        """Storage form (links are crawl-only and not kept)"""
+        categories = {name: category.pack() for name, category in self.categories.items()}
+        return [self.url, self.timestamp, self.overall_score, self.truncated, categories, self.timings]
+
+    @classmethod
+    def unpack(cls, packed: Sequence[Any]) -> "AnalysisResult":
+        url, timestamp, overall_score, truncated, categories, timings = packed
+        categories = {name: CategoryResult.unpack(category) for name, category in categories.items()}
+        return cls(url, timestamp, overall_score, truncated, categories, timings=timings)
+
+
+def pack_page(page: Dict[str, Any]) -> Dict[str, Any]:
+    """A run_page_analysis result with its categories packed, for JSON storage"""
+    return {key: value.pack() if isinstance(value, CategoryResult) else value for key, value in page.items()}
+
+
+def unpack_page(page: Dict[str, Any], categories: Sequence[str]) -> Dict[str, Any]:
+    """Inverse of pack_page (categories already unpacked, as from an in-memory cache, are left alone)"""
+    return {
+        key: CategoryResult.unpack(value) if key in categories and isinstance(value, list) else value
+        for key, value in page.items()
+    }
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (AnalysisResult, CategoryResult)):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON; results met on the way are expanded with to_dict()"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
@@ -0,0 +1,227 @@
+"""
+Robots Audit - AI bot access matrix for many domains, parsing each distinct robots.txt once
+
+Fetches run concurrently on the shared pooled client. Bodies are hashed as
+they stream in, and a body seen before (a CMS default, a hosting provider's
+template) reuses the access row computed the first time instead of being
+parsed again. Access follows RFC 9309 like the crawler does: a 4xx allows
+everything, a 5xx or an unreachable host allows nothing.
+"""
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import httpx
+from app import config
+from app.analyzers.robots_analyzer import AI_BOTS, RobotsRules, parse_robots_txt
+from app.http_client import SIDE_FILE_TIMEOUT, get_client, origin_of
+
+BOT_NAMES = [bot["name"] for bot in AI_BOTS]
+COLUMNS = ["domain", "status", "body_hash"] + BOT_NAMES
+
+# Bodies up to this size are parsed on the event loop; larger ones in a worker thread
+INLINE_PARSE_BYTES = 64 * 1024
+
+# Workers queue for a pooled connection instead of timing out while other domains are fetched
+AUDIT_TIMEOUT = httpx.Timeout(SIDE_FILE_TIMEOUT, pool=None)
+
+ALLOW_ALL = tuple([1] * len(AI_BOTS))
+BLOCK_ALL = tuple([0] * len(AI_BOTS))
+
+
+def bot_access(rules: RobotsRules) -> Tuple[int, ...]:
+    """1/0 per AI_BOTS entry: may the bot fetch the site root"""
+    return tuple(int(rules.is_allowed(bot["user_agent"])) for bot in AI_BOTS)
+
+
+def parse_access(body: bytes) -> Tuple[int, ...]:
+    return bot_access(parse_robots_txt(body.decode("utf-8", errors="replace")))
+
+
+def audit_origin(domain: str) -> str:
+    """Origin to audit for an input line: a bare domain means https"""
+    domain = domain.strip()
+    return origin_of(domain if "://" in domain else f"https://{domain}").lower()
+
+
+class RobotsAudit:
+    """One audit run: its fetches, the access row per distinct body and running totals"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.client = get_client()
+        self._access: Dict[str, "asyncio.Future[Tuple[int, ...]]"] = {}
+        self.domains = 0
+        self.errors = 0
+        self.parsed = 0
+        self.allowed = [0] * len(AI_BOTS)
+        self.started = time.monotonic()
+
+    async def _download(self, origin: str) -> Tuple[int, bytes]:
+        """Status and (capped) body of an origin's robots.txt"""
+        async with self.client.stream(
+            "GET", f"{origin}/robots.txt", follow_redirects=True, timeout=AUDIT_TIMEOUT,
+        ) as response:
+            if response.status_code >= 400:
+                return response.status_code, b""
+            parts: List[bytes] = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                parts.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    # Rules past the cap are ignored (RFC 9309 asks for at least 500 KiB)
+                    break
+            return response.status_code, b"".join(parts)[:self.max_bytes]
+
+    async def _access_for(self, digest: str, body: bytes) -> Tuple[int, ...]:
+        """Access row for a body, parsing it only the first time its hash is seen"""
+        pending = self._access.get(digest)
+        if pending is None:
+            pending = asyncio.get_running_loop().create_future()
+            self._access[digest] = pending
+            self.parsed += 1
+            try:
+                if len(body) <= INLINE_PARSE_BYTES:
+                    access = parse_access(body)
+                else:
+                    access = await asyncio.to_thread(parse_access, body)
+            except BaseException as e:
+                # Waiters for the same body see the error too; a later copy is parsed afresh
+                pending.set_exception(e)
+                pending.exception()
+                del self._access[digest]
+                raise
+            pending.set_result(access)
+        return await asyncio.shield(pending)
+
+    async def audit(self, domain: str) -> List[Any]:
+        """One table row: domain, status ("error" if unreachable), body hash prefix, then 1/0 per bot"""
+        try:
+            status, body = await self._download(audit_origin(domain))
+        except Exception:
+            self.errors += 1
+            status, digest, access = "error", None, BLOCK_ALL
+        else:
+            if status >= 500:
+                digest, access = None, BLOCK_ALL
+            elif status >= 400:
+                digest, access = None, ALLOW_ALL
+            else:
+                digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+                access = await self._access_for(digest, body)
+        self.domains += 1
+        for index, allowed in enumerate(access):
+            self.allowed[index] += allowed
+        return [domain, status, digest, *access]
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "domains": self.domains,
+            "distinct_bodies": len(self._access),
+            "parsed": self.parsed,
+            "errors": self.errors,
+            "allowed": dict(zip(BOT_NAMES, self.allowed)),
+            "seconds": round(elapsed, 2),
+            "domains_per_minute": round(self.domains / elapsed * 60) if elapsed > 0 else None,
+        }
+
+
+async def run_audit(audit: RobotsAudit, domains: Iterable[str], concurrency: int) -> AsyncIterator[List[Any]]:
+    """Audit domains concurrently, yielding each row as soon as it is ready (order is not kept)"""
+    source = iter(domains)
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    done = object()
+
+    async def worker() -> None:
+        try:
+            # Pulling from a plain iterator needs no lock: there is no await in between
+            for domain in source:
+                await results.put(await audit.audit(domain))
+        finally:
+            await results.put(done)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    running = len(workers)
+    try:
+        while running:
+            item = await results.get()
+            if item is done:
+                running -= 1
+            else:
+                yield item
+        for worker_task in workers:
+            worker_task.result()
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+def unique_domains(domains: Iterable[str], limit: int) -> List[str]:
+    """Non-empty input lines, one per origin, capped at limit"""
+    seen = set()
+    unique = []
+    for domain in domains:
+        domain = domain.strip()
+        if not domain or domain.startswith("#"):
+            continue
+        origin = audit_origin(domain)
+        if origin not in seen:
+            seen.add(origin)
+            unique.append(domain)
+            if len(unique) >= limit:
+                break
+    return unique
+
+
+def _csv_line(row: List[Any]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow("" if value is None else value for value in row)
+    return buffer.getvalue()
+
+
+async def stream_audit(domains: List[str], output: str, concurrency: int,
+                       audit: Optional[RobotsAudit] = None) -> AsyncIterator[str]:
+    """
+    The access matrix as CSV (header, then rows) or NDJSON: a {"columns": [...]}
+    line, one JSON array per domain and a final {"summary": {...}} line.
+    """
+    audit = audit or RobotsAudit(config.ROBOTS_MAX_BYTES)
+    domains = unique_domains(domains, config.ROBOTS_AUDIT_MAX_DOMAINS)
+    if output == "csv":
+        yield _csv_line(COLUMNS)
+        async for row in run_audit(audit, domains, concurrency):
+            yield _csv_line(row)
+        return
+    yield json.dumps({"columns": COLUMNS}) + "\n"
+    async for row in run_audit(audit, domains, concurrency):
+        yield json.dumps(row, separators=(",", ":")) + "\n"
+    yield json.dumps({"summary": audit.summary()}) + "\n"
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from app.http_client import close_client
+
+    parser = argparse.ArgumentParser(description="AI bot access matrix for a list of domains (one per line)")
+    parser.add_argument("domains", help="file with one domain or origin per line, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--concurrency", type=int, default=config.ROBOTS_AUDIT_CONCURRENCY)
+    args = parser.parse_args()
+
+    async def main() -> None:
+        lines = sys.stdin if args.domains == "-" else open(args.domains, encoding="utf-8")
+        audit = RobotsAudit(config.ROBOTS_MAX_BYTES)
+        try:
+            async for line in stream_audit(list(lines), args.format, args.concurrency, audit):
+                sys.stdout.write(line)
+        finally:
+            await close_client()
+        print(json.dumps(audit.summary()), file=sys.stderr)
+
+    asyncio.run(main())
@@ -0,0 +1,375 @@
+"""
+Scoring Engine - Declarative rule table, compiled once into a flat plan that turns analyzer features into scores
+
+Analyzers only extract features (flat dicts of numbers/booleans); every point
+value, threshold and weight lives in the rule table below (or in the JSON file
+named by SCORING_RULES_PATH, which replaces it). A category score is
+
+    override score of the first matching override, else
+    min(caps..., clamp(int(base + sum of matching rule points + per-unit terms)))
+
+so stored feature vectors can be re-scored after a table change without
+fetching or parsing anything again (see score_pages / score_batch / overall_batch).
+With numpy installed, batches are scored with one array operation per rule,
+in the same order and with the same truncation as the per-page path, so the
+results are identical.
+"""
+import json
+import operator
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from app import config
+
+# numpy is optional; batch scoring falls back to plain lists without it
+np = None
+
+# The categories the analyzers produce, in report order
+CATEGORIES = ["robots", "schema", "content", "technical", "llms_txt"]
+
+# Rule forms, all keyed by "feature":
+#   {"feature": f, "points": p}                      p when f is truthy
+#   {"feature": f, "op": ">=", "value": v, "points": p}
+#   {"feature": f, "per": p}                         p for every unit of f
+#   caps:      {"feature": f, ..., "cap": c}         score at most c when the condition holds
+#   overrides: {"feature": f, ..., "score": s}       score is exactly s (first match wins)
+DEFAULT_RULES: Dict[str, Any] = {
+    "weights": {
+        "robots": 0.25,
+        "schema": 0.25,
+        "content": 0.25,
+        "technical": 0.15,
+        "llms_txt": 0.10,
+    },
+    "categories": {
+        "robots": {
+            "base": 0,
+            "overrides": [
+                {"feature": "fetch_error", "score": 50},
+                {"feature": "found", "op": "==", "value": 0, "score": 70},
+            ],
+            "rules": [
+                {"feature": "allowed_ratio", "per": 100},
+            ],
+            "caps": [
+                {"feature": "wildcard_blocks_all", "cap": 30},
+            ],
+        },
+        "schema": {
+            "base": 50,
+            "overrides": [
+                {"feature": "found", "op": "==", "value": 0, "score": 20},
+            ],
+            "rules": [
+                {"feature": "valuable_type_count", "per": 10},
+                {"feature": "has_faq_schema", "points": 15},
+                {"feature": "has_article_schema", "points": 10},
+                {"feature": "has_organization_schema", "points": 10},
+                {"feature": "invalid_count", "op": ">", "value": 0, "points": -10},
+            ],
+        },
+        "content": {
+            "base": 40,
+            "rules": [
+                {"feature": "h1_count", "op": "==", "value": 1, "points": 15},
+                {"feature": "heading_count", "op": ">=", "value": 3, "points": 15},
+                {"feature": "has_faq_section", "points": 20},
+                {"feature": "has_answer_first", "points": 10},
+                {"feature": "word_count", "op": ">=", "value": 300, "points": 5},
+                {"feature": "word_count", "op": ">=", "value": 500, "points": 10},
+            ],
+        },
+        "technical": {
+            "base": 30,
+            "rules": [
+                {"feature": "has_meta_title", "points": 15},
+                {"feature": "has_meta_description", "points": 15},
+                {"feature": "has_canonical", "points": 10},
+                {"feature": "has_open_graph", "points": 10},
+                {"feature": "has_twitter_card", "points": 5},
+                {"feature": "is_ssr", "points": 15},
+            ],
+        },
+        "llms_txt": {
+            "base": 80,
+            "overrides": [
+                {"feature": "found", "op": "==", "value": 0, "score": 40},
+            ],
+            "rules": [
+                {"feature": "content_length", "op": "<", "value": 50, "points": -20},
+                {"feature": "content_length", "op": ">", "value": 200, "points": 10},
+                {"feature": "has_description", "points": 5},
+                {"feature": "has_attribution", "points": 5},
+            ],
+        },
+    },
+}
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# (feature index, test, value) - test None means "feature is truthy"
+Condition = Tuple[int, Optional[Callable[[Any, Any], bool]], Any]
+
+
+def _holds(condition: Condition, vector: Sequence[Any]) -> bool:
+    index, test, value = condition
+    return bool(vector[index]) if test is None else test(vector[index], value)
+
+
+def _load_numpy() -> bool:
+    """Import numpy on first use; False when it is not installed"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+def _as_array(values: Any):
+    """A feature column as bool, int64 or float64 (float32 is widened, as reading it into Python does)"""
+    array = np.asarray(values)
+    if array.dtype.kind == "b":
+        return array
+    if array.dtype.kind in "iu":
+        return array.astype(np.int64, copy=False)
+    return array.astype(np.float64, copy=False)
+
+
+def _column_size(columns: Dict[str, Any]) -> int:
+    sizes = {len(values) for values in columns.values()}
+    if len(sizes) > 1:
+        raise ValueError(f"Feature columns differ in length: {sorted(sizes)}")
+    return sizes.pop() if sizes else 0
+
+
+class CategoryPlan:
+    """One category's rules flattened to tuples over feature indexes"""
+    __slots__ = ("name", "features", "base", "points", "per", "caps", "overrides", "low", "high")
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        self.name = name
+        self.features: List[str] = []
+        self.base = spec.get("base", 0)
+        self.low, self.high = spec.get("clamp", (0, 100))
+        self.points: List[Tuple[Condition, Any]] = []
+        self.per: List[Tuple[int, Any]] = []
+        self.caps: List[Tuple[Condition, Any]] = []
+        self.overrides: List[Tuple[Condition, Any]] = []
+
+        for rule in spec.get("rules", []):
+            if "per" in rule:
+                self.per.append((self._index(rule), rule["per"]))
+            else:
+                self.points.append((self._condition(rule), self._value(rule, "points")))
+        for rule in spec.get("caps", []):
+            self.caps.append((self._condition(rule), self._value(rule, "cap")))
+        for rule in spec.get("overrides", []):
+            self.overrides.append((self._condition(rule), self._value(rule, "score")))
+
+    def _index(self, rule: Dict[str, Any]) -> int:
+        feature = rule.get("feature")
+        if not isinstance(feature, str):
+            raise ValueError(f"Scoring rule in {self.name!r} has no feature: {rule!r}")
+        if feature not in self.features:
+            self.features.append(feature)
+        return self.features.index(feature)
+
+    def _condition(self, rule: Dict[str, Any]) -> Condition:
+        op = rule.get("op")
+        if op is not None and op not in OPERATORS:
+            raise ValueError(f"Scoring rule in {self.name!r} has unknown op {op!r}")
+        return self._index(rule), OPERATORS[op] if op is not None else None, rule.get("value")
+
+    def _value(self, rule: Dict[str, Any], key: str) -> Any:
+        if key not in rule:
+            raise ValueError(f"Scoring rule in {self.name!r} needs {key!r}: {rule!r}")
+        return rule[key]
+
+    def vector(self, features: Dict[str, Any]) -> Tuple[Any, ...]:
+        """The features this plan reads, in plan order (missing ones count as 0)"""
+        return tuple(features.get(name, 0) for name in self.features)
+
+    def score(self, vector: Sequence[Any]) -> int:
+        for condition, score in self.overrides:
+            if _holds(condition, vector):
+                return score
+        total = self.base
+        for condition, points in self.points:
+            if _holds(condition, vector):
+                total += points
+        for index, per in self.per:
+            total += vector[index] * per
+        total = min(self.high, max(self.low, int(total)))
+        for condition, cap in self.caps:
+            if _holds(condition, vector):
+                total = min(total, cap)
+        return total
+
+    def score_columns(self, columns: Dict[str, Sequence[Any]]) -> List[int]:
+        """Score many pages at once, one pass per rule over whole feature columns"""
+        size = len(next(iter(columns.values()))) if columns else 0
+        cols = [columns[name] if name in columns else [0] * size for name in self.features]
+
+        def mask(condition: Condition) -> List[bool]:
+            index, test, value = condition
+            if test is None:
+                return list(map(bool, cols[index]))
+            return [test(x, value) for x in cols[index]]
+
+        totals = [self.base] * size
+        for condition, points in self.points:
+            totals = [t + points if hit else t for t, hit in zip(totals, mask(condition))]
+        for index, per in self.per:
+            totals = [t + x * per for t, x in zip(totals, cols[index])]
+        low, high = self.low, self.high
+        totals = [min(high, max(low, int(t))) for t in totals]
+        for condition, cap in self.caps:
+            totals = [min(t, cap) if hit else t for t, hit in zip(totals, mask(condition))]
+        # Overrides are applied last-to-first so the first matching one wins
+        for condition, score in reversed(self.overrides):
+            totals = [score if hit else t for t, hit in zip(totals, mask(condition))]
+        return totals
+
+    def score_arrays(self, columns: Dict[str, Any], size: int):
+        """score_columns over NumPy arrays: the same steps, each as one array operation"""
+        cols = [_as_array(columns[name]) if name in columns else np.zeros(size, dtype=np.int64)
+                for name in self.features]
+
+        def mask(condition: Condition):
+            index, test, value = condition
+            return cols[index].astype(bool) if test is None else np.asarray(test(cols[index], value), dtype=bool)
+
+        overridden = np.zeros(size, dtype=bool)
+        for condition, _ in self.overrides:
+            overridden |= mask(condition)
+
+        totals = np.full(size, self.base)
+        for condition, points in self.points:
+            totals = np.where(mask(condition), totals + points, totals)
+        for index, per in self.per:
+            totals = totals + cols[index] * per
+        if totals.dtype.kind == "f":
+            # int() truncates toward zero and rejects NaN/inf; overridden pages never reach it
+            if not np.isfinite(totals[~overridden]).all():
+                raise ValueError(f"Non-finite {self.name} feature values in a batch")
+            totals = np.where(overridden, 0, totals).astype(np.int64)
+        totals = np.minimum(self.high, np.maximum(self.low, totals))
+        for condition, cap in self.caps:
+            totals = np.where(mask(condition), np.minimum(totals, cap), totals)
+        for condition, score in reversed(self.overrides):
+            totals = np.where(mask(condition), score, totals)
+        return totals
+
+
+class ScoringPlan:
+    """Every category plan plus the overall weights"""
+
+    def __init__(self, rules: Dict[str, Any]):
+        categories = rules.get("categories")
+        weights = rules.get("weights")
+        if not isinstance(categories, dict) or not isinstance(weights, dict):
+            raise ValueError("Scoring rules need 'categories' and 'weights' objects")
+        missing = [name for name in CATEGORIES if name not in categories]
+        if missing:
+            raise ValueError(f"Scoring rules are missing categories: {', '.join(missing)}")
+        unknown = [name for name in weights if name not in categories]
+        if unknown:
+            raise ValueError(f"Scoring weights name unknown categories: {', '.join(unknown)}")
+        self.categories = {name: CategoryPlan(name, spec) for name, spec in categories.items()}
+        self.weights: List[Tuple[str, float]] = list(weights.items())
+
+    def category(self, name: str) -> CategoryPlan:
+        plan = self.categories.get(name)
+        if plan is None:
+            raise ValueError(f"No scoring rules for category {name!r}")
+        return plan
+
+    def overall(self, scores: Dict[str, int]) -> int:
+        return int(sum(scores[name] * weight for name, weight in self.weights))
+
+    def overall_arrays(self, scores: Dict[str, Any], size: int):
+        """overall() over score arrays, summing in weight order from 0 as sum() does"""
+        totals = np.zeros(size, dtype=np.int64)
+        for name, weight in self.weights:
+            totals = totals + np.asarray(scores[name]) * weight
+        return totals.astype(np.int64)  # truncates toward zero, like int()
+
+
+_plan: Optional[ScoringPlan] = None
+
+
+def load_rules(path: Optional[str]) -> Dict[str, Any]:
+    """The rule table from a JSON file, or the built-in one when path is empty"""
+    if not path:
+        return DEFAULT_RULES
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_scoring_plan() -> ScoringPlan:
+    """Return the compiled plan, loading and compiling the rule table on first use"""
+    global _plan
+    if _plan is None:
+        _plan = ScoringPlan(load_rules(config.SCORING_RULES_PATH))
+    return _plan
+
+
+def score_category(category: str, features: Dict[str, Any]) -> int:
+    """Score one category's features"""
+    plan = get_scoring_plan().category(category)
+    return plan.score(plan.vector(features))
+
+
+def overall_score(categories: Dict[str, Any]) -> int:
+    """Weighted sum of the category scores (CategoryResults by category)"""
+    return get_scoring_plan().overall({name: result.score for name, result in categories.items()})
+
+
+def score_pages(columns: Dict[str, Any], plan: Optional[ScoringPlan] = None) -> Dict[str, Any]:
+    """
+    Category and overall scores for N pages in one vectorized call (needs numpy).
+    columns maps "<category>_<feature>" (the feature store's column names) to N
+    values each; a feature without a column counts as 0, as in score_category.
+    Returns an int64 array per category plus "overall".
+    """
+    if not _load_numpy():
+        raise RuntimeError("score_pages needs numpy (pip install numpy)")
+    plan = plan or get_scoring_plan()
+    size = _column_size(columns)
+    scores = {}
+    for name, category in plan.categories.items():
+        prefix = name + "_"
+        scores[name] = category.score_arrays(
+            {feature: columns[prefix + feature] for feature in category.features if prefix + feature in columns}, size,
+        )
+    scores["overall"] = plan.overall_arrays(scores, size)
+    return scores
+
+
+def score_batch(category: str, columns: Dict[str, Sequence[Any]], plan: Optional[ScoringPlan] = None) -> List[int]:
+    """Re-score stored feature columns (feature name -> one value per page) for a category"""
+    category_plan = (plan or get_scoring_plan()).category(category)
+    if columns and _load_numpy():
+        return category_plan.score_arrays(columns, _column_size(columns)).tolist()
+    return category_plan.score_columns(columns)
+
+
+def overall_batch(scores: Dict[str, Sequence[int]], plan: Optional[ScoringPlan] = None) -> List[int]:
+    """Overall scores from per-category score columns"""
+    plan = plan or get_scoring_plan()
+    weights = plan.weights
+    size = len(scores[weights[0][0]]) if weights else 0
+    if size and _load_numpy():
+        return plan.overall_arrays(scores, size).tolist()
+    totals = [0] * size
+    for name, weight in weights:
+        totals = [t + s * weight for t, s in zip(totals, scores[name])]
+    return [int(t) for t in totals]
@@ -0,0 +1,150 @@
+"""
+Benchmark Corpus - Deterministic synthetic HTML pages and robots.txt files
+"""
+import json
+import random
+from typing import List
+
+WORDS = (
+    "search engine answer model content page product price review guide "
+    "question structured data crawler index ranking schema article author "
+    "publish update feature customer support delivery return policy brand"
+).split()
+
+# Page sizes in bytes (approximate, the generator stops once it passes the target)
+PAGE_SIZES = {
+    "10kb": 10 * 1024,
+    "100kb": 100 * 1024,
+    "1mb": 1024 * 1024,
+    "5mb": 5 * 1024 * 1024,
+}
+
+JSON_LD_COUNTS = [0, 10, 200]
+
+ROBOTS_SIZES = {
+    "small": 10,
+    "medium": 500,
+    "large": 5000,
+}
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _json_ld_block(rng: random.Random, index: int) -> str:
+    kind = index % 4
+    if kind == 0:
+        data = {
+            "@context": "https://schema.org",
+            "@type": "Product",
+            "name": _sentence(rng, 4),
+            "sku": f"SKU-{index}",
+            "offers": {"@type": "Offer", "price": str(rng.randint(1, 999)), "priceCurrency": "USD"},
+            "review": [{"@type": "Review", "reviewBody": _sentence(rng, 20)} for _ in range(3)],
+        }
+    elif kind == 1:
+        data = {
+            "@context": "https://schema.org",
+            "@type": "FAQPage",
+            "mainEntity": [
+                {"@type": "Question", "name": _sentence(rng, 8),
+                 "acceptedAnswer": {"@type": "Answer", "text": _sentence(rng, 30)}}
+                for _ in range(4)
+            ],
+        }
+    elif kind == 2:
+        data = {
+            "@context": "https://schema.org",
+            "@graph": [
+                {"@type": "Organization", "name": "Example Co", "url": "https://example.com"},
+                {"@type": "WebSite", "name": "Example", "url": "https://example.com"},
+            ],
+        }
+    else:
+        data = {
+            "@context": "https://schema.org",
+            "@type": "Article",
+            "headline": _sentence(rng, 8),
+            "author": {"@type": "Person", "name": "Jane Doe"},
+        }
+    return f'<script type="application/ld+json">{json.dumps(data)}</script>'
+
+
+def _section(rng: random.Random, depth: int, max_depth: int) -> List[str]:
+    level = min(depth + 2, 6)
+    parts = [f"<section><h{level}>{_sentence(rng, 5)}</h{level}>"]
+    for _ in range(rng.randint(1, 3)):
+        parts.append(f"<p>{_sentence(rng, rng.randint(20, 80))} <a href=\"/p/{rng.randint(1, 99999)}\">more</a></p>")
+    if rng.random() < 0.3:
+        parts.append("<ul>" + "".join(f"<li>{_sentence(rng, 6)}</li>" for _ in range(5)) + "</ul>")
+    if depth < max_depth:
+        parts.extend(_section(rng, depth + 1, max_depth))
+    parts.append("</section>")
+    return parts
+
+
+def generate_page(size: int, json_ld_blocks: int, heading_depth: int = 8, seed: int = 0) -> str:
+    """An HTML page of roughly size bytes with the given number of JSON-LD blocks"""
+    rng = random.Random(seed)
+    head = [
+        "<!DOCTYPE html><html lang=\"en\"><head>",
+        f"<title>{_sentence(rng, 7)}</title>",
+        f"<meta name=\"description\" content=\"{_sentence(rng, 22)}\">",
+        "<meta property=\"og:title\" content=\"Example\">",
+        "<meta name=\"twitter:card\" content=\"summary\">",
+        "<link rel=\"canonical\" href=\"https://example.com/page\">",
+        "<style>body{font-family:sans-serif}.faq{margin:0}</style>",
+    ]
+    head.extend(_json_ld_block(rng, i) for i in range(json_ld_blocks))
+    head.append("</head><body>")
+
+    body = [f"<h1>{_sentence(rng, 6)}</h1>", f"<p>{_sentence(rng, 40)}</p>"]
+    length = sum(len(p) for p in head) + sum(len(p) for p in body)
+    while length < size:
+        section = _section(rng, 0, rng.randint(1, heading_depth))
+        if rng.random() < 0.1:
+            section.append(f"<script>window.__DATA__={json.dumps({'k': _sentence(rng, 30)})}</script>")
+        body.extend(section)
+        length += sum(len(p) for p in section)
+    body.append("<div class=\"faq\"><h2>Frequently asked questions</h2></div></body></html>")
+    return "".join(head + body)
+
+
+def generate_robots(lines: int, seed: int = 0) -> str:
+    """A robots.txt with many agent groups and wildcard rules"""
+    rng = random.Random(seed)
+    out = ["User-agent: GPTBot", "Disallow: /private/", "Allow: /private/public-*.html$", ""]
+    group = 0
+    while len(out) < lines:
+        out.append(f"User-agent: crawler-{group}")
+        for _ in range(rng.randint(3, 30)):
+            path = "/" + "/".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+            if rng.random() < 0.3:
+                path += "/*." + rng.choice(["php", "json", "pdf"])
+            if rng.random() < 0.2:
+                path += "$"
+            out.append(f"{rng.choice(['Allow', 'Disallow'])}: {path}")
+        out.append("")
+        group += 1
+    out.extend(["User-agent: *", "Disallow: /cgi-bin/", "Crawl-delay: 1", "Sitemap: https://example.com/sitemap.xml"])
+    return "\n".join(out[:lines] + out[-4:])
+
+
+def page_names(sizes: List[str] = None, json_ld_counts: List[int] = None) -> List[str]:
+    """Corpus page names, "<size>-<count>ld" (e.g. 1mb-200ld)"""
+    sizes = sizes or list(PAGE_SIZES)
+    json_ld_counts = json_ld_counts if json_ld_counts is not None else JSON_LD_COUNTS
+    return [f"{size_name}-{count}ld" for size_name in sizes for count in json_ld_counts]
+
+
+def page_by_name(name: str) -> str:
+    """Generate the corpus page for a name from page_names()"""
+    size_name, count = name.split("-")
+    count = int(count[:-2])
+    return generate_page(PAGE_SIZES[size_name], count, seed=PAGE_SIZES[size_name] + count)
+
+
+def robots_by_name(name: str) -> str:
+    lines = ROBOTS_SIZES[name]
+    return generate_robots(lines, seed=lines)
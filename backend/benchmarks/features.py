@@ -0,0 +1,85 @@
+"""
+Feature Store Benchmark - Load synthetic analysis rows and time aggregate reports over them
+
+Run from backend/:
+    python -m benchmarks.features                     # 2M rows over 90 days in a temp dir
+    python -m benchmarks.features --rows 5000000 --days 365 --keep /tmp/features
+
+Rows are generated directly (no pages are fetched or parsed), written through
+FeatureStore.flush in daily files, then each report is timed cold.
+"""
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+REPORTS = [
+    ("schema_score mean per host per week", dict(metric="schema_score", period="week", group_by=["host", "period"])),
+    ("word_count mean per month", dict(metric="content_word_count", period="month", group_by=["period"])),
+    ("GPTBot allowed share per host", dict(metric="robots_allows_gptbot", period="all", group_by=["host"])),
+    ("overall_score max, last 7 days", dict(metric="overall_score", agg="max", period="day", group_by=["period"])),
+]
+
+
+def generate(store, rows: int, days: int, hosts: int, seed: int = 7) -> None:
+    """Buffer and flush rows spread evenly over the last `days` days"""
+    from app.feature_store import COLUMNS
+
+    rng = random.Random(seed)
+    now = time.time()
+    per_day = max(1, rows // days)
+    names = [f"site{i}.example" for i in range(hosts)]
+    for day in range(days):
+        start = now - (days - day) * 86400
+        batch = []
+        for _ in range(min(per_day, rows - day * per_day)):
+            host = rng.choice(names)
+            row = {"analyzed_at": int((start + rng.random() * 86400) * 1000), "url": f"https://{host}/p", "host": host}
+            for name, kind in COLUMNS[3:]:
+                if kind == "bool":
+                    row[name] = rng.random() < 0.5
+                elif kind == "float64":
+                    row[name] = rng.random()
+                else:
+                    row[name] = rng.randrange(100)
+            batch.append(row)
+        store.add_rows(batch)
+        store.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time feature store reports over synthetic rows")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--keep", help="write the store here and keep it (default: a temp dir)")
+    args = parser.parse_args(argv)
+
+    from app.feature_store import FeatureStore
+
+    root = args.keep or tempfile.mkdtemp(prefix="features-")
+    try:
+        store = FeatureStore(root)
+        started = time.perf_counter()
+        generate(store, args.rows, args.days, args.hosts)
+        print(f"Wrote {args.rows} rows in {time.perf_counter() - started:.1f}s to {root}")
+
+        week_ago = time.strftime("%Y-%m-%d", time.gmtime(time.time() - 7 * 86400))
+        for label, query in REPORTS:
+            if label.endswith("last 7 days"):
+                query = dict(query, start=week_ago)
+            started = time.perf_counter()
+            report = store.report(**query)
+            print(f"  {label:<40} {time.perf_counter() - started:6.2f}s  "
+                  f"{report['rows_scanned']} rows -> {report['groups']} groups")
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
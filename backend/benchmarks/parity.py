@@ -0,0 +1,121 @@
+"""
+Parser Parity - Check that every HTML parser backend scores pages identically
+
+Run from backend/:
+    python -m benchmarks.parity                 # corpus pages + edge cases, all installed backends
+    python -m benchmarks.parity --quick         # 10kb/100kb pages only
+    python -m benchmarks.parity --backend lxml
+
+The soup backend is the reference here; tests/test_parser_parity.py
+checks every backend against the frozen original analyzers instead.
+lxml and selectolax repair broken markup the HTML5 way (an unclosed <p> is
+closed by the next one), html.parser does not, so parity is only promised
+for pages whose tags are balanced. Exits non-zero if any backend produces a
+different schema, content or technical result (or different crawl links)
+for any page.
+"""
+import argparse
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import PAGE_SIZES, page_names, page_by_name
+
+REFERENCE = "soup"
+
+# Small documents that exercise the places where parsers tend to disagree
+EDGE_CASES: Dict[str, str] = {
+    "empty": "",
+    "text-only": "Just some text with no markup at all, not even a paragraph.",
+    "no-head": "<title>T</title><h1>Heading</h1><p>Body text</p>",
+    "hidden-text": (
+        "<html><head><title>Hidden</title><style>p{color:red}</style></head><body>"
+        "<p>visible</p><script>var s = 'not text';</script>"
+        "<template><p>inert</p></template><ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby>"
+        "<!-- a comment --></body></html>"
+    ),
+    "nested-headings": "<h2>Outer <span>inner <b>bold</b></span></h2><p>a <p>b</p></p><h3>" + "x" * 150 + "</h3>",
+    "meta-variants": (
+        "<head><meta name=\"description\" content=\"\"><meta name=\"description\" content=\"second\">"
+        "<meta property=\"og:title\" content=\"OG\"><META NAME=\"twitter:card\" CONTENT=\"summary\">"
+        "<meta name=\"viewport\" content=\"width=device-width\"><meta charset=\"utf-8\">"
+        "<link rel=\"stylesheet canonical\" href=\"/c\"><link rel=\"alternate\" hreflang=\"de\" href=\"/de\"></head>"
+    ),
+    "json-ld": (
+        "<script type=\"application/ld+json\">{\"@type\": \"FAQPage\", \"mainEntity\": []}</script>"
+        "<script type=\" Application/LD+JSON \">[{\"@type\": \"Product\"}, {\"@type\": \"Offer\"}]</script>"
+        "<script type=\"application/ld+json\">{not valid json</script>"
+        "<script type=\"application/ld+json\">{\"@graph\": [{\"@type\": \"Organization\"}, {\"@type\": \"WebSite\"}]}</script>"
+        "<p>Frequently Asked Questions</p>"
+    ),
+    "anchors": (
+        "<head><base href=\"https://example.com/docs/\"><base href=\"/ignored/\"></head>"
+        "<a href=\"guide\">a</a><a href=\"/x\" rel=\"NoFollow ugc\">b</a><a href>c</a>"
+        "<a name=\"anchor\">d</a><a href=\"#top\" rel=\"\">e</a><A HREF=\"HTTP://Example.com/Y\">f</A>"
+    ),
+    "entities": "<title>Fish &amp; Chips &copy; 2024</title><p>caf&eacute; &lt;b&gt; &#8212; &#x2014;</p>",
+    "long-text": "<html><body>" + "".join(f"<div><p>word{i} word word</p></div>" for i in range(400)) + "</body></html>",
+}
+
+
+CATEGORIES = ("schema", "content", "technical", "links")
+
+
+def score_document(doc) -> Tuple[Dict[str, Any], ...]:
+    """The analyzer results plus the crawl links taken from the document"""
+    from app.analyzers.schema_analyzer import analyze_schema
+    from app.analyzers.content_analyzer import analyze_content
+    from app.analyzers.technical_analyzer import analyze_technical
+
+    links = {"anchors": doc.anchors, "base_href": doc.base_href}
+    return analyze_schema(doc).to_dict(), analyze_content(doc).to_dict(), analyze_technical(doc).to_dict(), links
+
+
+def diff(expected: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    return [
+        f"{key}: {expected.get(key)!r} != {actual.get(key)!r}"
+        for key in sorted(set(expected) | set(actual))
+        if expected.get(key) != actual.get(key)
+    ]
+
+
+def check(pages: List[Tuple[str, str]], backends: List[str]) -> List[str]:
+    """Every mismatch between a backend and the reference, as readable lines"""
+    from app.analyzers.parser_backends import get_parser
+
+    reference = get_parser(REFERENCE)
+    failures = []
+    for name, html in pages:
+        expected = score_document(reference(html))
+        for backend in backends:
+            actual = score_document(get_parser(backend)(html))
+            for category, want, got in zip(CATEGORIES, expected, actual):
+                failures.extend(f"{backend} {name} {category} {line}" for line in diff(want, got))
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.analyzers.parser_backends import available_backends
+
+    parser = argparse.ArgumentParser(description="Check HTML parser backends score identically")
+    parser.add_argument("--backend", action="append", help="check only these backends (repeatable)")
+    parser.add_argument("--size", action="append", choices=list(PAGE_SIZES), help="page sizes to include (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="only the 10kb and 100kb pages")
+    args = parser.parse_args(argv)
+
+    backends = [b for b in (args.backend or available_backends()) if b != REFERENCE]
+    sizes = args.size or (["10kb", "100kb"] if args.quick else list(PAGE_SIZES))
+    pages = list(EDGE_CASES.items()) + [(name, page_by_name(name)) for name in page_names(sizes)]
+
+    print(f"Checking {', '.join(backends)} against {REFERENCE} on {len(pages)} pages")
+    failures = check(pages, backends)
+    for line in failures:
+        print(f"  {line}")
+    if failures:
+        print(f"{len(failures)} mismatches")
+        return 1
+    print("All backends match")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Replay Benchmark - Record real analyses once, then time the whole pipeline on them offline
+
+Run from backend/:
+    python -m benchmarks.replay record sites.httparchive urls.txt        # one URL per line, fetched for real
+    python -m benchmarks.replay run sites.httparchive                    # every recorded page, no network
+    python -m benchmarks.replay run sites.httparchive --repeat 5 --concurrency 32 --latency-scale 1
+
+run analyzes every successful HTML page in the archive (what
+`python -m app.replay urls --pages` lists) with HTTP_ARCHIVE_MODE=replay and
+the result cache off, so each pass fetches, parses and scores every page.
+With --latency-scale 0 the numbers are the pipeline's own cost; with 1 the
+recorded response times (and timeouts) are played back too. Results are the
+same on every run, so two runs can be compared before and after a change.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from benchmarks.run import peak_rss_mb, percentile
+
+
+def read_urls(path: str) -> List[str]:
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def archived_pages(path: str) -> List[str]:
+    from app.replay import ArchiveReader, page_urls
+
+    reader = ArchiveReader(path)
+    try:
+        return page_urls(reader)
+    finally:
+        reader.close()
+
+
+async def analyze_all(urls: List[str], concurrency: int) -> Tuple[List[float], List[str]]:
+    """Latency of every successful analysis, and the errors of the rest"""
+    from app.pipeline import run_analysis
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    async def one(url: str) -> None:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await run_analysis(url)
+            except Exception as e:
+                errors.append(f"{url}: {getattr(e, 'detail', None) or e!r}")
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[one(url) for url in urls])
+    return latencies, errors
+
+
+async def run_passes(urls: List[str], concurrency: int, repeat: int) -> int:
+    from app.executor import shutdown_executor
+    from app.http_client import close_client
+
+    failed = 0
+    try:
+        for n in range(1, repeat + 1):
+            started = time.perf_counter()
+            latencies, errors = await analyze_all(urls, concurrency)
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            print(f"pass {n}: {len(urls)} pages in {elapsed:.2f}s ({len(urls) / max(elapsed, 1e-9):.1f} pages/s), "
+                  f"p50 {percentile(latencies, 50) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms, "
+                  f"{len(errors)} errors, peak RSS {peak_rss_mb():.0f} MB")
+            for error in errors[:5]:
+                print(f"  {error}")
+            failed = max(failed, len(errors))
+    finally:
+        await close_client()
+        shutdown_executor()
+    return failed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Record analyses to an HTTP archive, or benchmark them offline")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="analyze URLs over the network, archiving every response")
+    record.add_argument("archive")
+    record.add_argument("urls", help="file with one URL per line")
+    record.add_argument("--concurrency", type=int, default=8)
+    run = commands.add_parser("run", help="analyze every archived page from the archive alone")
+    run.add_argument("archive")
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--latency-scale", type=float, default=0.0, help="replay recorded response times (1 = as recorded)")
+    args = parser.parse_args(argv)
+
+    # Read by app.config, so set before anything from app is imported
+    os.environ["HTTP_ARCHIVE_MODE"] = args.command if args.command == "record" else "replay"
+    os.environ["HTTP_ARCHIVE_PATH"] = args.archive
+    os.environ["RESULT_CACHE_BACKEND"] = "none"
+    if args.command == "run":
+        os.environ["HTTP_ARCHIVE_LATENCY_SCALE"] = str(args.latency_scale)
+    if args.command == "record":
+        urls = read_urls(args.urls)
+        failed = asyncio.run(run_passes(urls, args.concurrency, 1))
+        from app.replay import ArchiveReader, summarize
+
+        print(json.dumps(summarize(ArchiveReader(args.archive)), indent=2))
+        return 1 if failed == len(urls) else 0
+
+    urls = archived_pages(args.archive)
+    if not urls:
+        print(f"{args.archive} has no recorded pages")
+        return 1
+    return 1 if asyncio.run(run_passes(urls, args.concurrency, max(1, args.repeat))) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
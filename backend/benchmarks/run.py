@@ -0,0 +1,270 @@
+"""
+Benchmark Runner - Throughput, latency and peak RSS for the analyzer pipeline
+
+Run from backend/:
+    python -m benchmarks.run                        # full suite
+    python -m benchmarks.run --quick                # 10kb/100kb pages only
+    python -m benchmarks.run --target analyze_content --target end_to_end
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json --max-regression 0.2
+    python -m benchmarks.run --parser lxml          # any backend from HTML_PARSER
+
+Each case runs in a fresh process so peak RSS is per case. The end-to-end
+case serves the corpus from a local stub HTTP server, so no network is used.
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import PAGE_SIZES, ROBOTS_SIZES, page_names, page_by_name, robots_by_name
+
+PAGE_TARGETS = [
+    "parse_document",
+    "extract_json_ld",
+    "analyze_schema",
+    "analyze_content",
+    "analyze_technical",
+    "analyze_page",
+    "end_to_end",
+]
+ROBOTS_TARGETS = ["parse_robots_txt", "robots_access_matrix"]
+ALL_TARGETS = PAGE_TARGETS + ROBOTS_TARGETS
+
+QUICK_SIZES = ["10kb", "100kb"]
+
+LLMS_TXT = "# Example\nAbout: benchmark fixture site. Contact: bench@example.com\n"
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def measure(fn: Callable[[], Any], min_iterations: int, max_iterations: int, min_seconds: float) -> List[float]:
+    """Call fn repeatedly (after one warm-up call) and return per-call latencies"""
+    fn()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_iterations:
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+        if len(latencies) >= min_iterations and time.perf_counter() - started >= min_seconds:
+            break
+    return latencies
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    routes: Dict[str, Tuple[str, bytes]] = {}
+
+    def do_GET(self):
+        content_type, body = self.routes.get(self.path, ("text/plain", b""))
+        self.send_response(200 if self.path in self.routes else 404)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(html: str, robots: str) -> Tuple[ThreadingHTTPServer, str]:
+    StubHandler.routes = {
+        "/page": ("text/html; charset=utf-8", html.encode()),
+        "/robots.txt": ("text/plain", robots.encode()),
+        "/llms.txt": ("text/plain", LLMS_TXT.encode()),
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def build_case(target: str, name: str) -> Tuple[Callable[[], Any], int, Optional[Callable[[], None]]]:
+    """Return (benchmark callable, input bytes, cleanup) for one case"""
+    from app.analyzers.document import parse_document
+    from app.analyzers.schema_analyzer import analyze_schema, extract_json_ld
+    from app.analyzers.content_analyzer import analyze_content
+    from app.analyzers.technical_analyzer import analyze_technical
+    from app.analyzers.robots_analyzer import AI_BOTS, parse_robots_txt, is_bot_allowed
+    from app.executor import analyze_page
+
+    if target in ROBOTS_TARGETS:
+        content = robots_by_name(name)
+        if target == "parse_robots_txt":
+            return (lambda: parse_robots_txt(content)), len(content.encode()), None
+        rules = parse_robots_txt(content)
+        paths = ["/", "/private/public-a.html", "/search/page/product.php", "/cgi-bin/x?y=1"]
+        return (lambda: [is_bot_allowed(rules, b["user_agent"], p) for b in AI_BOTS for p in paths]), len(content.encode()), None
+
+    html = page_by_name(name)
+    size = len(html.encode())
+
+    if target == "parse_document":
+        return (lambda: parse_document(html)), size, None
+    if target == "analyze_page":
+        return (lambda: analyze_page(html)), size, None
+
+    if target == "end_to_end":
+        from app.pipeline import run_analysis
+        from app.result_cache import result_cache
+        from app.http_client import close_client
+
+        # Measure the full pipeline, not result-cache hits
+        result_cache.backend = None
+        server, base = start_stub_server(html, robots_by_name("medium"))
+        loop = asyncio.new_event_loop()
+
+        def cleanup():
+            loop.run_until_complete(close_client())
+            loop.close()
+            server.shutdown()
+
+        return (lambda: loop.run_until_complete(run_analysis(f"{base}/page"))), size, cleanup
+
+    doc = parse_document(html)
+    analyzers = {
+        "extract_json_ld": extract_json_ld,
+        "analyze_schema": analyze_schema,
+        "analyze_content": analyze_content,
+        "analyze_technical": analyze_technical,
+    }
+    analyzer = analyzers[target]
+    return (lambda: analyzer(doc)), size, None
+
+
+def run_case(target: str, name: str, min_iterations: int, max_iterations: int, min_seconds: float) -> Dict[str, Any]:
+    """Benchmark one (target, input) pair in the current process"""
+    fn, size, cleanup = build_case(target, name)
+    setup_rss = peak_rss_mb()
+    try:
+        latencies = measure(fn, min_iterations, max_iterations, min_seconds)
+    finally:
+        if cleanup:
+            cleanup()
+    latencies.sort()
+    mean = sum(latencies) / len(latencies)
+    return {
+        "target": target,
+        "input": name,
+        "input_bytes": size,
+        "iterations": len(latencies),
+        "pages_per_sec": round(1 / mean, 2) if mean else 0.0,
+        "mb_per_sec": round(size / mean / (1024 * 1024), 2) if mean else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "setup_rss_mb": round(setup_rss, 1),
+    }
+
+
+def _run_case_in_child(args: Tuple) -> Dict[str, Any]:
+    return run_case(*args)
+
+
+def run_suite(cases: List[Tuple[str, str]], isolate: bool, min_iterations: int, max_iterations: int, min_seconds: float) -> List[Dict[str, Any]]:
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for target, name in cases:
+        args = (target, name, min_iterations, max_iterations, min_seconds)
+        if isolate:
+            with ctx.Pool(1) as pool:
+                result = pool.apply(_run_case_in_child, (args,))
+        else:
+            result = run_case(*args)
+        results.append(result)
+        print(format_row(result), flush=True)
+    return results
+
+
+HEADER = f"{'target':<22}{'input':<12}{'KB':>8}{'iter':>6}{'pages/s':>12}{'MB/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>8}"
+
+
+def format_row(r: Dict[str, Any]) -> str:
+    return (
+        f"{r['target']:<22}{r['input']:<12}{r['input_bytes'] / 1024:>8.0f}{r['iterations']:>6}"
+        f"{r['pages_per_sec']:>12.1f}{r['mb_per_sec']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['peak_rss_mb']:>8.0f}"
+    )
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], max_regression: float) -> List[str]:
+    """Cases whose p50 latency grew by more than max_regression over the baseline"""
+    previous = {(r["target"], r["input"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        old = previous.get((r["target"], r["input"]))
+        if old is None or not old["p50_ms"]:
+            continue
+        change = r["p50_ms"] / old["p50_ms"] - 1
+        if change > max_regression:
+            regressions.append(f"{r['target']}/{r['input']}: p50 {old['p50_ms']:.2f} -> {r['p50_ms']:.2f} ms (+{change:.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the InsightEngine analyzers on a synthetic corpus")
+    parser.add_argument("--target", action="append", choices=ALL_TARGETS, help="benchmark only these targets (repeatable)")
+    parser.add_argument("--size", action="append", choices=list(PAGE_SIZES), help="page sizes to include (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="only the 10kb and 100kb pages")
+    parser.add_argument("--min-iterations", type=int, default=5)
+    parser.add_argument("--max-iterations", type=int, default=200)
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="keep iterating until this much time has passed")
+    parser.add_argument("--parser", help="HTML parser backend to benchmark (default: HTML_PARSER or stream)")
+    parser.add_argument("--no-isolate", action="store_true", help="run all cases in this process (RSS becomes cumulative)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results from a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p50 slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.parser:
+        # Read by app.config in each spawned case process
+        os.environ["HTML_PARSER"] = args.parser
+    targets = args.target or ALL_TARGETS
+    sizes = args.size or (QUICK_SIZES if args.quick else list(PAGE_SIZES))
+
+    cases = []
+    for target in targets:
+        if target in ROBOTS_TARGETS:
+            cases.extend((target, name) for name in ROBOTS_SIZES)
+        else:
+            cases.extend((target, name) for name in page_names(sizes))
+
+    print(HEADER)
+    results = run_suite(cases, not args.no_isolate, args.min_iterations, args.max_iterations, args.min_seconds)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Scoring Benchmark - Check that vectorized batch scoring matches the per-page path, and time both
+
+Run from backend/:
+    python -m benchmarks.scoring                  # 200k synthetic pages
+    python -m benchmarks.scoring --pages 1000000 --rules my_rules.json
+
+Feature vectors are generated directly, with values clustered on the rule
+thresholds (word counts around 300/500, allowed ratios k/n, ...) where an
+off-by-one or a rounding difference would show. Every page is scored with
+score_category/overall semantics one at a time and with score_pages in one
+call; exits non-zero if any category or overall score differs.
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+
+def generate(pages: int, seed: int = 7) -> List[Dict[str, Dict[str, Any]]]:
+    """Per-page feature dicts by category, shaped like the analyzers' output"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(pages):
+        total_bots = rng.randrange(1, 12)
+        robots = (
+            {"found": False, "fetch_error": True} if rng.random() < 0.05
+            else {"found": False} if rng.random() < 0.1
+            else {"found": True, "allowed_ratio": rng.randrange(total_bots + 1) / total_bots,
+                  "wildcard_blocks_all": rng.random() < 0.1}
+        )
+        schema = (
+            {"found": False} if rng.random() < 0.3
+            else {"found": True, "valuable_type_count": rng.randrange(6), "has_faq_schema": rng.random() < 0.3,
+                  "has_article_schema": rng.random() < 0.4, "has_organization_schema": rng.random() < 0.5,
+                  "invalid_count": rng.choice([0, 0, 0, 1, 3])}
+        )
+        content = {
+            "h1_count": rng.choice([0, 1, 1, 2]), "heading_count": rng.randrange(8),
+            "has_faq_section": rng.random() < 0.3, "has_answer_first": rng.random() < 0.5,
+            "word_count": rng.choice([0, 299, 300, 301, 499, 500, 501, rng.randrange(5000)]),
+        }
+        technical = {name: rng.random() < 0.6 for name in (
+            "has_meta_title", "has_meta_description", "has_canonical", "has_open_graph", "has_twitter_card", "is_ssr",
+        )}
+        llms_txt = (
+            {"found": False} if rng.random() < 0.6
+            else {"found": True, "content_length": rng.choice([49, 50, 200, 201, rng.randrange(3000)]),
+                  "has_description": rng.random() < 0.5, "has_attribution": rng.random() < 0.5}
+        )
+        rows.append({"robots": robots, "schema": schema, "content": content, "technical": technical, "llms_txt": llms_txt})
+    return rows
+
+
+def per_page(rows: List[Dict[str, Dict[str, Any]]], plan) -> Dict[str, List[int]]:
+    scores: Dict[str, List[int]] = {name: [] for name in ["overall"] + list(plan.categories)}
+    for row in rows:
+        page = {}
+        for name, category in plan.categories.items():
+            page[name] = category.score(category.vector(row.get(name, {})))
+            scores[name].append(page[name])
+        scores["overall"].append(plan.overall(page))
+    return scores
+
+
+def to_columns(rows: List[Dict[str, Dict[str, Any]]], plan) -> Dict[str, Any]:
+    """The rows as "<category>_<feature>" arrays, as the feature store would hand them over"""
+    import numpy
+
+    return {
+        f"{name}_{feature}": numpy.array([row.get(name, {}).get(feature, 0) for row in rows])
+        for name, category in plan.categories.items() for feature in category.features
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.scoring import ScoringPlan, load_rules, score_pages
+
+    parser = argparse.ArgumentParser(description="Check and time vectorized batch scoring")
+    parser.add_argument("--pages", type=int, default=200_000)
+    parser.add_argument("--rules", help="scoring rules JSON (default: the built-in table)")
+    args = parser.parse_args(argv)
+
+    plan = ScoringPlan(load_rules(args.rules))
+    rows = generate(args.pages)
+    columns = to_columns(rows, plan)
+
+    started = time.perf_counter()
+    expected = per_page(rows, plan)
+    scalar = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = score_pages(columns, plan)
+    vectorized = time.perf_counter() - started
+
+    print(f"{args.pages} pages: per page {scalar:.2f}s, score_pages {vectorized:.3f}s "
+          f"({scalar / max(vectorized, 1e-9):.0f}x)")
+    failures = 0
+    for name, want in expected.items():
+        got = actual[name].tolist()
+        mismatched = [i for i, (a, b) in enumerate(zip(want, got)) if a != b]
+        if mismatched:
+            failures += len(mismatched)
+            first = mismatched[0]
+            print(f"  {name}: {len(mismatched)} mismatches, first page {first}: {want[first]} != {got[first]} "
+                  f"{rows[first].get(name)}")
+    if failures:
+        return 1
+    print("All scores match")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
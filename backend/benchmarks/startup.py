@@ -0,0 +1,105 @@
+"""
+Startup Benchmark - Cold start time and first-request latency of a fresh server process
+
+Run from backend/:
+    python -m benchmarks.startup                        # each ANALYZER_WARMUP mode, 5 cold starts
+    python -m benchmarks.startup --repeat 10 --mode off --mode eager
+    python -m benchmarks.startup --env ANALYZER_EXECUTOR=process --env HTML_PARSER=lxml
+
+Every start is a new interpreter that imports main, runs the app lifespan and
+sends /api/analyze requests in-process (ASGI transport) for a page on a local
+stub server, so no network or uvicorn is involved. Reported per mode (median):
+interpreter start, import main, lifespan, first and second request, time to
+first response (the sum up to the first request) and peak RSS.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import page_by_name, robots_by_name
+from benchmarks.run import StubHandler, start_stub_server
+
+CHILD = """
+import time
+started = time.time()
+import asyncio, json, os, resource, sys
+t0 = time.perf_counter()
+import main
+import httpx
+imported = time.perf_counter()
+
+async def run():
+    timings = {}
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            for label, path in (("first_request", "/page"), ("second_request", "/page2")):
+                t = time.perf_counter()
+                response = await client.post("/api/analyze", json={"url": os.environ["STARTUP_BASE"] + path})
+                response.raise_for_status()
+                timings[label] = time.perf_counter() - t
+        timings["lifespan"] = ready - imported
+    return timings
+
+timings = asyncio.run(run())
+timings["interpreter"] = started - float(os.environ["STARTUP_SPAWNED"])
+timings["import"] = imported - t0
+timings["first_response"] = timings["interpreter"] + timings["import"] + timings["lifespan"] + timings["first_request"]
+timings["rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(timings))
+"""
+
+FIELDS = ["interpreter", "import", "lifespan", "first_request", "second_request", "first_response", "rss_mb"]
+
+
+def cold_start(base: str, env: Dict[str, str]) -> Dict[str, float]:
+    child_env = {**os.environ, **env, "STARTUP_BASE": base, "STARTUP_SPAWNED": repr(time.time())}
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], env=child_env, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold start and first-request latency")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mode", action="append", choices=["off", "background", "eager"],
+                        help="ANALYZER_WARMUP modes to compare (repeatable; default all)")
+    parser.add_argument("--env", action="append", default=[], help="extra NAME=VALUE for every start")
+    parser.add_argument("--output", help="write the medians as JSON")
+    args = parser.parse_args(argv)
+
+    server, base = start_stub_server(page_by_name("100kb-10ld"), robots_by_name("small"))
+    StubHandler.routes["/page2"] = StubHandler.routes["/page"]
+    extra = dict(item.split("=", 1) for item in args.env)
+
+    results = {}
+    print(f"{'mode':<12}" + "".join(f"{field:>16}" for field in FIELDS))
+    try:
+        for mode in args.mode or ["off", "background", "eager"]:
+            # Result/side-file caches are in memory, so every start sees them empty
+            runs = [cold_start(base, {**extra, "ANALYZER_WARMUP": mode}) for _ in range(args.repeat)]
+            medians = {field: statistics.median(run[field] for run in runs) for field in FIELDS}
+            results[mode] = medians
+            print(f"{mode:<12}" + "".join(
+                f"{medians[field]:>14.1f}MB" if field == "rss_mb" else f"{medians[field] * 1000:>14.1f}ms"
+                for field in FIELDS
+            ))
+    finally:
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,57 @@
 # InsightEngine Backend
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.api.routes import router
+from app.http_client import get_client, close_client
+from app.host_policy import host_policy
+from app.executor import WARMUP_MODES, get_executor, shutdown_executor, warm_up_pool
+from app.analyzers.parser_backends import get_parser
+from app.jobs import start_job_workers, stop_job_workers
+from app.feature_store import start_feature_store, stop_feature_store
+from app.scoring import get_scoring_plan
+from app.render import close_render_pool, get_render_pool
+from app import config
+from app.metrics import render_metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP client and analyzer pool for the lifetime of the worker
+    get_client()
+    get_executor()
+    get_parser(config.HTML_PARSER)  # fail fast on an unknown or uninstalled parser
+    get_scoring_plan()  # compile the scoring rule table once, failing fast if it is invalid
+    get_render_pool()  # validates RENDER_CHECK; the browser itself starts on the first render
+    if config.ANALYZER_WARMUP not in WARMUP_MODES:
+        raise ValueError(f"ANALYZER_WARMUP must be one of {', '.join(WARMUP_MODES)}, got {config.ANALYZER_WARMUP!r}")
+    # Analyzers and parser packages are imported on first use; warming does it ahead of the first page
+    warmup = None
+    if config.ANALYZER_WARMUP == "eager":
+        await warm_up_pool()
+    elif config.ANALYZER_WARMUP == "background":
+        warmup = asyncio.create_task(warm_up_pool())
+    start_feature_store()
+    start_job_workers()
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    await stop_job_workers()
+    await stop_feature_store()
+    await close_render_pool()
+    await close_client()
+    host_policy.clear()  # its slot semaphores belong to this event loop
+    shutdown_executor()
+
 
 app = FastAPI(
     title="InsightEngine API",
     description="AI SEO Analyzer - Backend API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS for frontend
@@ -24,3 +68,8 @@ app.include_router(router, prefix="/api")
 @app.get("/")
 async def root():
     return {"message": "InsightEngine API", "status": "running"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return render_metrics()
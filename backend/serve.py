@@ -0,0 +1,176 @@
+"""
+Serve - Multi-process launcher: preload the app once, then fork uvicorn workers that share its memory
+
+Run from backend/:
+    python serve.py                         # SERVER_WORKERS workers (default: one per CPU) on :8000
+    python serve.py --workers 8 --host 0.0.0.0 --port 8080
+
+The parent imports main, the analyzers, the parser backend and the scoring
+plan, analyzes a tiny page once, freezes the heap (gc.freeze) and binds the
+listening socket. Workers are forked from it, so those modules, tables and
+compiled regexes live in copy-on-write pages shared by every worker instead of
+one copy per process. Each worker runs the normal app lifespan (HTTP client,
+analyzer pool, job workers) and accepts from the shared socket.
+
+Fetched robots.txt/llms.txt files are shared between workers through an SQLite
+file on /dev/shm (SIDE_FILE_SHARED_PATH; created and removed by the launcher
+when not set), so one worker's download serves all of them. Use
+RESULT_CACHE_BACKEND=sqlite to share page results as well; metrics and
+/api/cache/stats are per worker.
+
+The parent restarts workers that die and forwards SIGINT/SIGTERM for a
+graceful shutdown. If a worker fails during startup (a bad setting), every
+worker is stopped and the launcher exits with status 1.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+# A worker exiting with an error sooner than this after its start is a startup failure, not a crash
+STARTUP_GRACE = 10.0
+
+SHARED_FILES = ("", "-wal", "-shm")
+
+
+def shared_cache_path() -> str:
+    """A fresh side-file store path in shared memory (or the temp dir where there is no /dev/shm)"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"insightengine-sidefiles-{os.getpid()}.sqlite3")
+
+
+def preload() -> None:
+    """Import and warm everything read-only in the parent, then keep the GC off the inherited pages"""
+    import main  # noqa: F401 - builds the app and imports routes, caches and config
+    from app.analyzers.parser_backends import get_parser
+    from app.executor import warm_up
+    from app.scoring import get_scoring_plan
+    from app import config
+
+    get_parser(config.HTML_PARSER)
+    get_scoring_plan()
+    warm_up()
+    gc.collect()
+    # Objects that exist now are never scanned again, so collections in workers don't write to shared pages
+    gc.freeze()
+
+
+def bind(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, args: argparse.Namespace) -> int:
+    """Body of a forked worker: serve the preloaded app on the inherited socket"""
+    import uvicorn
+    import main
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(
+        main.app, log_level=args.log_level, access_log=args.access_log, timeout_keep_alive=args.keep_alive,
+    ))
+    server.run(sockets=[sock])
+    return 0 if server.started else 3
+
+
+class Supervisor:
+    """Forks the workers, restarts the ones that die and stops them all on a signal"""
+
+    def __init__(self, sock: socket.socket, args: argparse.Namespace):
+        self.sock = sock
+        self.args = args
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+        self.failed = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = run_worker(self.sock, self.args)
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+
+    def stop(self, signum: int = signal.SIGTERM, frame=None) -> None:
+        self.stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        for _ in range(self.args.workers):
+            self.spawn()
+        print(f"Serving on {self.args.host}:{self.args.port} with {len(self.workers)} workers "
+              f"(parent {os.getpid()})", file=sys.stderr)
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.workers.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0 and time.monotonic() - started < STARTUP_GRACE:
+                print(f"Worker {pid} failed to start (exit {code}), stopping", file=sys.stderr)
+                self.failed = True
+                self.stop()
+                continue
+            print(f"Worker {pid} exited ({code}), starting a replacement", file=sys.stderr)
+            self.spawn()
+        return 1 if self.failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app import config
+
+    parser = argparse.ArgumentParser(description="Serve the API from preloaded, forked worker processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--keep-alive", type=int, default=5, help="seconds an idle keep-alive connection stays open")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", dest="access_log", action="store_false")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    owned_path = None
+    if args.workers > 1 and not config.SIDE_FILE_SHARED_PATH:
+        # Set before app.cache is imported; the environment carries it to analyzer pool processes too
+        owned_path = config.SIDE_FILE_SHARED_PATH = os.environ["SIDE_FILE_SHARED_PATH"] = shared_cache_path()
+
+    try:
+        preload()
+        sock = bind(args.host, args.port, args.backlog)
+        return Supervisor(sock, args).run()
+    finally:
+        if owned_path is not None:
+            for suffix in SHARED_FILES:
+                try:
+                    os.remove(owned_path + suffix)
+                except FileNotFoundError:
+                    pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""
+Baseline Analyzers - Frozen copy of the original BeautifulSoup schema, content and technical analyzers
+
+Kept unchanged as the reference the parser backends are tested against
+(tests/test_parser_parity.py). Do not update these to follow the app.
+"""
@@ -0,0 +1,67 @@
+"""
+Host Policy - A half-open host's probe must not be lost when its request never gets a slot
+
+Run from backend/:
+    python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+from app.host_policy import HALF_OPEN, HostPolicy, HostUnavailable
+
+URL = "http://example.test/page"
+
+
+def half_open_policy(queue_timeout: float) -> HostPolicy:
+    """A policy whose only slot for URL's host is taken, with the circuit waiting for a probe"""
+    policy = HostPolicy(concurrency=1, queue_timeout=queue_timeout, max_hosts=10)
+    state = policy.host(URL)
+    state.circuit = HALF_OPEN
+    return policy
+
+
+async def probe_waiting_for_a_slot(policy: HostPolicy) -> asyncio.Task:
+    async def probe() -> None:
+        async with policy.request(URL, 5.0):
+            pass
+
+    task = asyncio.create_task(probe())
+    await asyncio.sleep(0)
+    assert policy.host(URL).probing
+    return task
+
+
+def test_cancelled_probe_frees_the_circuit():
+    async def scenario() -> None:
+        policy = half_open_policy(queue_timeout=60.0)
+        state = policy.host(URL)
+        await state.slots.acquire()
+        task = await probe_waiting_for_a_slot(policy)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not state.probing
+
+        # The next request becomes the probe instead of being refused
+        state.slots.release()
+        async with policy.request(URL, 5.0):
+            assert state.probing
+        assert not state.probing
+
+    asyncio.run(scenario())
+
+
+def test_probe_timing_out_for_a_slot_frees_the_circuit():
+    async def scenario() -> None:
+        policy = half_open_policy(queue_timeout=0.01)
+        state = policy.host(URL)
+        await state.slots.acquire()
+        task = await probe_waiting_for_a_slot(policy)
+
+        with pytest.raises(HostUnavailable):
+            await task
+        assert not state.probing
+
+    asyncio.run(scenario())
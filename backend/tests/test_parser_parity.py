@@ -0,0 +1,85 @@
+"""
+Parser Parity - Every HTML parser backend must give the original analyzers' results
+
+The reference is the frozen BeautifulSoup analyzers in tests/baseline, run
+on the raw HTML, not the soup backend: a change in the shared extraction
+(ParsedDocument) shows up for every backend at once. Only the fields the
+original analyzers returned are compared (features and text_length came
+later). Run from backend/:
+    python -m pytest tests
+"""
+from functools import lru_cache
+from typing import Any, Dict, List
+from unittest import mock
+
+import pytest
+
+from app.analyzers.content_analyzer import analyze_content
+from app.analyzers.parser_backends import available_backends, get_parser
+from app.analyzers.schema_analyzer import analyze_schema
+from app.analyzers.technical_analyzer import analyze_technical
+from benchmarks.corpus import PAGE_SIZES, page_by_name, page_names
+from benchmarks.parity import EDGE_CASES
+from tests.baseline import content_analyzer, schema_analyzer, technical_analyzer
+
+
+def expand_graphs(schemas: List[Any]) -> List[Any]:
+    """The one intended change to JSON-LD extraction: @graph members count as entities (a bare wrapper does not)"""
+    entities = []
+    for item in schemas:
+        graph = item.get("@graph") if isinstance(item, dict) else None
+        if isinstance(graph, list):
+            if "@type" in item:
+                entities.append(item)
+            entities.extend(member for member in graph if isinstance(member, dict))
+        elif isinstance(item, dict):
+            entities.append(item)
+    return entities
+
+
+def baseline_schema(html: str) -> Dict[str, Any]:
+    extract = schema_analyzer.extract_json_ld
+    with mock.patch.object(schema_analyzer, "extract_json_ld", lambda page: expand_graphs(extract(page))):
+        return schema_analyzer.analyze_schema(html)
+
+
+ANALYZERS = {
+    "schema": (baseline_schema, analyze_schema),
+    "content": (content_analyzer.analyze_content, analyze_content),
+    "technical": (technical_analyzer.analyze_technical, analyze_technical),
+}
+
+# Script types with stray whitespace or capitals, which the original regex missed
+CHANGED_SINCE_BASELINE = {"json-ld"}
+
+PAGES = [name for name in EDGE_CASES if name not in CHANGED_SINCE_BASELINE] + page_names(list(PAGE_SIZES))
+
+
+def page_html(name: str) -> str:
+    return EDGE_CASES[name] if name in EDGE_CASES else page_by_name(name)
+
+
+@lru_cache(maxsize=None)
+def expected(name: str) -> Dict[str, Dict[str, Any]]:
+    html = page_html(name)
+    return {category: reference(html) for category, (reference, _) in ANALYZERS.items()}
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("page", PAGES)
+def test_backend_matches_baseline(page: str, backend: str):
+    doc = get_parser(backend)(page_html(page))
+    for category, (_, analyze) in ANALYZERS.items():
+        want = expected(page)[category]
+        got = analyze(doc).to_dict()
+        assert {key: got.get(key) for key in want} == want, f"{backend} {page} {category}"
+
+
+@pytest.mark.parametrize("backend", [b for b in available_backends() if b != "soup"])
+@pytest.mark.parametrize("page", sorted(CHANGED_SINCE_BASELINE) + ["anchors"])
+def test_backend_matches_soup(page: str, backend: str):
+    """Pages outside the baseline comparison, and crawl links, still agree across backends"""
+    reference, doc = get_parser("soup")(page_html(page)), get_parser(backend)(page_html(page))
+    assert (doc.anchors, doc.base_href) == (reference.anchors, reference.base_href)
+    for _, analyze in ANALYZERS.values():
+        assert analyze(doc).to_dict() == analyze(reference).to_dict()